@@ -0,0 +1,203 @@
+"""
+    Module contains generator of synthetic database (tree of linked html files) used by benchmarks.
+
+    Same parameters and seed always give same database, so results of benchmarks run on different machines
+    (or different versions of code) can be compared. Words are drawn from synthetic vocabulary with Zipfian
+    distribution (few very frequent words, long tail of rare ones), and links are drawn with Zipfian
+    distribution over documents, so few documents have many incoming links, as in real sites.
+"""
+
+__author__ = 'Acko'
+
+import os
+import json
+import random
+import bisect
+
+
+# Syllables from which vocabulary words are made (consonant + vowel, so no word is AND, OR or NOT)
+SYLLABLES = ['ba', 'ce', 'di', 'fo', 'gu', 'ka', 'le', 'mi', 'no', 'pu',
+             'ra', 'se', 'ti', 'vo', 'zu', 'ja', 'he', 'ri', 'so', 'tu']
+
+# Name of file in which parameters of generated database are written
+DESCRIPTION_FILE = 'corpus.json'
+
+# Number of words in one paragraph of generated document
+PARAGRAPH_SIZE = 40
+
+
+def make_word(rank):
+    """ Function which returns vocabulary word with given rank (0 is most frequent word)
+
+        Args:
+            rank - (int) rank of word
+
+        Return:
+            Word made of at least two syllables
+    """
+
+    syllables = []
+    while True:
+        syllables.append(SYLLABLES[rank % len(SYLLABLES)])
+        rank //= len(SYLLABLES)
+        if rank == 0 and len(syllables) >= 2:
+            return ''.join(syllables)
+
+
+class ZipfSampler(object):
+    """ Class which draws ranks 0..size-1 with Zipfian distribution (probability of rank r is proportional
+        to 1 / (r + 1) ** exponent)
+
+        USE:
+            sampler = ZipfSampler(1000, 1.0, random.Random(seed))
+            rank = sampler.sample()
+    """
+
+    def __init__(self, size, exponent, generator):
+        """ Constructor, calculates cumulative weights of all ranks
+
+            Args:
+                size - (int) number of ranks
+                exponent - (float) exponent of distribution (bigger exponent, more skewed distribution)
+                generator - random.Random instance used for drawing
+        """
+
+        self._cumulative, total = [], 0.0
+        for rank in xrange(size):
+            total += 1.0 / (rank + 1) ** exponent
+            self._cumulative.append(total)
+        self._total = total
+        self._generator = generator
+
+    def sample(self):
+        """ Method which draws one rank
+
+            Return:
+                (int) drawn rank
+        """
+
+        return min(bisect.bisect(self._cumulative, self._generator.random() * self._total),
+                   len(self._cumulative) - 1)
+
+
+def document_path(index, depth, branching):
+    """ Function which returns path of document (relative to database root)
+
+        Documents are spread over directory tree: document with index i is placed i % (depth + 1) levels deep,
+        and directory on each level is chosen from branching directories.
+
+        Args:
+            index - (int) index of document
+            depth - (int) maximal depth of directory tree
+            branching - (int) number of subdirectories of every directory
+
+        Return:
+            Relative path of document
+    """
+
+    parts, rest = [], index
+    for level in xrange(index % (depth + 1)):
+        parts.append('d%d' % (rest % branching))
+        rest //= branching
+    parts.append('doc%d.html' % index)
+    return os.path.join(*parts)
+
+
+def generate_corpus(path, documents, vocabulary=10000, words_per_document=200, links_per_document=5, depth=3,
+                    branching=10, exponent=1.0, seed=0):
+    """ Function which writes synthetic database into given directory
+
+        If directory already contains database generated with same parameters (its description file matches),
+        nothing is written, so big databases can be reused between benchmark runs.
+
+        Args:
+            path - path to directory in which database is written (created if it doesn't exist)
+            documents - (int) number of html files
+            vocabulary - (int) number of different words
+            words_per_document - (int) average number of words in document (actual number is between half and
+                    one and a half of it)
+            links_per_document - (int) average number of links in document (link density)
+            depth - (int) maximal depth of directory tree
+            branching - (int) number of subdirectories of every directory
+            exponent - (float) exponent of Zipfian distribution of words and links
+            seed - seed of random generator
+
+        Return:
+            Dictionary with parameters of database
+    """
+
+    description = {'documents': documents, 'vocabulary': vocabulary, 'words_per_document': words_per_document,
+                   'links_per_document': links_per_document, 'depth': depth, 'branching': branching,
+                   'exponent': exponent, 'seed': seed}
+    description_path = os.path.join(path, DESCRIPTION_FILE)
+    if os.path.isfile(description_path):
+        with open(description_path) as description_file:
+            if json.load(description_file) == description:
+                return description
+
+    generator = random.Random(seed)
+    words = ZipfSampler(vocabulary, exponent, generator)
+    targets = ZipfSampler(documents, exponent, generator)
+    # most linked documents are spread over whole tree, not only first ones
+    order = range(documents)
+    generator.shuffle(order)
+
+    for index in xrange(documents):
+        relative_path = document_path(index, depth, branching)
+        file_path = os.path.join(path, relative_path)
+        if not os.path.isdir(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+
+        count = generator.randint(words_per_document // 2, words_per_document * 3 // 2)
+        text = [make_word(words.sample()) for i in xrange(count)]
+        paragraphs = ['<p>%s</p>' % ' '.join(text[start:start + PARAGRAPH_SIZE])
+                      for start in xrange(0, len(text), PARAGRAPH_SIZE)]
+
+        links = []
+        for i in xrange(generator.randint(0, 2 * links_per_document)):
+            target = document_path(order[targets.sample()], depth, branching)
+            link = os.path.relpath(target, os.path.dirname(relative_path) or os.curdir)
+            links.append('<a href="%s%s">%s</a>' % (link, '#top' if i % 4 == 3 else '', make_word(i)))
+        if index % 10 == 0:
+            links.append('<a href="http://example.com/index.html">external</a>')
+
+        with open(file_path, 'w') as document:
+            document.write('<html><head><title>%s</title></head><body><h1>%s</h1>%s%s</body></html>\n' %
+                           (text[0] if text else '', 'doc%d' % index, ''.join(paragraphs), ' '.join(links)))
+
+    with open(description_path, 'w') as description_file:
+        json.dump(description, description_file)
+    return description
+
+
+def create_queries(vocabulary, count, seed=0):
+    """ Function which creates queries of every kind for database with given vocabulary
+
+        Single word queries take words from frequent, middle and rare part of vocabulary. Boolean queries
+        combine frequent and middle words with AND, OR and NOT, and phrase queries are made of two of most
+        frequent words (so they are found in database).
+
+        Args:
+            vocabulary - (int) number of different words in database
+            count - (int) number of queries of every kind
+            seed - seed of random generator
+
+        Return:
+            Dictionary kind ('single', 'boolean', 'phrase') -> list of queries
+    """
+
+    generator = random.Random(seed)
+    top, frequent, middle = min(vocabulary, 10), min(vocabulary, 50), max(1, vocabulary // 10)
+
+    def word(limit, start=0):
+        return make_word(generator.randint(start, max(start, limit - 1)))
+
+    single = [word(frequent) if i % 3 == 0 else word(middle, frequent) if i % 3 == 1 else
+              word(vocabulary, middle) for i in xrange(count)]
+    templates = ['%s AND %s', '%s OR %s', '%s AND NOT %s', '( %s OR %s ) AND %s']
+    boolean = [templates[i % len(templates)] % tuple(word(frequent) if j == 0 else word(middle)
+                                                      for j in xrange(templates[i % len(templates)].count('%s')))
+               for i in xrange(count)]
+    phrase = ['"%s %s"' % (word(top), word(top)) for i in xrange(count)]
+
+    return {'single': single, 'boolean': boolean, 'phrase': phrase}
@@ -0,0 +1,315 @@
+"""
+    End-to-end benchmarks of search engine: building index from database, saving and loading snapshot,
+    and latency of single word, boolean and phrase queries (with and without ranking), measured on synthetic
+    databases (made by corpus module) of different sizes.
+
+    Every stage is run in separate process, so peak memory (maximal resident set size) of each stage is
+    measured on its own (before queries are measured on built or loaded index, and after them). Results are
+    written as JSON.
+
+    USE:
+        python -m Benchmarks.end_to_end --scales 1000 10000 100000 1000000 --output results.json
+"""
+
+__author__ = 'Acko'
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import traceback
+import multiprocessing
+from Queue import Empty
+
+from search.search import Search
+import corpus
+
+
+# Numbers of documents at which benchmarks are run by default
+SCALES = [1000, 10000]
+
+# Number of different queries of every kind which are measured
+QUERIES = 100
+
+# Number of results which are ranked when ranking is limited (top-k)
+TOP = 10
+
+# Time (in seconds) after which parent checks if benchmark process is still alive, while it waits for result
+POLL_INTERVAL = 1.0
+
+
+def peak_memory():
+    """ Function which returns peak memory used by current process
+
+        Return:
+            Maximal resident set size in kilobytes
+    """
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+class SilentOutput(object):
+    """ Output adapter which prints nothing, so ranked queries can be measured through find_expression without
+        printing results
+    """
+
+    def print_results(self, final_list, priority_dictionary):
+        pass
+
+    def print_explanation(self, explanation):
+        pass
+
+
+def summarize(latencies):
+    """ Function which calculates statistics of measured latencies
+
+        Args:
+            latencies - list of latencies in seconds
+
+        Return:
+            Dictionary with mean, median (p50), p95, p99 and maximal latency, and throughput (queries per second)
+    """
+
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def percentile(value):
+        return ordered[min(len(ordered) - 1, int(value * len(ordered)))]
+
+    return {'count': len(ordered), 'mean': total / len(ordered), 'p50': percentile(0.5), 'p95': percentile(0.95),
+            'p99': percentile(0.99), 'max': ordered[-1], 'throughput': len(ordered) / total if total > 0 else None}
+
+
+def measure_queries(search, queries):
+    """ Function which measures latency of every kind of queries, ranked fully, ranked top-k and unranked
+
+        Every query is searched once per mode (cache of results and word cache are cleared before each mode, so
+        results are never read from cache, and every mode starts with no decoded words). All modes go through find_expression, fully ranked results are not printed (output
+        of search is replaced by SilentOutput while queries are measured). Besides total latency, time of
+        ranking stage is summarized separately.
+
+        Args:
+            search - Search instance
+            queries - dictionary kind -> list of queries (returned by corpus.create_queries)
+
+        Return:
+            Dictionary kind -> mode -> statistics (with 'rank' statistics for ranked modes)
+    """
+
+    modes = {'ranked': lambda query, timings: search.find_expression(query, False, None, timings),
+             'top': lambda query, timings: search.find_expression(query, True, TOP, timings),
+             'unranked': lambda query, timings: search.find_expression(query, True, None, timings)}
+
+    results, output = {}, search._io
+    search._io = SilentOutput()
+    try:
+        for kind, kind_queries in queries.items():
+            results[kind] = {}
+            for mode, function in sorted(modes.items()):
+                search._result_cache.clear()
+                search._term_cache.clear()
+                latencies, rank = [], []
+                for query in kind_queries:
+                    timings = {}
+                    start = time.time()
+                    function(query, timings)
+                    latencies.append(time.time() - start)
+                    rank.append(timings.get('rank', 0.0))
+                results[kind][mode] = summarize(latencies)
+                if mode != 'unranked':
+                    results[kind][mode]['rank'] = summarize(rank)
+    finally:
+        search._io = output
+    return results
+
+
+def benchmark_build(database, snapshot_path, queries, processes):
+    """ Function which builds index from database, saves it into snapshot and measures queries on it
+
+        Args:
+            database - path to database
+            snapshot_path - path to snapshot file which is written
+            queries - dictionary kind -> list of queries
+            processes - (int) number of processes used for parsing
+
+        Return:
+            Dictionary with results ('peak_memory_kb' of build is measured after index is built and saved, before
+            any query, and 'peak_memory_kb' of whole result after queries)
+    """
+
+    start = time.time()
+    search = Search(database, processes)
+    build = time.time() - start
+    documents = len(search._file_list)
+    words = sum(search._file_words_list)
+
+    start = time.time()
+    search.save(snapshot_path)
+    save = time.time() - start
+    build_memory = peak_memory()
+
+    return {'build': {'time': build, 'documents_per_second': documents / build, 'words_per_second': words / build,
+                      'documents': documents, 'words': words, 'peak_memory_kb': build_memory},
+            'save': {'time': save, 'bytes': os.path.getsize(snapshot_path)},
+            'queries': measure_queries(search, queries),
+            'peak_memory_kb': peak_memory()}
+
+
+def benchmark_load(snapshot_path, queries, frozen):
+    """ Function which loads index from snapshot and measures queries on it
+
+        Args:
+            snapshot_path - path to snapshot file
+            queries - dictionary kind -> list of queries
+            frozen - (bool) flag which indicates if index is loaded as frozen
+
+        Return:
+            Dictionary with results ('peak_memory_kb' of load is measured before any query, same as in build)
+    """
+
+    start = time.time()
+    search = Search.load(snapshot_path, frozen=frozen)
+    load = time.time() - start
+    load_memory = peak_memory()
+
+    return {'load': {'time': load, 'peak_memory_kb': load_memory}, 'queries': measure_queries(search, queries),
+            'peak_memory_kb': peak_memory()}
+
+
+def _run(result_queue, function, args):
+    """ Function which runs benchmark function in child process and sends to parent tuple (True, its result),
+        or (False, traceback) if it raised exception
+    """
+
+    try:
+        result_queue.put((True, function(*args)))
+    except Exception:
+        result_queue.put((False, traceback.format_exc()))
+
+
+def run_isolated(function, *args):
+    """ Function which runs benchmark function in new process (so its peak memory is measured on its own)
+
+        Args:
+            function - benchmark function
+            args - arguments of function
+
+        Return:
+            Result of function
+
+        Raise:
+            Exception - if function raised exception in child process (message contains its traceback), or child
+                    process exited without sending result
+    """
+
+    result_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run, args=(result_queue, function, args))
+    process.start()
+    result = None
+    try:
+        while result is None:
+            try:
+                result = result_queue.get(timeout=POLL_INTERVAL)
+            except Empty:
+                # result which was sent right before child exited is already in queue
+                if not process.is_alive() and result_queue.empty():
+                    break
+    except KeyboardInterrupt:
+        process.terminate()
+        raise
+    finally:
+        process.join()
+
+    if result is None:
+        raise Exception("Benchmark process exited with code %d without result" % process.exitcode)
+    succeeded, value = result
+    if not succeeded:
+        raise Exception("Benchmark process failed:\n%s" % value)
+    return value
+
+
+def run_scale(documents, directory, options):
+    """ Function which runs all end-to-end benchmarks on database with given number of documents
+
+        Args:
+            documents - (int) number of documents
+            directory - directory in which database and snapshot are written
+            options - parsed command line arguments
+
+        Return:
+            Dictionary with results of all benchmarks
+    """
+
+    database = os.path.join(directory, 'corpus_%d' % documents)
+    start = time.time()
+    description = corpus.generate_corpus(database, documents, options.vocabulary, options.words,
+                                         options.links, options.depth, options.branching, options.exponent,
+                                         options.seed)
+    generate = time.time() - start
+
+    queries = corpus.create_queries(options.vocabulary, options.queries, options.seed)
+    snapshot_path = os.path.join(directory, 'index_%d.snapshot' % documents)
+    try:
+        return {'corpus': description,
+                'generate_time': generate,
+                'build': run_isolated(benchmark_build, database, snapshot_path, queries, options.processes),
+                'load': run_isolated(benchmark_load, snapshot_path, queries, False),
+                'load_frozen': run_isolated(benchmark_load, snapshot_path, queries, True)}
+    finally:
+        os.remove(snapshot_path)
+
+
+def main(arguments=None):
+    """ Function which parses command line arguments, runs benchmarks for every scale and writes results
+
+        Args:
+            arguments - list of command line arguments, default is None (sys.argv is used)
+
+        Return:
+            Dictionary with results
+    """
+
+    arg_parser = argparse.ArgumentParser(description='End-to-end benchmarks of search engine.')
+    arg_parser.add_argument('--scales', type=int, nargs='+', default=SCALES, help='numbers of documents')
+    arg_parser.add_argument('--vocabulary', type=int, default=10000, help='number of different words')
+    arg_parser.add_argument('--words', type=int, default=200, help='average number of words in document')
+    arg_parser.add_argument('--links', type=int, default=5, help='average number of links in document')
+    arg_parser.add_argument('--depth', type=int, default=3, help='maximal depth of directory tree')
+    arg_parser.add_argument('--branching', type=int, default=10, help='number of subdirectories of directory')
+    arg_parser.add_argument('--exponent', type=float, default=1.0, help='exponent of Zipfian distribution')
+    arg_parser.add_argument('--seed', type=int, default=0, help='seed of random generator')
+    arg_parser.add_argument('--queries', type=int, default=QUERIES, help='number of queries of every kind')
+    arg_parser.add_argument('--processes', type=int, default=1,
+                            help='number of processes used for parsing html files (0 means one per CPU)')
+    arg_parser.add_argument('--directory', help='directory in which databases are kept (they are reused '
+                                                'between runs), default is temporary directory')
+    arg_parser.add_argument('--output', help='path to JSON file with results (default is standard output)')
+    options = arg_parser.parse_args(arguments)
+    if options.processes <= 0:
+        options.processes = None
+
+    directory = options.directory if options.directory is not None else tempfile.mkdtemp()
+    try:
+        results = {'python': sys.version.split()[0], 'platform': sys.platform,
+                   'scales': [dict(run_scale(documents, directory, options), documents=documents)
+                              for documents in options.scales]}
+    finally:
+        if options.directory is None:
+            shutil.rmtree(directory)
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if options.output is not None:
+        with open(options.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print output
+    return results
+
+
+if __name__ == '__main__':
+    main()
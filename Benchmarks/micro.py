@@ -0,0 +1,232 @@
+"""
+    Microbenchmarks of core structures (Trie, Graph and PostfixParser), with comparison against baseline.
+
+    Every benchmark times one hot operation over input of given size. Setup (building input) is not timed,
+    operation is run several times and shortest time is kept (as timeit does, shortest time is least
+    disturbed by other processes). Results can be written as JSON baseline, and later run can be compared
+    with it: benchmark is regression if it is slower than baseline by more than threshold.
+
+    USE:
+        python -m Benchmarks.micro --output baseline.json
+        python -m Benchmarks.micro --compare baseline.json --threshold 0.2
+"""
+
+__author__ = 'Acko'
+
+import re
+import sys
+import json
+import argparse
+import timeit
+
+from trie.trie import Trie
+from graph.graph import Graph
+from utils.postfix_parser import PostfixParser
+from corpus import make_word
+
+
+# Input sizes at which every benchmark is run by default
+SIZES = [100, 1000, 10000]
+
+# Number of times every benchmark is run (shortest time is kept)
+REPEAT = 5
+
+# Relative slowdown (0.2 is 20% slower) over which benchmark is reported as regression
+THRESHOLD = 0.2
+
+# Number of documents in index over which postfix lists are calculated
+DOCUMENTS = 1000
+
+
+def _words(size):
+    return [make_word(rank) for rank in xrange(size)]
+
+
+def _trie(size):
+    trie = Trie()
+    for word in _words(size):
+        trie.add_word(word)
+    return trie
+
+
+def _graph(size):
+    graph = Graph(directed=True)
+    for key in xrange(size):
+        graph.create_node(key)
+    nodes = [graph.get_node(key) for key in xrange(size)]
+    return graph, nodes
+
+
+def _linked_graph(size):
+    graph, nodes = _graph(size)
+    for index, node in enumerate(nodes):
+        for target in set((index + step) % size for step in (1, 7, 31)) - set([index]):
+            graph.connect_nodes(node, nodes[target])
+    return graph, nodes
+
+
+def _expression(size):
+    """ Function which creates expression with given number of operands (words and syntagms) joined
+        with AND, OR and NOT operators
+    """
+
+    operators = [' AND ', ' OR ', ' AND NOT ']
+    words = _words(size)
+    parts = [('"%s %s"' % (word, words[0]) if index % 10 == 9 else word) for index, word in enumerate(words)]
+    return parts[0] + ''.join(operators[index % len(operators)] + part for index, part in enumerate(parts[1:]))
+
+
+def _postfix_lists(size):
+    """ Function which creates postfix list of expression (with given number of operands) in which operands
+        are replaced by sorted lists of documents, and list of all documents
+    """
+
+    documents = DOCUMENTS
+    postfix_list = PostfixParser.convert_postfix(_expression(size), {})
+    operand, lists = 0, []
+    for element in postfix_list:
+        if element in PostfixParser.OPERATORS:
+            lists.append(element)
+        else:
+            operand += 1
+            lists.append(range(operand % 7, documents, 2 + operand % 5))
+    return lists, range(documents)
+
+
+def _add_words(words):
+    trie = Trie()
+    for word in words:
+        trie.add_word(word)
+
+
+def _remove_nodes(state):
+    graph, nodes = state
+    for node in nodes:
+        graph.remove_node(node)
+
+
+def _connect_nodes(state):
+    graph, nodes = state
+    for index, node in enumerate(nodes):
+        graph.connect_nodes(node, nodes[(index + 1) % len(nodes)])
+
+
+# Benchmark name -> (setup function which creates input of given size, timed function which is called with it)
+BENCHMARKS = {
+    'trie.add_word': (_words, _add_words),
+    'trie.get_node': (lambda size: (_trie(size), _words(size)),
+                      lambda state: [state[0].get_node(word) for word in state[1]]),
+    'graph.connect_nodes': (_graph, _connect_nodes),
+    'graph.remove_node': (_linked_graph, _remove_nodes),
+    'postfix_parser.convert_postfix': (_expression, lambda expression: PostfixParser.convert_postfix(expression,
+                                                                                                     {})),
+    'postfix_parser.calculate_postfix_list': (_postfix_lists, lambda state: PostfixParser.calculate_postfix_list(
+        state[0], state[1]))
+}
+
+
+def run_benchmark(name, size, repeat=REPEAT):
+    """ Function which runs one benchmark (setup is done before every run, and it is not timed)
+
+        Args:
+            name - name of benchmark (key of BENCHMARKS)
+            size - (int) size of input
+            repeat - (int) number of runs
+
+        Return:
+            Shortest time of one run in seconds
+    """
+
+    setup, function = BENCHMARKS[name]
+    times = []
+    for i in xrange(repeat):
+        state = setup(size)
+        start = timeit.default_timer()
+        function(state)
+        times.append(timeit.default_timer() - start)
+    return min(times)
+
+
+def run_benchmarks(sizes=None, repeat=REPEAT, pattern=None):
+    """ Function which runs all benchmarks (whose name matches pattern) at all sizes
+
+        Args:
+            sizes - list of input sizes, default is None (SIZES are used)
+            repeat - (int) number of runs of every benchmark
+            pattern - regular expression which name of benchmark must contain, default is None (all are run)
+
+        Return:
+            Dictionary name -> (dictionary size (as string, as in JSON) -> time in seconds)
+    """
+
+    sizes = sizes if sizes is not None else SIZES
+    return dict((name, dict((str(size), run_benchmark(name, size, repeat)) for size in sizes))
+                for name in sorted(BENCHMARKS) if pattern is None or re.search(pattern, name))
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """ Function which compares results with baseline (only benchmarks and sizes found in both are compared)
+
+        Args:
+            results - dictionary name -> (dictionary size -> time), returned by run_benchmarks
+            baseline - dictionary in same form as results
+            threshold - (float) relative slowdown over which benchmark is regression
+
+        Return:
+            List of tuples (name, size, baseline time, time, ratio), sorted by name and size, and list of those
+            which are regressions
+    """
+
+    comparison = []
+    for name in sorted(set(results) & set(baseline)):
+        for size in sorted(set(results[name]) & set(baseline[name]), key=int):
+            old, new = baseline[name][size], results[name][size]
+            comparison.append((name, size, old, new, new / old if old > 0 else float('inf')))
+    return comparison, [item for item in comparison if item[4] > 1 + threshold]
+
+
+def main(arguments=None):
+    """ Function which parses command line arguments, runs benchmarks, writes results and compares them with
+        baseline (if it is given)
+
+        Args:
+            arguments - list of command line arguments, default is None (sys.argv is used)
+
+        Return:
+            Exit code, 1 if any regression is found, 0 otherwise
+    """
+
+    arg_parser = argparse.ArgumentParser(description='Microbenchmarks of Trie, Graph and PostfixParser.')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='input sizes')
+    arg_parser.add_argument('--repeat', type=int, default=REPEAT, help='number of runs (shortest one is kept)')
+    arg_parser.add_argument('--filter', dest='pattern', help='regular expression for names of benchmarks to run')
+    arg_parser.add_argument('--output', help='path to JSON file in which results are written (baseline)')
+    arg_parser.add_argument('--compare', help='path to JSON baseline with which results are compared')
+    arg_parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                            help='relative slowdown over which benchmark is regression (default is 0.2)')
+    options = arg_parser.parse_args(arguments)
+
+    results = run_benchmarks(options.sizes, options.repeat, options.pattern)
+    document = {'python': sys.version.split()[0], 'platform': sys.platform, 'repeat': options.repeat,
+                'results': results}
+    if options.output is not None:
+        with open(options.output, 'w') as output_file:
+            json.dump(document, output_file, indent=2, sort_keys=True)
+
+    if options.compare is None:
+        for name in sorted(results):
+            for size in sorted(results[name], key=int):
+                print '%-40s %8s %12.6f s' % (name, size, results[name][size])
+        return 0
+
+    with open(options.compare) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    comparison, regressions = compare(results, baseline, options.threshold)
+    for name, size, old, new, ratio in comparison:
+        print '%-40s %8s %12.6f s %12.6f s %7.2fx%s' % (name, size, old, new, ratio,
+                                                        '  REGRESSION' if ratio > 1 + options.threshold else '')
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
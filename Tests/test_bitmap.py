@@ -0,0 +1,67 @@
+__author__ = 'Acko'
+
+import random
+import unittest
+from utils.bitmap import BitmapSet, CHUNK_SIZE, ARRAY_LIMIT
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.first = BitmapSet([0, 1, 7, 8, 100, CHUNK_SIZE - 1, CHUNK_SIZE, 3 * CHUNK_SIZE + 5])
+        self.second = BitmapSet([1, 8, 9, CHUNK_SIZE, 2 * CHUNK_SIZE])
+
+    def test_iter_and_len(self):
+        self.assertEqual(list(self.first), [0, 1, 7, 8, 100, CHUNK_SIZE - 1, CHUNK_SIZE, 3 * CHUNK_SIZE + 5])
+        self.assertEqual(len(self.first), 8)
+        self.assertEqual(list(BitmapSet()), [])
+        self.assertEqual(len(BitmapSet()), 0)
+
+    def test_contains(self):
+        self.assertTrue(7 in self.first)
+        self.assertTrue(3 * CHUNK_SIZE + 5 in self.first)
+        self.assertFalse(6 in self.first)
+        self.assertFalse(2 * CHUNK_SIZE in self.first)
+
+    def test_operations(self):
+        self.assertEqual(list(self.first & self.second), [1, 8, CHUNK_SIZE])
+        self.assertEqual(list(self.first | self.second),
+                         [0, 1, 7, 8, 9, 100, CHUNK_SIZE - 1, CHUNK_SIZE, 2 * CHUNK_SIZE, 3 * CHUNK_SIZE + 5])
+        self.assertEqual(list(self.first - self.second), [0, 7, 100, CHUNK_SIZE - 1, 3 * CHUNK_SIZE + 5])
+        self.assertEqual(list(self.second - self.first), [9, 2 * CHUNK_SIZE])
+        self.assertEqual(self.first - self.first, BitmapSet())
+
+    def test_random(self):
+        random.seed(3)
+        for i in range(20):
+            first = set(random.sample(xrange(3 * CHUNK_SIZE), random.randint(0, 2000)))
+            second = set(random.sample(xrange(3 * CHUNK_SIZE), random.randint(0, 2000)))
+            self.assertEqual(list(BitmapSet(first)), sorted(first))
+            self.assertEqual(list(BitmapSet(first) & BitmapSet(second)), sorted(first & second))
+            self.assertEqual(list(BitmapSet(first) | BitmapSet(second)), sorted(first | second))
+            self.assertEqual(list(BitmapSet(first) - BitmapSet(second)), sorted(first - second))
+
+    def test_dense_and_sparse_chunks(self):
+        random.seed(5)
+        for i in range(4):
+            sets = []
+            for j in range(2):
+                documents = set()
+                for high in range(3):
+                    size = random.choice([0, 10, ARRAY_LIMIT, ARRAY_LIMIT + 1, 20000])
+                    documents.update(high * CHUNK_SIZE + low for low in random.sample(xrange(CHUNK_SIZE), size))
+                sets.append(documents)
+            first, second = sets
+            bitmap, other = BitmapSet(first), BitmapSet(second)
+            self.assertEqual(len(bitmap), len(first))
+            self.assertEqual(list(bitmap & other), sorted(first & second))
+            self.assertEqual(list(bitmap | other), sorted(first | second))
+            self.assertEqual(list(bitmap - other), sorted(first - second))
+            # chunks are always kept in same form, so equal sets are equal bitmaps
+            self.assertEqual(bitmap - other, BitmapSet(first - second))
+            self.assertEqual(bitmap & other, BitmapSet(first & second))
+            self.assertTrue(all(document in bitmap for document in list(first)[:100]))
+
+
+if __name__ == '__main__':
+    unittest.main()
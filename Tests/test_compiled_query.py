@@ -0,0 +1,67 @@
+__author__ = 'Acko'
+
+import unittest
+
+from utils import compiled_query
+from utils.postfix_parser import PostfixParser, InvalidInput, QuitRequest
+
+
+class MyTestCase(unittest.TestCase):
+
+    def test_compile(self):
+        query = compiled_query.compile_query('python AND (class OR python) NOT "the dog"')
+        self.assertEqual(query.postfix_list, ('python', 'class', 'python', '|', '&', '$_KEY-1', '!', '&'))
+        self.assertEqual(query.operands, ('python', 'class', '$_KEY-1'))
+        self.assertEqual(query.get_escape_sequences(), {'_KEY-1': 'the dog'})
+        query.get_escape_sequences()['_KEY-1'] = 'changed'
+        self.assertEqual(query.get_escape_sequences(), {'_KEY-1': 'the dog'})
+        self.assertTrue(query.has_not)
+        self.assertEqual(query.create_plan(lambda element: len(element), 10),
+                         ('&', ('python', ('|', ('class', 'python'))), ('$_KEY-1',)))
+
+    def test_many_syntagms(self):
+        query = compiled_query.compile_query('a OR "x y" OR "z  y" AND "p y" OR "q y" b')
+        self.assertEqual(query.postfix_list, ('a', '$_KEY-1', '|', '$_KEY-2', '$_KEY-3', '&', '|', '$_KEY-4',
+                                              'b', '&', '|'))
+        self.assertEqual(query.get_escape_sequences(), {'_KEY-1': 'x y', '_KEY-2': 'z  y', '_KEY-3': 'p y',
+                                                  '_KEY-4': 'q y'})
+
+    def test_cache(self):
+        query = compiled_query.compile_query('cached query')
+        hits = compiled_query.get_statistics()['hits']
+        self.assertIs(compiled_query.compile_query('cached query'), query)
+        self.assertEqual(compiled_query.get_statistics()['hits'], hits + 1)
+
+        self.assertRaises(InvalidInput, compiled_query.compile_query, 'AND AND')
+        self.assertRaises(QuitRequest, compiled_query.compile_query, 'QUIT')
+
+    def test_calculate(self):
+        query = compiled_query.compile_query('a AND (b OR a) NOT c')
+        values = {'a': 3, 'b': 7, 'c': 2}
+        expected = PostfixParser.calculate_postfix_list(
+            [values[el] if el not in PostfixParser.OPERATORS else el for el in query.postfix_list], 20,
+            PostfixParser.INT)
+        self.assertEqual(query.calculate([values[operand] for operand in query.operands], 20), expected)
+        self.assertEqual(query.calculate([(0, 3), (0, 7), (0, 2)], (0, 20), PostfixParser.BOUND), (0, 20))
+
+
+    def test_calculate_sparse(self):
+        for expression in ['a AND (b OR a) NOT c', 'a OR b OR c OR a', 'NOT (a AND b)', 'c NOT (a OR b OR a)', 'a']:
+            query = compiled_query.compile_query(expression)
+            frequencies = {'a': {0: 3, 1: 1, 4: 2}, 'b': {1: 7, 2: 5}, 'c': {0: 2, 3: 9, 4: 2}}
+            whole = dict((document, 20 + document) for document in range(5))
+            values = [frequencies[operand] for operand in query.operands]
+            result = query.calculate_sparse(values, whole)
+            for document in range(5):
+                expected = query.calculate([frequency.get(document, 0) for frequency in values], whole[document])
+                self.assertEqual(result.get(document, 0), expected)
+            self.assertEqual(frequencies['a'], {0: 3, 1: 1, 4: 2})
+
+    def test_word_weight(self):
+        self.assertEqual(compiled_query.compile_query('a OR b').word_weight, 1)
+        self.assertEqual(compiled_query.compile_query('a OR (b AND A)').word_weight, 2)
+        self.assertEqual(compiled_query.compile_query('a OR "a b" OR "b a"').word_weight, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+__author__ = 'Acko'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from Benchmarks import corpus
+from search.search import Search
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_corpus(self, path):
+        contents = {}
+        for root, directories, files in os.walk(path):
+            for name in files:
+                with open(os.path.join(root, name)) as document:
+                    contents[os.path.relpath(os.path.join(root, name), path)] = document.read()
+        return contents
+
+    def test_make_word(self):
+        words = [corpus.make_word(rank) for rank in range(1000)]
+        self.assertEqual(len(set(words)), 1000)
+        self.assertTrue(all(word.isalpha() and len(word) >= 4 for word in words))
+
+    def test_document_path(self):
+        self.assertEqual(corpus.document_path(0, 3, 10), 'doc0.html')
+        self.assertEqual(corpus.document_path(7, 3, 10), os.path.join('d7', 'd0', 'd0', 'doc7.html'))
+
+    def test_generate_corpus(self):
+        first, second = os.path.join(self.directory, 'first'), os.path.join(self.directory, 'second')
+        corpus.generate_corpus(first, 50, vocabulary=100, words_per_document=40, seed=3)
+        corpus.generate_corpus(second, 50, vocabulary=100, words_per_document=40, seed=3)
+        self.assertEqual(self.read_corpus(first), self.read_corpus(second))
+
+        search = Search(first)
+        self.assertEqual(len(search._file_list), 50)
+        self.assertTrue(sum(node.get_number_of_edges() for node in search._file_list) > 0)
+        self.assertTrue(all(os.path.isfile(node.get_key()) for node in search._graph.get_all_nodes()))
+
+        queries = corpus.create_queries(100, 6, seed=3)
+        self.assertEqual(sorted(queries), ['boolean', 'phrase', 'single'])
+        for kind in queries:
+            self.assertEqual(len(queries[kind]), 6)
+            for query in queries[kind]:
+                search.find_expression(query, True)
+        self.assertTrue(any(len(search.find_expression(query, True)) > 0 for query in queries['phrase']))
+
+
+if __name__ == '__main__':
+    unittest.main()
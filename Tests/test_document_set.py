@@ -0,0 +1,72 @@
+__author__ = 'Acko'
+
+import random
+import unittest
+from utils.bitmap import BitmapSet
+from utils.document_set import intersection, union, union_all, difference, create, to_list
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.first = [1, 3, 5, 7, 9, 11]
+        self.second = [2, 3, 4, 5, 11, 20]
+
+    def test_intersection(self):
+        self.assertEqual(intersection(self.first, self.second), [3, 5, 11])
+        self.assertEqual(intersection(self.second, self.first), [3, 5, 11])
+        self.assertEqual(intersection(self.first, []), [])
+        self.assertEqual(intersection([5, 1000], range(2000)), [5, 1000])
+        self.assertEqual(intersection(range(0, 2000, 3), [2, 3, 1998, 2001]), [3, 1998])
+
+    def test_union(self):
+        self.assertEqual(union(self.first, self.second), [1, 2, 3, 4, 5, 7, 9, 11, 20])
+        self.assertEqual(union([], self.second), self.second)
+        self.assertEqual(union(self.first, []), self.first)
+
+    def test_difference(self):
+        self.assertEqual(difference(self.first, self.second), [1, 7, 9])
+        self.assertEqual(difference(self.second, self.first), [2, 4, 20])
+        self.assertEqual(difference(self.first, []), self.first)
+        self.assertEqual(difference([], self.first), [])
+
+    def test_mixed(self):
+        first, second = BitmapSet(self.first), BitmapSet(self.second)
+
+        self.assertEqual(intersection(first, self.second), [3, 5, 11])
+        self.assertEqual(intersection(self.first, second), [3, 5, 11])
+        self.assertEqual(to_list(intersection(first, second)), [3, 5, 11])
+        self.assertEqual(to_list(union(first, self.second)), [1, 2, 3, 4, 5, 7, 9, 11, 20])
+        self.assertEqual(to_list(union(self.first, second)), [1, 2, 3, 4, 5, 7, 9, 11, 20])
+        self.assertEqual(to_list(difference(first, self.second)), [1, 7, 9])
+        self.assertEqual(difference(self.first, second), [1, 7, 9])
+
+    def test_union_all(self):
+        self.assertEqual(union_all([]), [])
+        self.assertEqual(union_all([[], self.first]), self.first)
+        self.assertEqual(union_all([self.first, self.second]), [1, 2, 3, 4, 5, 7, 9, 11, 20])
+        self.assertEqual(union_all([self.first, [], self.second, [0, 5, 30]]), [0, 1, 2, 3, 4, 5, 7, 9, 11, 20, 30])
+        self.assertEqual(to_list(union_all([self.first, BitmapSet(self.second), [0, 30], BitmapSet([40])])),
+                         [0, 1, 2, 3, 4, 5, 7, 9, 11, 20, 30, 40])
+
+    def test_create(self):
+        self.assertIsInstance(create(self.first, 100), BitmapSet)
+        self.assertEqual(create(self.first, 1000), self.first)
+        self.assertEqual(create([], 0), [])
+
+    def test_random(self):
+        random.seed(7)
+        for i in range(50):
+            first = sorted(random.sample(xrange(500), random.randint(0, 300)))
+            second = sorted(random.sample(xrange(500), random.randint(0, 30)))
+            self.assertEqual(intersection(first, second), sorted(set(first) & set(second)))
+            self.assertEqual(union(first, second), sorted(set(first) | set(second)))
+            self.assertEqual(difference(first, second), sorted(set(first) - set(second)))
+            self.assertEqual(difference(second, first), sorted(set(second) - set(first)))
+
+        sets = [sorted(random.sample(xrange(500), random.randint(0, 50))) for i in range(20)]
+        self.assertEqual(union_all(sets), sorted(set().union(*sets)))
+
+
+if __name__ == '__main__':
+    unittest.main()
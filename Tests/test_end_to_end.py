@@ -0,0 +1,56 @@
+__author__ = 'Acko'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from Benchmarks import corpus
+from Benchmarks import end_to_end
+from search.search import Search
+
+
+def double(number):
+    return 2 * number
+
+
+def fail(number):
+    raise ValueError("Failed with %d" % number)
+
+
+def exit_silently(code):
+    os._exit(code)
+
+
+class MyTestCase(unittest.TestCase):
+
+    def test_run_isolated(self):
+        self.assertEqual(end_to_end.run_isolated(double, 21), 42)
+
+        with self.assertRaises(Exception) as context:
+            end_to_end.run_isolated(fail, 3)
+        self.assertIn("ValueError: Failed with 3", str(context.exception))
+
+        with self.assertRaises(Exception) as context:
+            end_to_end.run_isolated(exit_silently, 3)
+        self.assertIn("exited with code 3 without result", str(context.exception))
+
+    def test_measure_queries(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'corpus')
+            corpus.generate_corpus(path, 20, vocabulary=30, words_per_document=10, links_per_document=2)
+            search = Search(path)
+            word = corpus.make_word(0)
+            results = end_to_end.measure_queries(search, {'word': [word, word]})
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(sorted(results['word']), ['ranked', 'top', 'unranked'])
+        self.assertEqual(results['word']['unranked']['count'], 2)
+        # every mode starts with empty word cache, so word is decoded once per mode
+        self.assertEqual(search.get_cache_statistics()['terms']['misses'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+__author__ = 'Acko'
+
+import unittest
+from trie.trie import Trie
+from trie.frozen_trie import FrozenTrie, FrozenTrieNode
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        trie = Trie()
+        for word in ["Test", "asdf", "foo", "fool", "for"]:
+            trie.add_word(word).set_data(word.lower())
+        trie.add_word("CaseSensitive", ignore_case=False)
+        self.trie = FrozenTrie.from_trie(trie)
+
+    def tearDown(self):
+        self.trie = None
+
+    def test_find_word(self):
+        self.assertTrue(self.trie.has_word("Test"))
+        self.assertTrue(self.trie.has_word("TEST"))
+        self.assertTrue(self.trie.has_word("fool"))
+        self.assertTrue(self.trie.has_word("CaseSensitive", ignore_case=False))
+        self.assertEqual(len(self.trie), 6)
+
+    def test_find_word_fail(self):
+        self.assertFalse(self.trie.has_word("aaaa"))
+        self.assertFalse(self.trie.has_word("Tests"))
+        self.assertFalse(self.trie.has_word("Tes"))
+        self.assertFalse(self.trie.has_word("fo"))
+        self.assertFalse(self.trie.has_word("Test", ignore_case=False))
+        self.assertFalse(self.trie.has_word("casesensitive"))
+
+    def test_get_node(self):
+        self.assertIsNone(self.trie.get_node("AAAAAA"))
+        self.assertIsNone(self.trie.get_node("fooo"))
+        self.assertEqual(self.trie.get_node("test").get_key(), "t")
+        self.assertEqual(self.trie.get_node("tes").get_key(), "s")
+        self.assertEqual(self.trie.get_node("te").get_parent().get_key(), "t")
+        self.assertEqual(self.trie.get_node("t").get_parent().get_key(), "__root__")
+        self.assertIsNone(self.trie.get_node("").get_parent())
+
+        self.assertEqual(self.trie.get_node("foo").get_data(), "foo")
+        self.assertTrue(self.trie.get_node("foo").is_end())
+        self.assertFalse(self.trie.get_node("fo").is_end())
+        self.assertFalse(self.trie.get_node("fo").has_data())
+        self.assertEqual(self.trie.get_node("fo"), self.trie.get_node("f").get_child("o"))
+        self.assertEqual(sorted(self.trie.get_node("fo").get_child_list().keys()), ["o", "r"])
+        self.assertIsInstance(self.trie.get_node("fo")["r"], FrozenTrieNode)
+
+        with self.assertRaises(KeyError):
+            self.trie.get_node("fo")["x"]
+
+    def test_iter_words(self):
+        self.assertEqual([word for word, node in self.trie.iter_words()],
+                         ["CaseSensitive", "asdf", "foo", "fool", "for", "test"])
+        self.assertEqual([(word, node.get_data()) for word, node in self.trie.iter_words("FO")],
+                         [("foo", "foo"), ("fool", "fool"), ("for", "for")])
+        self.assertEqual(list(self.trie.iter_words("bar")), [])
+
+    def test_unsorted(self):
+        with self.assertRaises(ValueError):
+            FrozenTrie([("b", None), ("a", None)])
+        with self.assertRaises(ValueError):
+            FrozenTrie([("a", None), ("a", None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -79,6 +79,48 @@ class MyTestCase(unittest.TestCase):
         with self.assertRaises(Exception):
             self.graph.connect_both_ways(self.test_vertex, Vertex("B"))
 
+    def test_disconnect_nodes(self):
+        self.graph.connect_both_ways(self.test_vertex, self.test_vertex2)
+
+        self.graph.disconnect_nodes(self.test_vertex, self.test_vertex2)
+
+        self.assertEqual(self.test_vertex.get_number_of_edges(where_to=Vertex.OUTGOING), 0)
+        self.assertEqual(self.test_vertex.get_all_connected_nodes(where_to=Vertex.INCOMING), [self.test_vertex2])
+        self.assertEqual(self.test_vertex2.get_number_of_edges(where_to=Vertex.INCOMING), 0)
+        self.assertEqual(self.test_vertex2.get_all_connected_nodes(where_to=Vertex.OUTGOING), [self.test_vertex])
+
+        with self.assertRaises(KeyError):
+            self.graph.disconnect_nodes(self.test_vertex, self.test_vertex2)
+
+        with self.assertRaises(TypeError):
+            self.graph.disconnect_nodes("A", "C")
+
+    def test_page_rank(self):
+        self.graph.create_node("B")
+        self.graph.create_node("D")
+        self.graph.connect_nodes(self.graph["A"], self.graph["C"])
+        self.graph.connect_nodes(self.graph["B"], self.graph["C"])
+        self.graph.connect_nodes(self.graph["D"], self.graph["C"])
+        self.graph.connect_nodes(self.graph["C"], self.graph["A"])
+
+        ranks = self.graph.page_rank()
+
+        self.assertEqual(sorted(ranks.keys()), ["A", "B", "C", "D"])
+        self.assertAlmostEqual(sum(ranks.values()), 1.0)
+        self.assertAlmostEqual(ranks["B"], ranks["D"])
+        self.assertGreater(ranks["C"], ranks["A"])
+        self.assertGreater(ranks["A"], ranks["B"])
+        self.assertAlmostEqual(ranks["B"], 0.15 / 4)
+
+        self.graph.create_node("E")
+        self.graph.connect_nodes(self.graph["E"], self.graph["B"])
+        expected = self.graph.page_rank()
+        warm = self.graph.page_rank(initial=ranks)
+        for key in expected:
+            self.assertAlmostEqual(warm[key], expected[key])
+
+        self.assertEqual(Graph(True).page_rank(), {})
+
     def test_exists_and_direction(self):
         self.assertTrue(self.graph.is_directed())
         self.assertTrue(self.graph.exists("A"))
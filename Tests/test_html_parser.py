@@ -0,0 +1,44 @@
+__author__ = 'Acko'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from html_parser.html_parser import Parser
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'index.html')
+        with open(self.path, 'w') as document:
+            document.write('<html><head><title>Some title</title></head>\n<body><p class="first second">'
+                           'First paragraph,\twith\r\nsome words&amp;more</p><a href="other.html#part">link</a>'
+                           '<a href="http://example.com/page.html">out</a><!-- comment words --></body></html>')
+        self.parser = Parser()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parse(self):
+        links, words = self.parser.parse(self.path)
+
+        self.assertEqual(words, ['Some', 'title', 'First', 'paragraph', 'with', 'some', 'words', 'more', 'link',
+                                 'out'])
+        self.assertEqual(links, [os.path.join(self.directory, 'other.html')])
+
+    def test_iter_words_chunks(self):
+        links, words = self.parser.parse(self.path)
+
+        for chunk_size in [1, 2, 3, 5, 8, 13, 64]:
+            self.assertEqual(list(self.parser.iter_words(self.path, chunk_size)), words)
+            self.assertEqual(self.parser.links, links)
+
+    def test_missing_file(self):
+        self.assertEqual(self.parser.parse(os.path.join(self.directory, 'missing.html')), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+__author__ = 'Acko'
+
+import json
+import os
+import shutil
+import StringIO
+import tempfile
+import unittest
+
+from search.search import Search
+from utils import instrumentation
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled(self):
+        instrumentation.count('counter')
+        instrumentation.add_time('timer', 1.0)
+        with instrumentation.timer('block'):
+            pass
+        self.assertEqual(instrumentation.get_statistics(), {'enabled': False, 'counters': {}, 'timers': {}})
+
+    def test_enabled(self):
+        instrumentation.enable()
+        instrumentation.count('counter')
+        instrumentation.count('counter', 4)
+        instrumentation.add_time('timer', 1.0)
+        instrumentation.add_time('timer', 3.0)
+        with instrumentation.timer('block'):
+            pass
+        instrumentation.disable()
+        instrumentation.count('counter')
+
+        statistics = instrumentation.get_statistics()
+        self.assertEqual(statistics['counters'], {'counter': 5})
+        self.assertEqual(statistics['timers']['timer'], {'count': 2, 'total': 4.0, 'mean': 2.0, 'max': 3.0})
+        self.assertEqual(statistics['timers']['block']['count'], 1)
+
+        output = StringIO.StringIO()
+        self.assertEqual(json.loads(instrumentation.dump(output)), json.loads(output.getvalue()))
+        self.assertEqual(json.loads(output.getvalue())['counters'], {'counter': 5})
+
+    def test_search(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for name, content in [('a.html', '<p>python class</p><a href="b.html">b</a>'),
+                                  ('b.html', '<p>python object python</p>')]:
+                with open(os.path.join(directory, name), 'w') as document:
+                    document.write(content)
+
+            instrumentation.enable()
+            search = Search(directory)
+            search.find_expression('python AND (class OR instrumented)', True, 1)
+            search.find_expressions(['python', 'AND'])
+            results = search.find_expressions(expression for expression in ['class', 'object'])
+            statistics = instrumentation.get_statistics()
+        finally:
+            shutil.rmtree(directory)
+
+        counters = statistics['counters']
+        self.assertEqual(counters['search.files_walked'], 2)
+        self.assertEqual(counters['search.documents_indexed'], 2)
+        self.assertEqual(counters['search.tokens_indexed'], 6)
+        self.assertEqual(counters['search.postings_appended'], 5)
+        self.assertEqual([len(result['results']) for result in results], [1, 1])
+        self.assertEqual(counters['search.queries'], 5)
+        self.assertEqual(counters['graph.edges_created'], 1)
+        self.assertEqual(counters['parser.files'], 2)
+        self.assertTrue(counters['search.bytes_parsed'] > 0)
+        self.assertTrue(counters['trie.nodes_created'] > 0)
+        self.assertTrue(counters['postfix_parser.expressions'] >= 1)
+        for timer in ['search.build', 'search.link_scores', 'search.parse', 'search.lookup', 'search.evaluate',
+                      'search.rank']:
+            self.assertTrue(timer in statistics['timers'], timer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+__author__ = 'Acko'
+
+import random
+import unittest
+
+from utils.lfu_cache import LFUCache
+
+
+class MyTestCase(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = LFUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c', 0), 0)
+
+        # 'b' is least frequently used
+        cache.put('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+
+        # 'c' is used once, same as 'd', but it was used before it
+        cache.put('d', 4)
+        self.assertNotIn('c', cache)
+        self.assertEqual(cache.get('d'), 4)
+        self.assertEqual(cache.get_statistics(), {'size': 2, 'cost': 2, 'hits': 3, 'misses': 1,
+                                                   'evictions': 2})
+
+    def test_frequency(self):
+        cache = LFUCache(3)
+        for key, uses in [('a', 5), ('b', 1), ('c', 3)]:
+            cache.put(key, key)
+            for use in range(uses - 1):
+                cache.get(key)
+
+        for key in ['d', 'e', 'f']:
+            cache.put(key, key)
+        self.assertIn('a', cache)
+        self.assertIn('c', cache)
+        self.assertIn('f', cache)
+
+        cache.put('a', 'A')
+        self.assertEqual(cache.get('a'), 'A')
+
+    def test_cost(self):
+        cache = LFUCache(10, 5, len)
+        cache.put('a', 'aa')
+        cache.get('a')
+        cache.put('b', 'bb')
+        cache.put('c', 'ccc')
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(cache.get_statistics()['cost'], 5)
+
+        cache.put('d', 'dddddd')
+        self.assertNotIn('d', cache)
+        cache.put('a', 'aaaa')
+        self.assertNotIn('c', cache)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get_statistics()['cost'], 4)
+
+        cache.clear()
+        self.assertEqual(cache.get_statistics()['cost'], 0)
+
+    def test_eviction_order(self):
+        # cache is compared with dictionary key -> [count, order] (entry with smallest count and order goes,
+        # order is step of last use, and after decay entries are ordered by old count and order)
+        generator = random.Random(3)
+        for decay_period in [1000000, 2]:
+            cache, model, uses = LFUCache(8, decay_period=decay_period), {}, 0
+            for step in range(3000):
+                key = generator.randint(0, 20)
+                if generator.random() < 0.5:
+                    self.assertEqual(cache.get(key), key if key in model else None)
+                    if key not in model:
+                        continue
+                    model[key] = [model[key][0] + 1, step]
+                else:
+                    cache.put(key, key)
+                    if key in model:
+                        model[key] = [model[key][0] + 1, step]
+                    else:
+                        if len(model) == 8:
+                            del model[min(model, key=lambda item: model[item])]
+                        model[key] = [1, step]
+
+                uses += 1
+                if uses == 8 * decay_period:
+                    uses = 0
+                    for order, item in enumerate(sorted(model, key=lambda item: model[item])):
+                        model[item] = [(model[item][0] + 1) // 2, order]
+                self.assertEqual(sorted(model), sorted(item for item in range(21) if item in cache))
+
+    def test_decay(self):
+        for decay_period, kept in [(4, 'b'), (1000, 'a')]:
+            cache = LFUCache(2, decay_period=decay_period)
+            cache.put('a', 1)
+            for use in range(50):
+                cache.get('a')
+            # 'b' is used less than 'a' in total, but 'a' was used long ago (its count is halved meanwhile)
+            cache.put('b', 2)
+            for use in range(30):
+                cache.get('b')
+            cache.put('c', 3)
+            self.assertEqual([key in cache for key in 'abc'], [key == kept or key == 'c' for key in 'abc'])
+
+    def test_clear(self):
+        cache = LFUCache(2)
+        cache.put('a', 1)
+        cache.get('a')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+        cache.put('b', 2)
+        cache.put('c', 3)
+        cache.put('d', 4)
+        self.assertNotIn('b', cache)
+        self.assertEqual(len(cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
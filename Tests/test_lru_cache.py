@@ -0,0 +1,58 @@
+__author__ = 'Acko'
+
+import unittest
+
+from utils.lru_cache import LRUCache
+
+
+class MyTestCase(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c', 0), 0)
+
+        # 'b' is least recently used
+        cache.put('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(cache.get_statistics(), {'size': 2, 'cost': 2, 'hits': 1, 'misses': 1, 'evictions': 1})
+
+    def test_cost(self):
+        cache = LRUCache(10, 5, len)
+        cache.put('a', [1, 2])
+        cache.put('b', [1, 2, 3])
+        self.assertEqual(len(cache), 2)
+
+        cache.put('c', [1])
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.get_statistics()['cost'], 4)
+
+        cache.put('d', [1, 2, 3, 4, 5, 6])
+        self.assertNotIn('d', cache)
+        self.assertEqual(len(cache), 2)
+
+        cache.put('b', [1])
+        self.assertEqual(cache.get('b'), [1])
+        self.assertEqual(cache.get_statistics()['cost'], 2)
+
+    def test_clear(self):
+        cache = LRUCache(10)
+        cache.put('a', 1)
+        cache.remove('a')
+        cache.remove('b')
+        self.assertEqual(len(cache), 0)
+
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.get_statistics()['cost'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
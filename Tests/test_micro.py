@@ -0,0 +1,30 @@
+__author__ = 'Acko'
+
+import unittest
+
+from Benchmarks import micro
+
+
+class MyTestCase(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        results = micro.run_benchmarks([10, 50], 1)
+        self.assertEqual(sorted(results), sorted(micro.BENCHMARKS))
+        for name in results:
+            self.assertEqual(sorted(results[name]), ['10', '50'])
+            self.assertTrue(all(time >= 0 for time in results[name].values()))
+
+        self.assertEqual(sorted(micro.run_benchmarks([10], 1, 'trie')), ['trie.add_word', 'trie.get_node'])
+
+    def test_compare(self):
+        baseline = {'trie.add_word': {'10': 1.0, '100': 2.0}, 'graph.remove_node': {'10': 1.0}}
+        results = {'trie.add_word': {'10': 1.1, '100': 3.0, '1000': 5.0}, 'trie.get_node': {'10': 1.0}}
+        comparison, regressions = micro.compare(results, baseline, 0.2)
+        self.assertEqual([(name, size) for name, size, old, new, ratio in comparison],
+                         [('trie.add_word', '10'), ('trie.add_word', '100')])
+        self.assertEqual(regressions, [('trie.add_word', '100', 2.0, 3.0, 1.5)])
+        self.assertEqual(micro.compare(results, baseline, 0.6)[1], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
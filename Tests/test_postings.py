@@ -0,0 +1,159 @@
+__author__ = 'Acko'
+
+import random
+import cPickle
+import unittest
+from utils.postings import PostingsList, encode_number, decode_number, decode_numbers, SKIP_INTERVAL
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.postings = PostingsList()
+        self.postings.add(0, [3])
+        self.postings.add(4, [0, 1, 200, 70000])
+        self.postings.add(1000, [5, 9])
+
+    def tearDown(self):
+        self.postings = None
+
+    def test_number_coding(self):
+        buffer_ = bytearray()
+        numbers = [0, 1, 127, 128, 300, 16383, 16384, 2 ** 40]
+        for number in numbers:
+            encode_number(number, buffer_)
+
+        self.assertEqual(list(decode_numbers(buffer_)), numbers)
+        self.assertEqual(decode_number(buffer_, 3), (128, 5))
+        self.assertEqual(len(buffer_), 1 + 1 + 1 + 2 + 2 + 2 + 3 + 6)
+
+    def test_documents_and_positions(self):
+        self.assertEqual(len(self.postings), 3)
+        self.assertEqual(self.postings.get_documents(), [0, 4, 1000])
+        self.assertEqual(list(self.postings.iter_frequencies()), [(0, 1), (4, 4), (1000, 2)])
+        self.assertEqual(self.postings.get_positions(4), [0, 1, 200, 70000])
+        self.assertEqual(self.postings.get_positions(1000), [5, 9])
+        self.assertEqual(list(self.postings), [(0, [3]), (4, [0, 1, 200, 70000]), (1000, [5, 9])])
+
+        with self.assertRaises(KeyError):
+            self.postings.get_positions(5)
+
+    def test_iter_positions(self):
+        self.assertEqual(list(self.postings.iter_positions([0, 1000])), [(0, [3]), (1000, [5, 9])])
+        self.assertEqual(list(self.postings.iter_positions([4])), [(4, [0, 1, 200, 70000])])
+        self.assertEqual(list(self.postings.iter_positions([])), [])
+
+        with self.assertRaises(KeyError):
+            list(self.postings.iter_positions([0, 5]))
+        with self.assertRaises(KeyError):
+            list(self.postings.iter_positions([1001]))
+
+    def test_add_fails(self):
+        with self.assertRaises(ValueError):
+            self.postings.add(1000, [1])
+        with self.assertRaises(ValueError):
+            self.postings.add(1001, [])
+
+    def test_remove(self):
+        self.postings.remove(4)
+        self.assertEqual(list(self.postings), [(0, [3]), (1000, [5, 9])])
+
+        self.postings.remove(1000)
+        self.postings.add(5, [1])
+        self.assertEqual(list(self.postings), [(0, [3]), (5, [1])])
+
+        with self.assertRaises(KeyError):
+            self.postings.remove(4)
+
+    def test_remove_documents(self):
+        self.postings.remove_documents([0, 1000])
+        self.assertEqual(list(self.postings), [(4, [0, 1, 200, 70000])])
+        self.assertEqual(self.postings.get_positions(4), [0, 1, 200, 70000])
+
+        with self.assertRaises(KeyError):
+            self.postings.remove_documents([4, 5])
+        self.assertEqual(len(self.postings), 1)
+
+    def test_many_documents(self):
+        postings, expected = PostingsList(), []
+        for document in range(0, 10 * SKIP_INTERVAL, 3):
+            positions = range(document % 7, document % 7 + document % 5 + 1)
+            postings.add(document, positions)
+            expected.append((document, positions))
+
+        for document, positions in expected:
+            self.assertEqual(postings.get_positions(document), positions)
+        with self.assertRaises(KeyError):
+            postings.get_positions(4)
+        with self.assertRaises(KeyError):
+            postings.get_positions(10 * SKIP_INTERVAL)
+
+        postings.remove_documents(document for document, positions in expected[::2])
+        self.assertEqual(list(postings), expected[1::2])
+        for document, positions in expected[1::2]:
+            self.assertEqual(postings.get_positions(document), positions)
+
+    def test_remove_splice(self):
+        generator = random.Random(4)
+        postings, expected = PostingsList(), {}
+        for document in range(0, 20 * SKIP_INTERVAL, 2):
+            expected[document] = range(generator.randint(1, 3))
+            postings.add(document, expected[document])
+
+        for count in [1, 1, 5, 60, 200, 1]:
+            removed = generator.sample(sorted(expected), count)
+            postings.remove_documents(removed)
+            for document in removed:
+                del expected[document]
+
+            rebuilt = PostingsList()
+            for document in sorted(expected):
+                rebuilt.add(document, expected[document])
+            self.assertEqual(postings, rebuilt)
+            self.assertEqual([list(part) for part in postings._skips or ([], [])],
+                             [list(part) for part in rebuilt._skips or ([], [])])
+            self.assertEqual(len(postings), len(expected))
+            self.assertEqual(dict(postings.probe(sorted(expected))), dict((document, len(positions))
+                                                                         for document, positions in expected.items()))
+            for document in sorted(expected)[::7]:
+                self.assertEqual(postings.get_positions(document), expected[document])
+
+        postings.add(20 * SKIP_INTERVAL, [1])
+        self.assertEqual(postings.get_positions(20 * SKIP_INTERVAL), [1])
+
+    def test_probe(self):
+        postings, frequencies = PostingsList(), {}
+        for document in range(0, 10 * SKIP_INTERVAL, 3):
+            postings.add(document, range(document % 5 + 1))
+            frequencies[document] = document % 5 + 1
+
+        documents = [1, 3, 4, 5 * SKIP_INTERVAL, 5 * SKIP_INTERVAL + 1, 9 * SKIP_INTERVAL, 10 * SKIP_INTERVAL]
+        self.assertEqual(list(postings.probe(documents)),
+                         [(document, frequencies[document]) for document in documents if document in frequencies])
+        self.assertEqual(dict(postings.probe(range(10 * SKIP_INTERVAL))), frequencies)
+        self.assertEqual(list(postings.probe([])), [])
+        self.assertEqual(list(PostingsList().probe([0, 1])), [])
+        self.assertEqual(postings.get_max_frequency(), 5)
+
+        copy = cPickle.loads(cPickle.dumps(postings, cPickle.HIGHEST_PROTOCOL))
+        self.assertEqual(list(copy.probe(documents)), list(postings.probe(documents)))
+        self.assertEqual(copy.get_positions(9 * SKIP_INTERVAL), range(9 * SKIP_INTERVAL % 5 + 1))
+
+    def test_renumber(self):
+        self.postings.renumber({0: 0, 4: 1, 1000: 7})
+        self.assertEqual(list(self.postings), [(0, [3]), (1, [0, 1, 200, 70000]), (7, [5, 9])])
+        self.assertEqual(self.postings.get_positions(7), [5, 9])
+        self.postings.add(8, [2])
+        self.assertEqual(len(self.postings), 4)
+
+    def test_pickle(self):
+        copy = cPickle.loads(cPickle.dumps(self.postings, cPickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual(copy, self.postings)
+        self.assertEqual(list(copy), list(self.postings))
+        copy.add(1001, [0])
+        self.assertEqual(len(copy), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+__author__ = 'Acko'
+
+import StringIO
+import unittest
+
+from search.progress import ProgressLog, format_event
+
+
+EVENT = {'event': 'progress', 'files_parsed': 25, 'files_total': 100, 'bytes': 2097152, 'bytes_total': 8388608,
+         'tokens': 5000, 'links': 40, 'trie_nodes': 700, 'graph_nodes': 30, 'elapsed': 2.0,
+         'files_per_second': 12.5, 'bytes_per_second': 1048576.0, 'tokens_per_second': 2500.0, 'eta': 6.0}
+
+
+class MyTestCase(unittest.TestCase):
+
+    def test_format_event(self):
+        self.assertEqual(format_event(dict(EVENT, event='discovered')), 'Pronadjeno 100 fajlova (8.0 MB)')
+        self.assertEqual(format_event(EVENT), '25/100 fajlova (25%), 1.0 MB/s, 2500 reci/s, 700 cvorova stabla, '
+                                              '30 cvorova grafa, preostalo oko 6 s')
+        self.assertEqual(format_event(dict(EVENT, eta=None)), '25/100 fajlova (25%), 1.0 MB/s, 2500 reci/s, '
+                                                              '700 cvorova stabla, 30 cvorova grafa')
+        self.assertTrue(format_event(dict(EVENT, event='finished', link_scores_time=0.5)).startswith(
+            'Indeks napravljen za 2.0 s (rangiranje linkova 0.5 s): 25/100 fajlova'))
+        self.assertIn('(100%)', format_event(dict(EVENT, files_parsed=0, files_total=0)))
+
+    def test_progress_log(self):
+        output = StringIO.StringIO()
+        log = ProgressLog(output, 3600)
+        log(dict(EVENT, event='discovered'))
+        log(EVENT)
+        log(EVENT)
+        log(dict(EVENT, event='finished', link_scores_time=0.5))
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('Pronadjeno'))
+        self.assertTrue(lines[1].startswith('Indeks napravljen'))
+
+        output = StringIO.StringIO()
+        log = ProgressLog(output, 0)
+        log(EVENT)
+        log(EVENT)
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+__author__ = 'Acko'
+
+import random
+import unittest
+
+from utils import query_planner
+from utils.bitmap import BitmapSet
+from utils.postfix_parser import PostfixParser
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.documents = {'a': [1, 2, 3, 5, 8], 'b': [2, 3, 4], 'c': [0, 3, 9], 'd': [], 'e': range(10)}
+        self.universe = BitmapSet(range(10))
+        self.looked_up = []
+
+    def lookup(self, element):
+        self.looked_up.append(element)
+        return self.documents[element]
+
+    def plan(self, expression):
+        return query_planner.create_plan(PostfixParser.convert_postfix(expression, {}),
+                                         lambda element: len(self.documents[element]), 10)
+
+    def evaluate(self, expression):
+        return list(query_planner.evaluate_plan(self.plan(expression), self.lookup, self.universe))
+
+    def test_create_plan(self):
+        self.assertEqual(self.plan("a"), 'a')
+        self.assertEqual(self.plan("a AND b AND c"), ('&', ('b', 'c', 'a'), ()))
+        self.assertEqual(self.plan("a OR (b OR c)"), ('|', ('b', 'c', 'a')))
+        self.assertEqual(self.plan("a NOT b NOT c"), ('&', ('a',), ('b', 'c')))
+        self.assertEqual(self.plan("NOT a"), ('&', (), ('a',)))
+        self.assertEqual(query_planner.create_plan(['a', '!', '!'], len, 10), 'a')
+        self.assertEqual(self.plan("e AND (a OR b)"), ('&', (('|', ('b', 'a')), 'e'), ()))
+
+    def test_evaluate_plan(self):
+        self.assertEqual(self.evaluate("a b"), [2, 3])
+        self.assertEqual(self.evaluate("a OR c"), [0, 1, 2, 3, 5, 8, 9])
+        self.assertEqual(self.evaluate("NOT e"), [])
+        self.assertEqual(self.evaluate("NOT a"), [0, 4, 6, 7, 9])
+        self.assertEqual(self.evaluate("e NOT a NOT c"), [4, 6, 7])
+
+    def test_short_circuit(self):
+        self.assertEqual(self.evaluate("e AND a AND d"), [])
+        self.assertEqual(self.looked_up, ['d'])
+
+    def test_probe(self):
+        probed = []
+
+        def probe(element, candidates):
+            probed.append((element, list(candidates)))
+            return [document for document in candidates if document in self.documents[element]] \
+                if element != 'b' else None
+
+        plan = self.plan("e AND a AND (b OR c) NOT c NOT b")
+        self.assertEqual(list(query_planner.evaluate_plan(plan, self.lookup, self.universe, probe=probe)), [])
+        self.assertEqual(probed, [('e', [2, 3]), ('c', [2, 3]), ('b', [2])])
+        self.assertEqual(self.looked_up, ['a', 'b', 'c', 'b'])
+
+        probed, self.looked_up = [], []
+        plan = self.plan("e AND a NOT b")
+        self.assertEqual(list(query_planner.evaluate_plan(plan, self.lookup, self.universe, probe=probe)), [1, 5, 8])
+        self.assertEqual(probed, [('e', [1, 2, 3, 5, 8]), ('b', [1, 2, 3, 5, 8])])
+        self.assertEqual(self.looked_up, ['a', 'b'])
+
+    def explain(self, expression):
+        documents, explained = query_planner.explain_plan(self.plan(expression), self.lookup, self.universe,
+                                                          lambda element: len(self.documents[element]),
+                                                          lambda element: {'looked_up': len(self.looked_up)})
+        return list(documents), explained
+
+    def strip(self, explained):
+        explained = dict((key, value) for key, value in explained.items() if key != 'time')
+        if 'children' in explained:
+            explained['children'] = [self.strip(child) for child in explained['children']]
+        return explained
+
+    def test_explain_plan(self):
+        documents, explained = self.explain("a")
+        self.assertEqual(documents, [1, 2, 3, 5, 8])
+        self.assertEqual(self.strip(explained), {'operator': 'TERM', 'operand': 'a', 'estimate': 5, 'output': 5,
+                                                 'looked_up': 1})
+
+        self.looked_up = []
+        documents, explained = self.explain("e NOT (b OR c)")
+        self.assertEqual(documents, [1, 5, 6, 7, 8])
+        self.assertEqual(self.strip(explained), {
+            'operator': 'AND', 'inputs': [10, 5], 'output': 5, 'skipped': 0, 'children': [
+                {'operator': 'TERM', 'operand': 'e', 'estimate': 10, 'output': 10, 'looked_up': 1},
+                {'operator': 'OR', 'inputs': [3, 3], 'output': 5, 'skipped': 0, 'negated': True, 'children': [
+                    {'operator': 'TERM', 'operand': 'b', 'estimate': 3, 'output': 3, 'looked_up': 2},
+                    {'operator': 'TERM', 'operand': 'c', 'estimate': 3, 'output': 3, 'looked_up': 3}]}]})
+
+        documents, explained = self.explain("NOT a AND d AND e")
+        self.assertEqual(documents, [])
+        self.assertEqual(explained['inputs'], [0])
+        self.assertEqual(explained['skipped'], 2)
+
+        documents, explained = self.explain("NOT a")
+        self.assertEqual(documents, [0, 4, 6, 7, 9])
+        self.assertEqual(explained['inputs'], [10, 5])
+        self.assertTrue(explained['children'][0]['negated'])
+
+    def test_format_explain(self):
+        documents, explained = self.explain("e NOT (b OR c)")
+        lines = query_planner.format_explain(explained, lambda element: element.upper())
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[0].startswith('AND (in: 10, 5, out: 5, '))
+        self.assertTrue(lines[1].startswith('  E (est. 10, out: 10, '))
+        self.assertTrue(lines[2].startswith('  NOT OR (in: 3, 3, out: 5, '))
+        self.assertTrue(lines[3].startswith('    B (est. 3, out: 3, '))
+        self.assertTrue(lines[4].endswith(' ms, looked_up: 3)'))
+
+    def test_long_expression(self):
+        expression = ' OR '.join(['a', 'b', 'd'] * 1000)
+        self.assertEqual(self.plan(expression), ('|', ('d',) * 1000 + ('b',) * 1000 + ('a',) * 1000))
+        self.assertEqual(self.evaluate(expression), [1, 2, 3, 4, 5, 8])
+
+        expression = ' AND '.join(['(e OR a'] * 1000) + ')' * 1000
+        self.assertEqual(self.evaluate(expression), range(10))
+        self.assertEqual(self.evaluate(expression + ' AND d'), [])
+
+        postfix_list = PostfixParser.convert_postfix(' OR '.join(['a', 'b', 'd'] * 1000), {})
+        self.assertEqual(PostfixParser.calculate_postfix_list(
+            [1 if el not in PostfixParser.OPERATORS else el for el in postfix_list], 0, PostfixParser.INT), 3000)
+
+    def test_random(self):
+        random.seed(7)
+        for test in range(200):
+            expression = random.choice(['a', 'b', 'c', 'd', 'e'])
+            for operand in range(random.randint(0, 5)):
+                operator = random.choice([' AND ', ' OR ', ' NOT ', ' AND NOT '])
+                expression = '(%s%s%s)' % (expression, operator, random.choice(['a', 'b', 'c', 'd', 'e']))
+
+            postfix_list = PostfixParser.convert_postfix(expression, {})
+            expected = PostfixParser.calculate_postfix_list(
+                [list(self.documents[el]) if el not in PostfixParser.OPERATORS else el for el in postfix_list],
+                self.universe)
+            self.assertEqual(self.evaluate(expression), list(expected), expression)
+
+
+if __name__ == '__main__':
+    unittest.main()
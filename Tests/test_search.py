@@ -0,0 +1,444 @@
+__author__ = 'Acko'
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from Benchmarks import corpus
+from graph.vertex_and_edge import Vertex
+from search import vector_scorer
+from search.search import Search, Term
+from search.snapshot import SnapshotError
+from utils.compiled_query import compile_query
+from utils.postfix_parser import InvalidInput
+from utils.postings import PostingsList
+
+
+DOCUMENTS = {
+    'a.html': '<html><body><p>Python is a programming language. Python class object.</p>'
+              '<a href="b.html">b</a><a href="sub/c.html#top">c</a></body></html>',
+    'b.html': '<html><body><p>The class keyword in python defines a class.</p>'
+              '<a href="a.html">a</a></body></html>',
+    os.path.join('sub', 'c.html'): '<html><body><h1>Zygote</h1><p>the quick brown fox, programming language</p>'
+                                   '<a href="../a.html">a</a><a href="http://example.com/x.html">x</a></body></html>',
+    os.path.join('sub', 'd.htm'): '<html><body>the the dog <b>lazy</b> dog</body></html>'
+}
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'sub'))
+        for name, content in DOCUMENTS.items():
+            self.write_document(name, content)
+        self.search = Search(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        self.search = None
+
+    def write_document(self, name, content):
+        with open(os.path.join(self.directory, name), 'w') as document:
+            document.write(content)
+
+    def find(self, search, expression):
+        return sorted(os.path.relpath(search._file_list[index].get_key(), self.directory)
+                      for index in search.find_expression(expression, True))
+
+    def test_find_expression(self):
+        self.assertEqual(self.find(self.search, "python"), ['a.html', 'b.html'])
+        self.assertEqual(self.find(self.search, "programming language"), ['a.html', os.path.join('sub', 'c.html')])
+        self.assertEqual(self.find(self.search, "class OR zygote"), ['a.html', 'b.html', os.path.join('sub', 'c.html')])
+        self.assertEqual(self.find(self.search, "the NOT dog"), ['b.html', os.path.join('sub', 'c.html')])
+
+    def test_syntagm(self):
+        words = {}
+        self.assertEqual(self.find(self.search, '"programming language"'), ['a.html', os.path.join('sub', 'c.html')])
+        self.assertEqual(self.find(self.search, '"language programming"'), [])
+        self.assertEqual(self.find(self.search, '"the dog"'), [os.path.join('sub', 'd.htm')])
+        self.assertEqual(self.find(self.search, '"the the dog"'), [os.path.join('sub', 'd.htm')])
+        self.assertEqual(self.find(self.search, '"python class" OR "lazy dog"'),
+                         ['a.html', os.path.join('sub', 'd.htm')])
+        self.assertEqual(self.find(self.search, '"missing words"'), [])
+
+        counts = self.search._Search__search_syntagm('$_KEY-1', words, {'_KEY-1': 'the'})
+        self.assertEqual(counts[self.search._file_list.index(self.search._graph[os.path.join(self.directory, 'sub',
+                                                                                              'd.htm')])], 2)
+        self.assertEqual(sorted(counts.values()), [1, 1, 2])
+        with self.assertRaises(InvalidInput):
+            self.search.find_expression('"" python', True)
+
+    def test_page_priority(self):
+        indexes = dict((os.path.relpath(node.get_key(), self.directory), index)
+                       for index, node in enumerate(self.search._file_list))
+        a, b, c = indexes['a.html'], indexes['b.html'], indexes[os.path.join('sub', 'c.html')]
+        words = {}
+        self.search._Search__search_word("python", words)
+
+        priority = self.search._Search__calculate_page_priority([a, b], compile_query("python"), words)
+        link_scores = self.search._link_scores
+        # a.html contains python 2 times, b.html once (c.html, which links to a.html, doesn't contain it)
+        self.assertAlmostEqual(priority[a], 2 + 0.7 * link_scores[a] + 0.4 * 1)
+        self.assertAlmostEqual(priority[b], 1 + 0.7 * link_scores[b] + 0.4 * 2)
+        self.assertNotIn(c, priority)
+
+    @unittest.skipUnless(vector_scorer.AVAILABLE, "numpy is not installed")
+    def test_vectorized_priority(self):
+        path = os.path.join(self.directory, 'corpus')
+        corpus.generate_corpus(path, 300, vocabulary=50, words_per_document=40, links_per_document=4, seed=1)
+        search = Search(path)
+        words = [corpus.make_word(rank) for rank in [0, 1, 7, 20]]
+        for expression in [words[0], '%s OR %s' % (words[1], words[3]), '%s %s' % (words[0], words[2]),
+                           '%s NOT %s' % (words[0], words[3])]:
+            query, found = compile_query(expression), {}
+            final_list = search.find_expression(expression, True)
+            for element in query.operands:
+                search._Search__search_word(element, found)
+            self.assertTrue(len(final_list) >= vector_scorer.MIN_DOCUMENTS)
+
+            vectorized = search._Search__calculate_page_priority(final_list, query, found)
+            vector_scorer.AVAILABLE = False
+            try:
+                expected = search._Search__calculate_page_priority(final_list, query, found)
+            finally:
+                vector_scorer.AVAILABLE = True
+            self.assertEqual(sorted(vectorized), sorted(expected))
+            for index in expected:
+                self.assertAlmostEqual(vectorized[index], expected[index])
+
+    def test_select_top(self):
+        path = os.path.join(self.directory, 'corpus')
+        corpus.generate_corpus(path, 300, vocabulary=200, words_per_document=40, links_per_document=4, seed=2)
+        search = Search(path)
+        search._io.print_explanation = lambda explanation: None
+        words = [corpus.make_word(rank) for rank in range(200)]
+        for expression in [words[0], ' OR '.join(words[10:150]), '%s NOT %s' % (words[1], words[2]),
+                           '(%s OR %s) AND %s' % (words[3], words[4], words[0])]:
+            ranked = search.find_expression(expression, True)
+            full = search.find_expression(expression, False, None, explain=True)
+            self.assertEqual(sorted(full['results']), ranked)
+            for limit in [1, 10, 100]:
+                explanation = search.find_expression(expression, True, limit, explain=True)
+                self.assertEqual(explanation['results'], full['results'][:limit])
+                for index in explanation['results']:
+                    self.assertAlmostEqual(explanation['priorities'][index], full['priorities'][index])
+
+        explanation = search.find_expression(' OR '.join(words[10:150]), True, 10, explain=True)
+        self.assertTrue(explanation['ranking']['documents'] < explanation['ranking']['candidates'])
+
+    def test_probe(self):
+        path = os.path.join(self.directory, 'corpus')
+        corpus.generate_corpus(path, 300, vocabulary=2000, words_per_document=40, links_per_document=4, seed=2)
+        search = Search(path)
+        search._io.print_explanation = lambda explanation: None
+        common, rare = corpus.make_word(2), corpus.make_word(1999)
+        self.assertTrue(0 < len(search.find_expression(rare, True)) * Search.PROBE_RATIO < 300)
+
+        expected = {}
+        Search.PROBE_RATIO, ratio = 1000000, Search.PROBE_RATIO
+        try:
+            for expression in ['%s AND %s' % (common, rare), '%s NOT %s' % (rare, common)]:
+                search._term_cache.clear()
+                expected[expression] = search.find_expression(expression, False, None, explain=True)
+        finally:
+            Search.PROBE_RATIO = ratio
+
+        for expression, full in expected.items():
+            search._term_cache.clear()
+            explanation = search.find_expression(expression, False, None, explain=True)
+            self.assertEqual(explanation['results'], full['results'])
+            for index in full['results']:
+                self.assertAlmostEqual(explanation['priorities'][index], full['priorities'][index])
+            probed = explanation['plan']['children'][-1]
+            self.assertEqual((probed['operand'], probed['postings_decoded']), (common, 0))
+            self.assertEqual(probed['probed'], len(search.find_expression(rare, True)))
+            self.assertFalse(common in search._term_cache)
+
+    def test_limit(self):
+        self.search._io.print_results = lambda final_list, priority_list: None
+        for expression in ["python", "class OR the", "the NOT dog", "programming OR \"the dog\"", "NOT zygote"]:
+            ranked = self.search.find_expression(expression)
+            self.assertEqual(sorted(ranked), self.search.find_expression(expression, True))
+            for limit in range(len(ranked) + 2):
+                self.assertEqual(self.search.find_expression(expression, True, limit), ranked[:limit])
+
+    def test_result_cache(self):
+        self.assertEqual(self.find(self.search, "python class"), ['a.html', 'b.html'])
+        self.assertEqual(self.find(self.search, "class AND Python"), ['a.html', 'b.html'])
+        self.assertEqual(self.find(self.search, "class & python"), ['a.html', 'b.html'])
+        self.assertEqual(self.find(self.search, '(the OR dog) OR "Lazy  dog"'), self.find(self.search,
+                                                                                        '"lazy dog" | dog | the'))
+        statistics = self.search.get_cache_statistics()['results']
+        self.assertEqual((statistics['size'], statistics['hits'], statistics['misses']), (2, 3, 2))
+
+        # results are cleared when index changes
+        self.write_document(os.path.join('sub', 'e.html'), '<html><body>python class</body></html>')
+        self.search.update()
+        self.assertEqual(self.search.get_cache_statistics()['results']['size'], 0)
+        self.assertEqual(self.search.get_cache_statistics()['terms']['size'], 0)
+        self.assertEqual(self.find(self.search, "python class"), ['a.html', 'b.html', os.path.join('sub', 'e.html')])
+
+    def test_term_cache(self):
+        self.assertEqual(self.search.warm_up(["python class", "PYTHON", '"the dog" OR zygote', "AND AND"]), 5)
+        statistics = self.search.get_cache_statistics()['terms']
+        self.assertEqual((statistics['hits'], statistics['misses']), (1, 5))
+
+        self.assertEqual(self.find(self.search, "python NOT dog"), ['a.html', 'b.html'])
+        self.assertEqual(self.find(self.search, '"the dog"'), [os.path.join('sub', 'd.htm')])
+        statistics = self.search.get_cache_statistics()['terms']
+        self.assertEqual((statistics['size'], statistics['hits'], statistics['misses']), (5, 5, 5))
+        self.assertEqual(statistics['cost'], sum(len(self.search._trie.get_node(word).get_data())
+                                                 for word in ['python', 'class', 'the', 'dog', 'zygote']))
+
+    def test_lazy_frequencies(self):
+        self.search.find_expression("zygote OR dog", True)
+        term = self.search._term_cache.get('zygote')
+        self.assertIsNone(term._frequencies)
+
+        self.search.find_expression("zygote OR dog", True, 1)
+        self.assertIsNotNone(term._frequencies)
+        self.assertEqual(term.get_frequencies(), dict(term.postings.iter_frequencies()))
+
+        postings = PostingsList()
+        for document in range(0, 1000, 2):
+            postings.add(document, range(document % 3 + 1))
+        term = Term(postings, None)
+        self.assertTrue(term.probes(10))
+        self.assertEqual(term.get_frequencies([5, 4, 998, 1000]), {4: 2, 998: 3})
+        self.assertIsNone(term._frequencies)
+        self.assertFalse(term.probes(100))
+        self.assertEqual(len(term.get_frequencies(range(100))), 500)
+        self.assertFalse(term.probes(10))
+        self.assertEqual(term.get_max_frequency(), 3)
+
+    def test_find_expressions(self):
+        self.search._io.print_results = lambda final_list, priority_list: None
+        expressions = ["python", '"the dog" OR class', "AND python", "PYTHON", '"The  Dog" | class', "QUIT",
+                       '""']
+        results = self.search.find_expressions(expressions)
+        self.assertEqual([result['expression'] for result in results], expressions)
+        self.assertEqual([result['error'] is None for result in results], [True, True, False, True, True, False,
+                                                                           False])
+
+        for expression, result in zip(expressions, results):
+            if result['error'] is None:
+                self.assertEqual([path for path, priority in result['results']],
+                                 [self.search._file_list[index].get_key()
+                                  for index in self.search.find_expression(expression)])
+        self.assertEqual(results[0]['results'], results[3]['results'])
+        self.assertEqual(results[1]['results'], results[4]['results'])
+        self.assertFalse(results[0]['timings']['cached'])
+        self.assertTrue(results[3]['timings']['cached'])
+
+        results = self.search.find_expressions(["python OR class"], 1)
+        self.assertEqual(len(results[0]['results']), 1)
+
+        # operands are looked up lazily, so intersection which is already empty stops lookups
+        self.search.find_expressions(["missing AND object"])
+        self.assertNotIn('object', self.search._term_cache)
+
+    def test_shared_operands(self):
+        self.search._io.print_results = lambda final_list, priority_list: None
+        looked_up, get = [], self.search._term_cache.get
+        self.search._term_cache.get = lambda key: looked_up.append(key) or get(key)
+        expressions = ['python AND class', 'Python OR dog', '"the dog" NOT PYTHON', '"The  Dog" OR class',
+                       'python AND class']
+        results = self.search.find_expressions(expressions)
+        self.assertEqual(sorted(looked_up), ['class', 'dog', 'dog', 'python', 'the'])
+
+        self.search._result_cache.clear()
+        for expression, result in zip(expressions, results):
+            self.assertEqual([path for path, priority in result['results']],
+                             [self.search._file_list[index].get_key()
+                              for index in self.search.find_expression(expression)])
+
+    def test_explain(self):
+        printed = []
+        self.search._io.print_results = lambda final_list, priority_list: printed.append(final_list)
+        expression = 'python AND NOT "the dog" OR zygote'
+        explanation = self.search.find_expression(expression, True, 2, explain=True)
+        self.assertEqual(explanation['results'], self.search.find_expression(expression, True, 2))
+        self.assertEqual(explanation['expression'], expression)
+        self.assertEqual(explanation['plan']['operator'], 'OR')
+        self.assertEqual(explanation['plan']['output'], 3)
+        self.assertEqual(sorted(explanation['stages']), ['evaluate', 'lookup', 'parse', 'rank'])
+
+        ranking = explanation['ranking']
+        self.assertEqual(ranking['candidates'], 3)
+        self.assertEqual(ranking['documents'], 3)
+        self.assertEqual(ranking['in_links'], 4)
+
+        terms, stack = {}, [explanation['plan']]
+        while stack:
+            node = stack.pop()
+            if node['operator'] == 'TERM':
+                terms[explanation['escape_sequences'].get(node['operand'][1:], node['operand'])] = node
+            stack.extend(node.get('children', []))
+        self.assertEqual(terms['python']['output'], 2)
+        self.assertEqual(terms['the dog']['output'], 1)
+        self.assertEqual(terms['zygote']['postings_decoded'], 1)
+
+        self.assertEqual(self.search.find_expression('python', True, explain=True)['plan']['postings_decoded'], 0)
+
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            self.search.find_expression(expression, limit=2, explain=True)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertIn(expression, output)
+        self.assertEqual(printed, [explanation['results']])
+
+    def test_timings(self):
+        self.search._io.print_results = lambda final_list, priority_list: None
+        timings = {}
+        self.search.find_expression("python OR class", limit=1, timings=timings)
+        self.assertEqual(sorted(timings), ['cached', 'evaluate', 'lookup', 'parse', 'rank'])
+        self.assertFalse(timings['cached'])
+        self.assertTrue(all(timings[stage] >= 0 for stage in ['evaluate', 'lookup', 'parse', 'rank']))
+
+        self.search.find_expression("python OR class", limit=1, timings=timings)
+        self.assertTrue(timings['cached'])
+
+        self.search.find_expressions(["java", "AND"], timings=timings)
+        self.assertEqual(sorted(timings), ['cached', 'evaluate', 'lookup', 'parse', 'rank'])
+
+    def test_parallel_load(self):
+        parallel = Search(self.directory, processes=2)
+
+        self.assertEqual([node.get_key() for node in parallel._file_list],
+                         [node.get_key() for node in self.search._file_list])
+        self.assertEqual(parallel._file_words_list, self.search._file_words_list)
+        self.assertEqual([(word, node.get_data()) for word, node in parallel._trie.iter_words()],
+                         [(word, node.get_data()) for word, node in self.search._trie.iter_words()])
+
+    def test_save_load(self):
+        path = os.path.join(self.directory, 'index.snapshot')
+        self.search.save(path)
+        loaded = Search.load(path)
+
+        for expression in ["python", "the NOT dog", "class OR zygote", '"programming language"']:
+            self.assertEqual(self.find(loaded, expression), self.find(self.search, expression))
+
+        self.assertEqual(loaded._file_words_list, self.search._file_words_list)
+        self.assertEqual(loaded._trie.get_node("python").get_data(), self.search._trie.get_node("python").get_data())
+        self.assertEqual(loaded._graph[os.path.join(self.directory, 'a.html')].get_number_of_edges(), 2)
+
+    def test_progress(self):
+        events = []
+        search = Search(self.directory, progress=events.append)
+        self.assertEqual([event['event'] for event in events], ['discovered', 'progress', 'finished'])
+        self.assertEqual(events[0]['files_parsed'], 0)
+        self.assertEqual(events[0]['files_total'], 4)
+        self.assertEqual(events[0]['bytes_total'], sum(len(content) for content in DOCUMENTS.values()))
+        self.assertIsNone(events[0]['eta'])
+
+        summary = events[-1]
+        self.assertEqual(summary['files_parsed'], 4)
+        self.assertEqual(summary['bytes'], summary['bytes_total'])
+        self.assertEqual(summary['tokens'], sum(search._file_words_list))
+        self.assertEqual(summary['links'], 4)
+        self.assertEqual(summary['trie_nodes'], search._trie.get_nodes_count())
+        self.assertEqual(summary['graph_nodes'], 4)
+        self.assertEqual(summary['eta'], 0.0)
+        self.assertTrue(summary['elapsed'] >= summary['link_scores_time'] >= 0)
+
+        del events[:]
+        self.write_document('e.html', '<html><body>python zygote</body></html>')
+        self.assertEqual(search.update(events.append), (1, 0, 0))
+        self.assertEqual([(event['event'], event['files_total']) for event in events],
+                         [('discovered', 1), ('progress', 1), ('finished', 1)])
+
+        del events[:]
+        search.update(events.append)
+        self.assertEqual([(event['event'], event['files_total']) for event in events],
+                         [('discovered', 0), ('progress', 0), ('finished', 0)])
+
+    def test_update(self):
+        self.assertEqual(self.search.update(), (0, 0, 0))
+
+        self.write_document('b.html', '<html><body>zygote language <a href="sub/d.htm">d</a></body></html>')
+        os.utime(os.path.join(self.directory, 'b.html'), (0, 0))
+        self.write_document('e.html', '<html><body>python zygote</body></html>')
+        os.remove(os.path.join(self.directory, 'sub', 'c.html'))
+
+        self.assertEqual(self.search.update(), (1, 1, 1))
+        # link scores are calculated again by update, ranked search only reads them
+        self.assertEqual(len(self.search._link_scores), len(self.search._file_list))
+        page_ranks = self.search._page_ranks
+        self.search.find_expression("python", True, 1)
+        self.assertIs(self.search._page_ranks, page_ranks)
+        self.assertEqual(self.find(self.search, "python"), ['a.html', 'e.html'])
+        scores = lambda search: dict((node.get_key(), score) for node, score in zip(search._file_list,
+                                                                                     search._link_scores)
+                                     if node is not None)
+        updated, expected = scores(self.search), scores(Search(self.directory))
+        self.assertEqual(sorted(updated), sorted(expected))
+        for key in expected:
+            self.assertAlmostEqual(updated[key], expected[key])
+        self.assertEqual(self.find(self.search, "zygote"), ['b.html', 'e.html'])
+        self.assertEqual(self.find(self.search, "language NOT python"), ['b.html'])
+        self.assertEqual(self.find(self.search, "the"), [os.path.join('sub', 'd.htm')])
+
+        b_node = self.search._graph[os.path.join(self.directory, 'b.html')]
+        self.assertEqual([node.get_key() for node in b_node.get_all_connected_nodes()],
+                         [os.path.join(self.directory, 'sub', 'd.htm')])
+        self.assertEqual(b_node.get_number_of_edges(where_to=Vertex.INCOMING), 1)
+        # c.html is still in graph, because a.html links to it
+        c_node = self.search._graph[os.path.join(self.directory, 'sub', 'c.html')]
+        self.assertEqual(c_node.get_number_of_edges(where_to=Vertex.OUTGOING), 0)
+        # external link of c.html is removed from graph, because no document links to it anymore
+        self.assertEqual(sorted(os.path.relpath(node.get_key(), self.directory)
+                                for node in self.search._graph.get_all_nodes()),
+                         ['a.html', 'b.html', 'e.html', os.path.join('sub', 'c.html'), os.path.join('sub', 'd.htm')])
+        # two of five documents were removed, so file lists are compacted
+        self.assertEqual(len(self.search._file_list), 4)
+        self.assertNotIn(None, self.search._file_list)
+        self.assertEqual(self.find(self.search, "fox"), [])
+        self.assertEqual([word for word, node in self.search._trie.iter_words(prefix='fo')], [])
+
+        path = os.path.join(self.directory, 'index.snapshot')
+        self.search.save(path)
+        loaded = Search.load(path)
+        self.assertEqual(loaded.update(), (0, 0, 0))
+        os.remove(os.path.join(self.directory, 'e.html'))
+        self.assertEqual(loaded.update(), (0, 0, 1))
+        self.assertEqual(self.find(loaded, "python"), ['a.html'])
+        self.assertIn(None, loaded._file_list)
+        loaded.save(path)
+        loaded = Search.load(path)
+        self.assertEqual(len(loaded._file_list), 3)
+        self.assertNotIn(None, loaded._file_list)
+        self.assertEqual(self.find(loaded, "python"), ['a.html'])
+        self.assertEqual(self.find(loaded, "zygote"), ['b.html'])
+        self.assertEqual(loaded.update(), (0, 0, 0))
+
+    def test_freeze(self):
+        expressions = ["python", "the NOT dog", "class OR zygote", '"programming language"']
+        results = [self.find(self.search, expression) for expression in expressions]
+
+        path = os.path.join(self.directory, 'index.snapshot')
+        self.search.save(path)
+        self.search.freeze()
+        loaded = Search.load(path, frozen=True)
+
+        self.assertTrue(self.search.is_frozen())
+        self.assertTrue(loaded.is_frozen())
+        self.assertEqual([self.find(self.search, expression) for expression in expressions], results)
+        self.assertEqual([self.find(loaded, expression) for expression in expressions], results)
+
+        with self.assertRaises(Exception):
+            self.search.update()
+
+    def test_load_invalid(self):
+        path = os.path.join(self.directory, 'a.html')
+        with self.assertRaises(SnapshotError):
+            Search.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -63,6 +63,21 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(self.trie.get_node("te").get_parent().get_key(), "t")
         self.assertEqual(self.trie.get_node("t").get_parent().get_key(), "__root__")
 
+    def test_get_nodes_count(self):
+        self.assertEqual(self.trie.get_nodes_count(), 11)
+        self.trie.add_word("tester")
+        self.trie.add_word("foo")
+        self.assertEqual(self.trie.get_nodes_count(), 13)
+
+    def test_iter_words(self):
+        self.trie.add_word("fool")
+        self.trie.add_word("for")
+        self.assertEqual([word for word, node in self.trie.iter_words()], ["asdf", "foo", "fool", "for", "test"])
+        self.assertEqual([word for word, node in self.trie.iter_words("FO")], ["foo", "fool", "for"])
+        self.assertEqual([word for word, node in self.trie.iter_words("foo")], ["foo", "fool"])
+        self.assertEqual(list(self.trie.iter_words("bar")), [])
+        self.assertIs(dict(self.trie.iter_words())["fool"], self.trie.get_node("fool"))
+
 
 if __name__ == '__main__':
     unittest.main()
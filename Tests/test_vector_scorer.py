@@ -0,0 +1,54 @@
+__author__ = 'Acko'
+
+import array
+import unittest
+
+from search import vector_scorer
+
+
+@unittest.skipUnless(vector_scorer.AVAILABLE, "numpy is not installed")
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # documents 0 - 3, document 3 links to 0 and 1, document 2 links to 0
+        self.frequencies = {'python': {0: 2, 1: 1, 3: 4}, 'class': {1: 2, 2: 1}, 'dog': {}}
+        self.words_count = [10, 20, 30, 40]
+        self.link_scores = [1.5, 0.5, 0.0, 2.0]
+        self.in_links = [0, 2, 3, 3, 3], [3, 2, 3]
+
+    def priorities(self, final_list, postfix_list, in_links=None):
+        in_links = in_links if in_links is not None else self.in_links
+        return vector_scorer.calculate_priorities(final_list, postfix_list, self.frequencies, self.words_count,
+                                                  self.link_scores, *in_links)
+
+    def test_single_word(self):
+        priorities = self.priorities([0, 1], ['python'])
+        self.assertAlmostEqual(priorities[0], 2 + 0.7 * 1.5 + 0.4 * (4 + 0))
+        self.assertAlmostEqual(priorities[1], 1 + 0.7 * 0.5 + 0.4 * 4)
+
+    def test_operators(self):
+        # document 1 (python 1, class 2) is linked by document 3 (python 4, class 0)
+        priorities = self.priorities([1], ['python', 'class', '&'])
+        self.assertEqual(priorities.keys(), [1])
+        self.assertAlmostEqual(priorities[1], 1 + 0.7 * 0.5 + 0.4 * 4)
+
+        priorities = self.priorities([0, 2], ['python', 'class', '|'])
+        self.assertAlmostEqual(priorities[0], 2 + 0.7 * 1.5 + 0.4 * (4 + 1))
+        self.assertAlmostEqual(priorities[2], 1)
+
+        priorities = self.priorities([2], ['class', 'dog', '!', '&'])
+        self.assertAlmostEqual(priorities[2], 30 - 1)
+
+    def test_arrays(self):
+        in_links = array.array('l', self.in_links[0]), array.array('l', self.in_links[1])
+        self.link_scores = array.array('d', self.link_scores)
+        self.assertEqual(self.priorities([0, 1, 3], ['python'], in_links), self.priorities([0, 1, 3], ['python']))
+        self.assertEqual(self.priorities([2, 3], ['python'], (array.array('l', [0, 0, 0, 0, 0]), array.array('l'))),
+                         {2: 0.0, 3: 4 + 0.7 * 2.0})
+
+    def test_empty(self):
+        self.assertEqual(self.priorities([], ['python']), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 __author__ = 'Acko'
 
 from vertex_and_edge import Vertex
+from utils import instrumentation
 
 
 class Graph(object):
@@ -57,6 +58,8 @@ class Graph(object):
 
         v = Vertex(key, data, self._directed)
         self._add_node(v)
+        if instrumentation.ENABLED:
+            instrumentation.count('graph.nodes_created')
 
     def exists(self, key):
         """ Method for checking if node with given key exists in graph instance
@@ -93,6 +96,8 @@ class Graph(object):
             raise Exception("One of vertexes which are you trying to connect is not in Graph")
 
         first.connect_to_node(second, where_to=Vertex.OUTGOING)
+        if instrumentation.ENABLED:
+            instrumentation.count('graph.edges_created')
 
     def connect_both_ways(self, first, second):
         """ Method for connecting two nodes both ways (<=>)
@@ -108,6 +113,30 @@ class Graph(object):
         self.connect_nodes(first, second)
         self.connect_nodes(second, first)
 
+    def disconnect_nodes(self, first, second):
+        """ Method for removing connection from first node to second one (opposite connection is kept)
+
+            Args:
+                first - (Vertex instance) starting point of connection
+                second - (Vertex instance) ending point of connection
+
+            Raise:
+                TypeError - if parameters are not Vertex instances
+                KeyError - if nodes are not connected
+        """
+
+        if not isinstance(first, Vertex) or not isinstance(second, Vertex):
+            raise TypeError("Wrong parameter types, must be vertex")
+
+        link = first.get_edge(second, where_to=Vertex.OUTGOING)
+        if link is None:
+            raise KeyError("Vertexes are not connected")
+
+        first.remove_link(link, where_to=Vertex.OUTGOING)
+        second.remove_link(link, where_to=Vertex.INCOMING)
+        if instrumentation.ENABLED:
+            instrumentation.count('graph.edges_removed')
+
     def remove_node(self, vertex):
         """ Method for removing vertex from Graph instance
 
@@ -145,6 +174,61 @@ class Graph(object):
                     vertex.disconnect_node(node)  # will disconnect both ways
 
         del self._nodes[vertex.get_key()]
+        if instrumentation.ENABLED:
+            instrumentation.count('graph.nodes_removed')
+
+    def page_rank(self, damping=0.85, iterations=100, tolerance=1e-9, initial=None):
+        """ Method which calculates PageRank of every node in graph (iterative power method)
+
+            In every iteration, each node gives its rank (multiplied by damping) equally to all nodes it points
+            to, and rest of rank is spread equally over all nodes. Rank of nodes which don't point anywhere is
+            spread equally over all nodes. Iterations stop when sum of rank changes is smaller than tolerance.
+            Sum of all ranks is 1.
+
+            If initial ranks are given (for example ranks calculated before graph was slightly changed),
+            iterations start from them instead of from equal ranks, so they stop much sooner.
+
+            Args:
+                damping - (float) probability of following link, default is 0.85
+                iterations - (int) maximal number of iterations
+                tolerance - (float) sum of rank changes under which calculation is stopped
+                initial - (dict) node key -> rank from which iterations start (nodes which are not in it start
+                        from 1 / number of nodes), default is None (all nodes start with equal rank)
+
+            Return:
+                Dictionary with node keys as keys and theirs rank as values
+        """
+
+        keys = self._nodes.keys()
+        count = len(keys)
+        if count == 0:
+            return {}
+
+        indexes = dict((key, index) for index, key in enumerate(keys))
+        outgoing = [[indexes[node.get_key()] for node in self._nodes[key].get_all_connected_nodes(Vertex.OUTGOING)]
+                    for key in keys]
+
+        ranks = [1.0 / count] * count
+        if initial is not None:
+            ranks = [initial.get(key, 1.0 / count) for key in keys]
+            total = sum(ranks)
+            ranks = [rank / total for rank in ranks]
+        for iteration in xrange(iterations):
+            dangling = sum(ranks[index] for index in xrange(count) if len(outgoing[index]) == 0)
+            base = (1.0 - damping + damping * dangling) / count
+            new_ranks = [base] * count
+            for index in xrange(count):
+                if len(outgoing[index]) > 0:
+                    share = damping * ranks[index] / len(outgoing[index])
+                    for target in outgoing[index]:
+                        new_ranks[target] += share
+
+            change = sum(abs(new_ranks[index] - ranks[index]) for index in xrange(count))
+            ranks = new_ranks
+            if change < tolerance:
+                break
+
+        return dict((key, ranks[index]) for index, key in enumerate(keys))
 
     def is_directed(self):
         """ Method for checking if Graph is directed or not
@@ -117,6 +117,28 @@ class Vertex(object):
 
             self._incoming.append(link)
 
+    def remove_link(self, link, where_to=OUTGOING):
+        """ Method for removing link (Edge instance) from current vertex outgoing or incoming list
+
+            Only given link is removed (other vertex is not changed), so it should be called for both sides
+            of link, if link should be removed completely.
+
+            Args:
+                link - (Edge instance) which should be removed from current vertex
+                where_to - (Vertex constant) flag which indicates from which list link should be removed
+
+            Raise:
+                KeyError - if link is not bound to current vertex
+        """
+
+        edge_list = self._outgoing if where_to == Vertex.OUTGOING or not self._directed else self._incoming
+
+        for index, edge in enumerate(edge_list):
+            if edge is link:
+                edge_list.pop(index)
+                return
+        raise KeyError("Link is not bound to current vertex")
+
     def connect_to_node(self, vertex, where_to=OUTGOING):
         """ Method which connects current vertex to another vertex passed as parameter
 
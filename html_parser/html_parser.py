@@ -4,6 +4,8 @@ import os
 
 from HTMLParser import HTMLParser
 
+from utils import instrumentation
+
 
 class Parser(HTMLParser):
     """
@@ -12,7 +14,17 @@ class Parser(HTMLParser):
     Upotreba:
         parser = Parser()
         parser.parse(FILE_PATH)
+
+        ili, bez učitavanja celog fajla u memoriju:
+        for word in parser.iter_words(FILE_PATH): ...
     """
+
+    # broj bajtova koji se čita iz fajla odjednom
+    CHUNK_SIZE = 64 * 1024
+
+    # znaci na kojima se sme preseći sadržaj fajla
+    SEPARATORS = ('<', ' ', '\n', '\r', '\t')
+
     def handle_starttag(self, tag, attrs):
         """
         Metoda beleži sadržaj href atributa
@@ -57,26 +69,68 @@ class Parser(HTMLParser):
         if stripped_text:
             self.words.extend(stripped_text)
 
-    def parse(self, path):
+    def iter_words(self, path, chunk_size=CHUNK_SIZE):
         """
-        Metoda učitava sadržaj fajla i prosleđuje ga parseru
+        Metoda učitava fajl deo po deo i vraća (generator) pronađene reči
 
-        Argument:
+        Sadržaj fajla se prosleđuje parseru u delovima veličine chunk_size,
+        presečenim na poslednjem razmaku ili početku taga, tako da se nijedna
+        reč ne deli između dva dela. Reči se vraćaju čim se pronađu, pa se
+        ni ceo sadržaj fajla ni lista svih reči nikada ne drže u memoriji.
+        Linkovi su dostupni u self.links kada se generator iscrpi.
+
+        Argumenti:
         - `path`: putanja do fajla
+        - `chunk_size`: broj bajtova koji se čita odjednom
         """
+        self.reset()
         self.links = []
         self.words = []
 
         try:
             with open(path, 'r') as document:
                 self.path_root = os.path.abspath(os.path.dirname(path))
-                content = document.read()
-                self.feed(content)
+                rest = ''
+                while True:
+                    chunk = document.read(chunk_size)
+                    if not chunk:
+                        break
+                    if instrumentation.ENABLED:
+                        instrumentation.count('parser.bytes_read', len(chunk))
+
+                    # preseci na poslednjem razmaku ili tagu, ostatak ide uz sledeći deo
+                    chunk = rest + chunk
+                    cut = max(chunk.rfind(separator) for separator in Parser.SEPARATORS)
+                    if cut <= 0:
+                        rest = chunk
+                        continue
+                    rest = chunk[cut:]
+                    self.feed(chunk[:cut])
+
+                    for word in self.words:
+                        yield word
+                    self.words = []
+
+                self.feed(rest)
+                for word in self.words:
+                    yield word
+                self.words = []
 
                 # očisti duplikate
                 self.links = list(set(self.links))
+                if instrumentation.ENABLED:
+                    instrumentation.count('parser.files')
+                    instrumentation.count('parser.links', len(self.links))
 
         except IOError as e:
             print e
-        finally:
-            return self.links, self.words
+
+    def parse(self, path):
+        """
+        Metoda učitava sadržaj fajla i prosleđuje ga parseru
+
+        Argument:
+        - `path`: putanja do fajla
+        """
+        words = list(self.iter_words(path))
+        return self.links, words
@@ -5,23 +5,141 @@
 __author__ = 'Acko'
 
 import os
+import sys
+import time
+import json
+import argparse
+import itertools
 
 from search.search import Search
+from search.progress import ProgressLog
 from utils.postfix_parser import InvalidInput, QuitRequest
+from utils import instrumentation
 
 
-if __name__ == '__main__':
-    initial_path = raw_input("Unesite putanju do baze: ")
-    Search.print_instruction()
-    print 'Ucitavanje. Molim vas sacekajte...'
-    s = Search(os.path.abspath(initial_path))
+# Number of queries which are searched together (by one find_expressions call) in batch mode
+CHUNK_SIZE = 100
+
+
+def run_queries(search, queries, output, limit=None, chunk_size=CHUNK_SIZE):
+    """ Function which searches all given queries and writes results as JSON lines (one object per query)
+
+        Queries are read and searched in chunks (by find_expressions, so words and syntagms are shared between
+        queries of one chunk), and results of every chunk are written as soon as it is searched.
 
+        Every line is object with keys 'query', 'results' (list of objects with 'path' relative to database
+        and 'priority'), 'error' (None, or message if query is not valid) and 'timings' (time in seconds spent
+        in 'parse', 'lookup', 'evaluate' and 'rank' stages, their sum as 'total', and 'cached' flag). Empty lines
+        are skipped.
+
+        Args:
+            search - Search object
+            queries - iterable of queries (for example opened file)
+            output - file to which results are written
+            limit - (int) number of results with highest priority which are written, default is None (all)
+            chunk_size - (int) number of queries searched together, default is CHUNK_SIZE
+    """
+
+    root_path = search.get_root_path()
+    lines = (query.strip() for query in queries)
+    lines = (query for query in lines if query != '')
     while True:
-        try:
-            s.find_expression(raw_input("Unesite reci za pretragu (ili 'QUIT' za izlaz): "))
-        except InvalidInput:
-            print "Pogresno unet zahtev, pokusajte ponovo."
-        except QuitRequest:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if len(chunk) == 0:
             break
 
-    print 'Dovidjenja'
\ No newline at end of file
+        for result in search.find_expressions(chunk, limit):
+            timings = result['timings']
+            timings['total'] = sum(timings[stage] for stage in ['parse', 'lookup', 'evaluate', 'rank'])
+            output.write(json.dumps({
+                'query': result['expression'],
+                'results': [{'path': os.path.relpath(path, root_path), 'priority': priority}
+                            for path, priority in result['results']],
+                'error': result['error'],
+                'timings': timings}) + '\n')
+        output.flush()
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Python search engine.')
+    arg_parser.add_argument('--snapshot', help='path to index snapshot, it is loaded if it exists, '
+                                               'otherwise it is written after database is parsed')
+    arg_parser.add_argument('--processes', type=int, default=1,
+                            help='number of processes used for parsing html files (0 means one per CPU)')
+    arg_parser.add_argument('--frozen', action='store_true',
+                            help='freeze index after loading (less memory, faster search, no updates)')
+    arg_parser.add_argument('--limit', type=int,
+                            help='number of results with highest priority which are shown (default is all)')
+    arg_parser.add_argument('--warm-up', dest='warm_up',
+                            help='path to query log (one query per line), words from it are cached at start')
+    arg_parser.add_argument('--database', help='path to database (asked for if it is not given)')
+    arg_parser.add_argument('--queries',
+                            help="path to file with queries (one per line, '-' for standard input), results "
+                                 "are written as JSON lines instead of interactive search")
+    arg_parser.add_argument('--output', help='path to file for JSON lines results (default is standard output)')
+    arg_parser.add_argument('--progress-interval', dest='progress_interval', type=float, default=5.0,
+                            help='seconds between progress lines while database is parsed (0 turns them off)')
+    arg_parser.add_argument('--explain', action='store_true',
+                            help='print plan of every search with number of documents and time of each operator')
+    arg_parser.add_argument('--instrumentation',
+                            help='path to file into which counters and timers are written (as JSON) at exit')
+    args = arg_parser.parse_args()
+    if args.instrumentation is not None:
+        instrumentation.enable()
+    processes = args.processes if args.processes > 0 else None
+    batch = args.queries is not None
+
+    start = time.time()
+    if args.snapshot is not None and os.path.isfile(args.snapshot):
+        if not batch:
+            Search.print_instruction()
+            print 'Ucitavanje indeksa. Molim vas sacekajte...'
+        s = Search.load(args.snapshot, processes, args.frozen)
+    else:
+        if args.database is not None:
+            initial_path = args.database
+        elif batch:
+            arg_parser.error('--database or existing --snapshot is required with --queries')
+        else:
+            initial_path = raw_input("Unesite putanju do baze: ")
+        if not batch:
+            Search.print_instruction()
+            print 'Ucitavanje. Molim vas sacekajte...'
+        progress = ProgressLog(sys.stderr if batch else sys.stdout, args.progress_interval) \
+            if args.progress_interval > 0 else None
+        s = Search(os.path.abspath(initial_path), processes, progress)
+        if args.snapshot is not None:
+            s.save(args.snapshot)
+        if args.frozen:
+            s.freeze()
+
+    if args.warm_up is not None:
+        with open(args.warm_up) as query_log:
+            s.warm_up(query_log)
+
+    if batch:
+        sys.stderr.write(json.dumps({'load': time.time() - start}) + '\n')
+        queries = sys.stdin if args.queries == '-' else open(args.queries)
+        output = sys.stdout if args.output is None else open(args.output, 'w')
+        try:
+            run_queries(s, queries, output, args.limit)
+        finally:
+            if queries is not sys.stdin:
+                queries.close()
+            if output is not sys.stdout:
+                output.close()
+    else:
+        while True:
+            try:
+                s.find_expression(raw_input("Unesite reci za pretragu (ili 'QUIT' za izlaz): "), limit=args.limit,
+                                  explain=args.explain)
+            except InvalidInput:
+                print "Pogresno unet zahtev, pokusajte ponovo."
+            except QuitRequest:
+                break
+
+        print 'Dovidjenja'
+
+    if args.instrumentation is not None:
+        with open(args.instrumentation, 'w') as statistics:
+            instrumentation.dump(statistics)
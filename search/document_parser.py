@@ -0,0 +1,99 @@
+"""
+    Module contains functions for parsing database documents into compact form ready for indexing,
+    either one by one (in current process) or in parallel (in pool of processes)
+"""
+
+__author__ = 'Acko'
+
+import os
+import multiprocessing
+
+from html_parser.html_parser import Parser
+
+
+# Parser instance used by parse_document when no parser is passed (one per process)
+_parser = None
+
+# Number of documents sent to worker process at once
+CHUNK_SIZE = 16
+
+
+def file_state(file_path):
+    """ Function which returns state of file used for detecting changes (modification time and size)
+
+        Args:
+            file_path - path to file
+
+        Return:
+            Tuple (modification time, size) of given file
+    """
+
+    stat = os.stat(file_path)
+    return stat.st_mtime, stat.st_size
+
+
+def parse_document(file_path, parser=None):
+    """ Function which parses one html file and groups its words by (small_cased) word
+
+        Words are read from parser as they are found (file is never loaded into memory whole), and only
+        indexes of each word are kept, no list of all words from file is built.
+
+        Args:
+            file_path - path to html file
+            parser - Parser instance which should be used, if None one Parser per process is used
+
+        Return:
+            Tuple (file_path, file state, list of links, number of words, list of tuples (word, list of indexes
+            where word is found in file))
+    """
+
+    global _parser
+    if parser is None:
+        if _parser is None:
+            _parser = Parser()
+        parser = _parser
+
+    state = file_state(file_path)
+
+    terms, words_count = {}, 0
+    for index, word in enumerate(parser.iter_words(file_path)):
+        word = word.lower()
+        try:
+            terms[word].append(index)
+        except KeyError:
+            terms[word] = [index]
+        words_count = index + 1
+
+    return file_path, state, parser.links, words_count, terms.items()
+
+
+def parse_documents(file_paths, processes=1):
+    """ Generator which parses all given files, and yields results in same order as paths were given
+
+        If more than one process is requested, files are parsed in pool of worker processes, but results
+        are still yielded in order of given paths, so documents always get same indexes.
+
+        Args:
+            file_paths - list of paths to html files
+            processes - (int) number of processes which should parse files, default is 1 (current process only)
+
+        Return:
+            Generator of parse_document results
+    """
+
+    if processes == 1 or len(file_paths) < 2:
+        parser = Parser()
+        for file_path in file_paths:
+            yield parse_document(file_path, parser)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(parse_document, file_paths, CHUNK_SIZE):
+            yield result
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
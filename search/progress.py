@@ -0,0 +1,79 @@
+"""
+    Module contains ProgressLog, callback for Search which writes progress of index build as log lines.
+
+    Search calls progress callback with event dictionary: 'discovered' when all html files are found,
+    'progress' periodically while files are parsed (and once more when all of them are parsed) and 'finished'
+    with summary of whole build. Every event contains number of parsed and all files ('files_parsed' and
+    'files_total'), parsed and all bytes ('bytes' and 'bytes_total'), number of indexed words ('tokens') and
+    links ('links'), current number of trie nodes and graph nodes, time since start ('elapsed'), throughput
+    ('files_per_second', 'bytes_per_second' and 'tokens_per_second') and estimated time remaining ('eta',
+    None until anything is parsed). Event 'finished' also has time spent on link scores ('link_scores_time').
+"""
+
+__author__ = 'Acko'
+
+import sys
+import time
+
+
+def format_event(event):
+    """ Function which creates log line for progress event
+
+        Args:
+            event - (dict) progress event
+
+        Return:
+            Log line (without new line)
+    """
+
+    if event['event'] == 'discovered':
+        return 'Pronadjeno %d fajlova (%.1f MB)' % (event['files_total'], event['bytes_total'] / 1048576.0)
+
+    line = '%d/%d fajlova (%.0f%%), %.1f MB/s, %d reci/s, %d cvorova stabla, %d cvorova grafa' % (
+        event['files_parsed'], event['files_total'],
+        100.0 * event['files_parsed'] / event['files_total'] if event['files_total'] > 0 else 100.0,
+        event['bytes_per_second'] / 1048576.0, event['tokens_per_second'], event['trie_nodes'],
+        event['graph_nodes'])
+    if event['event'] == 'finished':
+        return 'Indeks napravljen za %.1f s (rangiranje linkova %.1f s): %s' % (event['elapsed'],
+                                                                             event['link_scores_time'], line)
+    if event['eta'] is not None:
+        line += ', preostalo oko %.0f s' % event['eta']
+    return line
+
+
+class ProgressLog(object):
+    """ Class whose instances are progress callbacks which write events as log lines
+
+        'progress' events are written at most once per interval, 'discovered' and 'finished' events are always
+        written.
+
+        USE:
+            s = Search(path_to_database, progress=ProgressLog(sys.stderr, 5.0))
+    """
+
+    def __init__(self, output=None, interval=5.0):
+        """ Constructor
+
+            Args:
+                output - file into which lines are written, default is None (standard error)
+                interval - (float) smallest time (in seconds) between two 'progress' lines
+        """
+
+        self._output = output if output is not None else sys.stderr
+        self._interval = interval
+        self._last = None
+
+    def __call__(self, event):
+        """ Method which writes log line for event (unless it is 'progress' event which came too soon)
+
+            Args:
+                event - (dict) progress event
+        """
+
+        now = time.time()
+        if event['event'] == 'progress' and self._last is not None and now - self._last < self._interval:
+            return
+        self._last = now
+        self._output.write(format_event(event) + '\n')
+        self._output.flush()
@@ -1,12 +1,93 @@
 __author__ = 'Acko'
 
 import os
+import stat
+import time
+import array
+import heapq
 
 from graph.graph import Graph
 from graph.vertex_and_edge import Vertex
 from trie.trie import Trie
-from html_parser.html_parser import Parser
-from utils.postfix_parser import PostfixParser
+from trie.frozen_trie import FrozenTrie
+from utils.postfix_parser import PostfixParser, InvalidInput, QuitRequest
+from utils.postings import PostingsList
+from utils.bitmap import BitmapSet
+from utils.lru_cache import LRUCache
+from utils.lfu_cache import LFUCache
+from utils import document_set
+from utils import query_planner
+from utils import compiled_query
+from utils import instrumentation
+import document_parser
+import snapshot
+import vector_scorer
+
+
+class Term(object):
+    """ Class which represents search result for one word: its PostingsList and set of documents (ready for set
+        operations). Dictionary document -> term frequency is decoded only when it is first needed (for ranking).
+
+        If word was only probed for few documents (see Search probe_element), set of documents is None, and its
+        frequencies are also probed, as long as they are needed for few documents.
+    """
+
+    __slots__ = ['postings', 'documents', '_frequencies']
+
+    def __init__(self, postings, documents):
+        """ Constructor
+
+            Args:
+                postings - PostingsList of word
+                documents - set of documents (sorted list or BitmapSet) in which word is found, None if they are
+                        not decoded
+        """
+
+        self.postings = postings
+        self.documents = documents
+        self._frequencies = None
+
+    def get_frequencies(self, documents=None):
+        """ Getter for term frequencies (decoded from PostingsList on first call)
+
+            If documents are given and frequencies of that many documents should be probed (see probes), only
+            frequencies of those documents are found (and they are not kept).
+
+            Args:
+                documents - list of indexes of documents whose frequencies are needed, default is None (all)
+
+            Return:
+                Dictionary document index -> number of word showing up times in document (for all documents of
+                word, or only for those of given documents which contain word)
+        """
+
+        if documents is not None and self.probes(len(documents)):
+            return dict(self.postings.probe(sorted(documents)))
+        if self._frequencies is None:
+            self._frequencies = dict(self.postings.iter_frequencies())
+        return self._frequencies
+
+    def get_max_frequency(self):
+        """ Getter for highest term frequency of word (kept by PostingsList, nothing is decoded)
+
+            Return:
+                Highest number of word showing up times in one document
+        """
+
+        return self.postings.get_max_frequency()
+
+    def probes(self, count):
+        """ Method which checks if frequencies of given number of documents are found by probing PostingsList
+            through its skip list (frequencies are not decoded yet, and documents of word are many times more)
+
+            Args:
+                count - (int) number of documents whose frequencies are needed
+
+            Return:
+                True if frequencies are probed, False if whole PostingsList is decoded
+        """
+
+        return self._frequencies is None and count * Search.PROBE_RATIO < len(self.postings)
 
 
 class Search(object):
@@ -23,9 +104,25 @@ class Search(object):
             s = Search(path_to_database)
             Search.print_instruction()
             s.find_expression(expression)
+
+            s.save(path_to_snapshot) and later s = Search.load(path_to_snapshot)
     """
 
-    def __init__(self, file_path):
+    # Maximal number of cached search results, and maximal number of documents in all of them
+    RESULT_CACHE_SIZE = 1024
+    RESULT_CACHE_DOCUMENTS = 1000000
+    # Maximal number of cached (decoded) word search results, and maximal number of postings in all of them
+    TERM_CACHE_SIZE = 512
+    TERM_CACHE_POSTINGS = 1000000
+    # Word is probed for documents (through skip list of its PostingsList) instead of decoded, if it is found in
+    # this many times more documents (about half of SKIP_INTERVAL documents are decoded for each probed one)
+    PROBE_RATIO = 32
+    # Part of file list which can be taken by removed documents before update compacts it
+    REMOVED_RATIO = 0.25
+    # Smallest time (in seconds) between two 'progress' events sent to progress callback
+    PROGRESS_INTERVAL = 0.5
+
+    def __init__(self, file_path, processes=1, progress=None):
         """ Constructor, initialize all of necessary data structures, and loads all data from database in them
 
             Object has trie - which is used for storing all words and data about word origin, graph which is used
@@ -35,34 +132,514 @@ class Search(object):
 
             Args:
                 file_path - path to database (with html files)
+                processes - (int) number of processes used for parsing html files, default is 1 (no parallel
+                        parsing), None means one process per CPU
+                progress - function which is called with progress events (dictionaries described in progress
+                        module) while index is built, default is None (progress is not reported)
+        """
+
+        self.__create_structures(file_path, processes)
+        with instrumentation.timer('search.build'):
+            event = self.__load_data(os.path.abspath(file_path), progress)
+        self.__update_link_scores(event, progress)
+
+    def __create_structures(self, file_path, processes=1):
+        """ Method which creates all (empty) data structures used by Search instance
+
+            Args:
+                file_path - path to database (with html files)
+                processes - (int) number of processes used for parsing html files
         """
 
+        self._root_path = file_path
+        self._processes = processes
         self._trie = Trie()
         self._graph = Graph(directed=True)
         self._file_list, self._file_words_list = [], []
+        self._document_indexes = {}
+        self._file_terms, self._file_states = [], []
+        self._removed = 0
+        self._universe = None
+        self._link_scores = array.array('d')
+        self._page_ranks = None
+        # in-links of documents in compressed sparse row form: indexes of documents which link to document
+        # with index i are in_link_sources[in_link_offsets[i]:in_link_offsets[i + 1]]
+        self._in_link_offsets, self._in_link_sources = array.array('l', [0]), array.array('l')
+        self._result_cache = LRUCache(Search.RESULT_CACHE_SIZE, Search.RESULT_CACHE_DOCUMENTS,
+                                      lambda value: len(value[0]))
+        self._term_cache = LFUCache(Search.TERM_CACHE_SIZE, Search.TERM_CACHE_POSTINGS,
+                                    lambda term: len(term.postings))
         self._io = Search.IOAdapter(self._file_list, file_path)
 
-        self.__load_data(os.path.abspath(file_path), Parser())
+    def save(self, path):
+        """ Method which writes whole index (trie, graph and file lists) into binary snapshot file
+
+            Snapshot contains database path, document table (paths, word counts, file states, link scores and
+            indexes of words each document contains), every word from trie with its postings list, and graph
+            as list of node keys with list of edges (pairs of node indexes). It can be read back with Search.load,
+            without parsing database again.
 
-    def __load_data(self, file_path, parser):
-        """ Recursion based method, which goes DFS search and parses all html files found
+            Args:
+                path - path to snapshot file which should be written
+        """
 
-            For each html (htm) file found in database structure, two methods are called, handle_links, and
-            handle_words, which then does all work with words found in file and links found in file.
+        node_keys = [node.get_key() for node in self._graph.get_all_nodes()]
+        node_indexes = dict((key, index) for index, key in enumerate(node_keys))
+        edges = []
+        for key in node_keys:
+            for node in self._graph.get_node(key).get_all_connected_nodes(where_to=Vertex.OUTGOING):
+                edges.append((node_indexes[key], node_indexes[node.get_key()]))
+
+        words = [(word, node.get_data()) for word, node in self._trie.iter_words()]
+        word_indexes = dict((word, index) for index, (word, data) in enumerate(words))
+
+        with instrumentation.timer('search.save'):
+            snapshot.write_snapshot(path, {
+                'root_path': self._root_path,
+                'documents': [node.get_key() if node is not None else None for node in self._file_list],
+                'words_count': self._file_words_list,
+                'states': self._file_states,
+                'terms': [[word_indexes[word] for word in terms] for terms in self._file_terms],
+                'link_scores': self._link_scores,
+                'words': words,
+                'nodes': node_keys,
+                'edges': edges
+            })
+
+    @staticmethod
+    def load(path, processes=1, frozen=False):
+        """ Static method which creates Search instance from snapshot written by save method
+
+            Args:
+                path - path to snapshot file
+                processes - (int) number of processes used for parsing html files (when index is updated)
+                frozen - (bool) flag which indicates if words should be loaded straight into FrozenTrie
+                        (same as calling freeze method after load, but faster)
+
+            Return:
+                Search instance with same index as one which was saved
+
+            Raise:
+                SnapshotError - if file is not a snapshot, or its version is not supported
+        """
+
+        with instrumentation.timer('search.load'):
+            payload = snapshot.read_snapshot(path)
+
+        search = Search.__new__(Search)
+        search.__create_structures(payload['root_path'], processes)
+
+        if frozen:
+            search._trie = FrozenTrie(payload['words'])
+        else:
+            for word, data in payload['words']:
+                search._trie.add_word(word, ignore_case=False).set_data(data)
+
+        for key in payload['nodes']:
+            search._graph.create_node(key)
+        graph_nodes = [search._graph.get_node(key) for key in payload['nodes']]
+        for start, end in payload['edges']:
+            graph_nodes[start].connect_to_node(graph_nodes[end], where_to=Vertex.OUTGOING)
+
+        words = [word for word, data in payload['words']]
+        search._file_list.extend(search._graph[key] if key is not None else None for key in payload['documents'])
+        search._document_indexes.update((key, index) for index, key in enumerate(payload['documents'])
+                                        if key is not None)
+        search._file_words_list.extend(payload['words_count'])
+        search._file_states.extend(payload['states'])
+        search._file_terms.extend(tuple(words[index] for index in terms) for terms in payload['terms'])
+        search._link_scores = payload['link_scores']
+        search._removed = payload['documents'].count(None)
+        if search._removed > 0:
+            search.__compact()
+        search.__build_in_links()
+
+        return search
+
+    def freeze(self):
+        """ Method which turns trie into read-only FrozenTrie, which takes much less memory and is faster to search
+
+            Frozen index can still be searched and saved, but it can't be updated anymore.
+        """
+
+        if not self.is_frozen():
+            self._trie = FrozenTrie.from_trie(self._trie)
+
+    def is_frozen(self):
+        """ Method for checking if index is frozen (if freeze method was called)
+
+            Return:
+                True if index is frozen, False otherwise
+        """
+
+        return isinstance(self._trie, FrozenTrie)
+
+    def __load_data(self, file_path, progress=None):
+        """ Method which parses all html files found in database and stores them into structures
+
+            First it collects all html (htm) files found in database structure (by walk_files), then parses them
+            (in parallel if more processes are set) and for each parsed file calls handle_links and handle_words
+            methods, which then does all work with words found in file and links found in file. Files are always
+            added in order in which they were found, so documents get same indexes no matter how many processes
+            are used.
 
             Args:
                 file_path - path to file (folder) which should be read
-                parser - Parser instance which is used to parse html files and extract words and links from them
+                progress - function which is called with progress events, default is None
+
+            Return:
+                Last progress event (None if progress is not given)
         """
 
-        if os.path.isfile(file_path) and file_path.split(".")[-1] in ['html', 'htm']:
-            links, words = parser.parse(file_path)
-            self.__handle_links(file_path, links)
-            self.__handle_words(file_path, words)
-        elif os.path.isdir(file_path):
+        start = time.time()
+        return self.__index_files(list(Search.__walk_files(file_path)), progress, start)
+
+    @staticmethod
+    def __walk_files(file_path):
+        """ Recursion based generator, which goes DFS search and yields all html files found
+
+            Every file is checked with one stat call, which also gives its state (so callers don't have to
+            read it again).
+
+            Args:
+                file_path - path to file (folder) which should be walked through
+
+            Return:
+                Generator of tuples (path, state (modification time, size)) for all html (htm) files found
+        """
+
+        try:
+            status = os.stat(file_path)
+        except OSError:
+            return
+
+        if stat.S_ISREG(status.st_mode) and file_path.split(".")[-1] in ['html', 'htm']:
+            if instrumentation.ENABLED:
+                instrumentation.count('search.files_walked')
+            yield file_path, (status.st_mtime, status.st_size)
+        elif stat.S_ISDIR(status.st_mode):
             for child in os.listdir(file_path):
-                self.__load_data(os.path.join(file_path, child), parser)
-        return
+                for found in Search.__walk_files(os.path.join(file_path, child)):
+                    yield found
+
+    def __index_files(self, files, progress=None, start=None):
+        """ Method which parses given html files and adds them (as new documents) into all structures
+
+            If progress callback is given, it is called with 'discovered' event before parsing, with 'progress'
+            event at most once per PROGRESS_INTERVAL seconds while files are parsed, and once more when all
+            files are parsed.
+
+            Args:
+                files - list of tuples (path to html file, its state), as found by walk_files
+                progress - function which is called with progress events, default is None
+                start - time when work started (files discovery), default is None (now)
+
+            Return:
+                Last progress event (None if progress is not given)
+        """
+
+        if progress is not None:
+            start = start if start is not None else time.time()
+            # parsed files, bytes, tokens and links
+            counts = [0, 0, 0, 0]
+            total_bytes = sum(state[1] for path, state in files)
+            progress(self.__progress_event('discovered', counts, start, len(files), total_bytes))
+            last = time.time()
+
+        file_paths = [path for path, state in files]
+        for file_path, state, links, words_count, terms in document_parser.parse_documents(file_paths,
+                                                                                           self._processes):
+            self.__handle_links(file_path, links)
+            self.__handle_words(file_path, words_count, terms)
+            self._file_states.append(state)
+            if instrumentation.ENABLED:
+                instrumentation.count('search.documents_indexed')
+                instrumentation.count('search.bytes_parsed', state[1])
+                instrumentation.count('search.tokens_indexed', words_count)
+                instrumentation.count('search.postings_appended', len(terms))
+
+            if progress is not None:
+                counts[0] += 1
+                counts[1] += state[1]
+                counts[2] += words_count
+                counts[3] += len(links)
+                if time.time() - last >= Search.PROGRESS_INTERVAL:
+                    progress(self.__progress_event('progress', counts, start, len(file_paths), total_bytes))
+                    last = time.time()
+
+        if progress is None:
+            return None
+        event = self.__progress_event('progress', counts, start, len(file_paths), total_bytes)
+        progress(event)
+        return event
+
+    def __progress_event(self, event, counts, start, total_files, total_bytes):
+        """ Method which creates progress event (dictionary described in progress module)
+
+            Args:
+                event - name of event ('discovered' or 'progress')
+                counts - list with number of parsed files, bytes, tokens and links
+                start - time when work started
+                total_files - (int) number of files which should be parsed
+                total_bytes - (int) size of all files which should be parsed
+
+            Return:
+                Progress event
+        """
+
+        files, bytes_, tokens, links = counts
+        elapsed = time.time() - start
+        rate = lambda value: value / elapsed if elapsed > 0 else 0.0
+        return {'event': event, 'files_parsed': files, 'files_total': total_files, 'bytes': bytes_,
+                'bytes_total': total_bytes, 'tokens': tokens, 'links': links,
+                'trie_nodes': self._trie.get_nodes_count(), 'graph_nodes': len(self._graph.get_all_nodes()),
+                'elapsed': elapsed, 'files_per_second': rate(files), 'bytes_per_second': rate(bytes_),
+                'tokens_per_second': rate(tokens),
+                'eta': (total_bytes - bytes_) / rate(bytes_) if bytes_ > 0 else None}
+
+    def __update_link_scores(self, event, progress, changed=True):
+        """ Method which calculates link scores (and in-links of documents) after files are indexed, and sends
+            'finished' event (summary of whole work, with time spent on link scores) to progress callback
+
+            Args:
+                event - last progress event (returned by index_files)
+                progress - function which is called with progress events, or None
+                changed - (bool) flag which indicates if documents (and so link graph) changed, default is True
+                        (if it is False, scores are not calculated again)
+        """
+
+        start = time.time()
+        if changed:
+            with instrumentation.timer('search.link_scores'):
+                self.__calculate_link_scores()
+                self.__build_in_links()
+
+        if progress is not None:
+            link_scores_time = time.time() - start
+            progress(dict(event, event='finished', link_scores_time=link_scores_time,
+                          elapsed=event['elapsed'] + link_scores_time, eta=0.0))
+
+    def __remove_documents(self, indexes):
+        """ Method which removes documents (with given indexes) from all structures
+
+            It removes document indexes from data dictionary of every word documents contain (PostingsList of
+            every word is changed only once, for all removed documents which contain it), and removes all
+            outgoing links of documents from graph (and theirs graph nodes, if no other document links to them,
+            together with linked nodes which are not documents and are not linked by any other document).
+            Document places in file lists are kept (set to None), so indexes of other documents don't change
+            until file lists are compacted.
+
+            Args:
+                indexes - list of indexes of documents in file_list
+        """
+
+        removed = {}
+        for index in indexes:
+            for word in self._file_terms[index]:
+                removed.setdefault(word, []).append(index)
+        for word, word_indexes in removed.iteritems():
+            self._trie.get_node(word, ignore_case=False).get_data().remove_documents(word_indexes)
+
+        for index in indexes:
+            graph_node = self._file_list[index]
+            for node in graph_node.get_all_connected_nodes(where_to=Vertex.OUTGOING):
+                self._graph.disconnect_nodes(graph_node, node)
+                # node of link which is not a document exists only while some document links to it
+                if node.get_key() not in self._document_indexes and \
+                        node.get_number_of_edges(where_to=Vertex.INCOMING) == 0:
+                    self._graph.remove_node(node)
+            if graph_node.get_number_of_edges(where_to=Vertex.INCOMING) == 0:
+                self._graph.remove_node(graph_node)
+
+            del self._document_indexes[graph_node.get_key()]
+            self._file_list[index] = None
+            self._file_words_list[index] = 0
+            self._file_terms[index] = ()
+            self._file_states[index] = None
+        self._removed += len(indexes)
+        self.__index_changed()
+
+    def __compact(self):
+        """ Method which removes places of removed documents from file lists, so indexes of documents change
+
+            Documents keep their order, postings list of every word is renumbered, and words which are not
+            contained in any document anymore are removed from trie.
+        """
+
+        kept = [index for index, node in enumerate(self._file_list) if node is not None]
+        indexes = dict((index, new_index) for new_index, index in enumerate(kept))
+        # lists are changed in place, because IOAdapter holds file_list
+        for file_list in [self._file_list, self._file_words_list, self._file_terms, self._file_states]:
+            file_list[:] = [file_list[index] for index in kept]
+        # documents indexed after scores were calculated get theirs scores when scores are calculated again
+        self._link_scores = array.array('d', (self._link_scores[index] if index < len(self._link_scores) else 0.0
+                                              for index in kept))
+        self._document_indexes = dict((node.get_key(), index) for index, node in enumerate(self._file_list))
+
+        words = []
+        for word, node in self._trie.iter_words(ignore_case=False):
+            postings = node.get_data()
+            postings.renumber(indexes)
+            if len(postings) > 0:
+                words.append((word, postings))
+        if self.is_frozen():
+            self._trie = FrozenTrie(words)
+        else:
+            self._trie = Trie()
+            for word, postings in words:
+                self._trie.add_word(word, ignore_case=False).set_data(postings)
+
+        self._removed = 0
+        self.__index_changed()
+
+    def update(self, progress=None):
+        """ Method which brings index up to date with database, by re-indexing only files which changed
+
+            It walks through database and compares state (modification time and size) of every html file with
+            state saved when file was indexed. New files are added, changed files are removed and added again
+            (under new index), and files which don't exist anymore are removed from structures. When removed
+            documents take more than REMOVED_RATIO of file lists, lists are compacted (indexes of documents
+            change). Work done is proportional to number of changed files, not to size of whole database, except
+            for link scores, which are calculated again (only if any file was added or removed) before update
+            returns, so searches never wait for them. PageRank starts from ranks calculated last time, so it
+            needs only few iterations.
+
+            Args:
+                progress - function which is called with progress events of re-indexing (as in constructor),
+                        default is None
+
+            Return:
+                Tuple (number of added, number of changed, number of removed files)
+
+            Raise:
+                Exception - if index is frozen
+        """
+
+        if self.is_frozen():
+            raise Exception("Frozen index can not be updated")
+
+        start = time.time()
+        indexed = dict(self._document_indexes)
+        files, changed = [], []
+
+        for path, state in Search.__walk_files(os.path.abspath(self._root_path)):
+            index = indexed.pop(path, None)
+            if index is None:
+                files.append((path, state))
+            elif self._file_states[index] != state:
+                files.append((path, state))
+                changed.append(index)
+
+        if len(changed) > 0 or len(indexed) > 0:
+            self.__remove_documents(changed + indexed.values())
+
+        event = self.__index_files(files, progress, start)
+        if self._removed > Search.REMOVED_RATIO * len(self._file_list):
+            self.__compact()
+        self.__update_link_scores(event, progress, len(files) > 0 or len(indexed) > 0)
+
+        return len(files) - len(changed), len(changed), len(indexed)
+
+    def __calculate_link_scores(self):
+        """ Method which calculates link score of every document, used as link part of page priority
+
+            Link score is PageRank of document graph node, multiplied by number of links in graph (so that
+            sum of all scores is same as sum of numbers of links which point to documents). Scores are kept in
+            array, indexed same as file_list, so getting score of document while searching costs O(1).
+
+            PageRank starts from ranks calculated last time (if there are any), so after small update of index
+            it needs only few iterations.
+        """
+
+        ranks = self._page_ranks = self._graph.page_rank(initial=self._page_ranks)
+        links = sum(node.get_number_of_edges(where_to=Vertex.OUTGOING) for node in self._graph.get_all_nodes())
+        self._link_scores = array.array('d', (ranks[node.get_key()] * links if node is not None else 0.0
+                                              for node in self._file_list))
+
+    def __build_in_links(self):
+        """ Method which finds documents that link to every document (graph nodes which are not documents are
+            skipped), and keeps them in two arrays (compressed sparse row form), so in-links of document are
+            read while ranking as one slice, without walking graph
+        """
+
+        offsets, sources = array.array('l', [0]), array.array('l')
+        for node in self._file_list:
+            if node is not None:
+                for neighbour in node.get_all_connected_nodes(where_to=Vertex.INCOMING):
+                    index = self._document_indexes.get(neighbour.get_key())
+                    if index is not None:
+                        sources.append(index)
+            offsets.append(len(sources))
+        self._in_link_offsets, self._in_link_sources = offsets, sources
+
+    def __index_changed(self):
+        """ Method which drops everything calculated from index (set of all documents and cached results), it is
+            called whenever document is added or removed (link scores are calculated again when all changes are
+            done)
+        """
+
+        self._universe = None
+        self._result_cache.clear()
+        self._term_cache.clear()
+
+    def get_root_path(self):
+        """ Getter method for path to database
+
+            Return:
+                Path to database (as given when index was created)
+        """
+
+        return self._root_path
+
+    def get_cache_statistics(self):
+        """ Method which returns statistics of search results cache and word cache
+
+            Return:
+                Dictionary with 'results' and 'terms' keys, and for each of them dictionary with number of
+                cached entries, hits, misses and evictions (and number of documents in cached results)
+        """
+
+        return {'results': self._result_cache.get_statistics(), 'terms': self._term_cache.get_statistics()}
+
+    def warm_up(self, expressions):
+        """ Method which fills word cache with words from given expressions (for example from query log)
+
+            Words are looked up (and counted) in same way as when expressions are searched, so most frequent
+            words from expressions stay in cache. Expressions which can not be parsed are skipped.
+
+            Args:
+                expressions - iterable of expressions (strings)
+
+            Return:
+                Number of words in word cache
+        """
+
+        for expression in expressions:
+            try:
+                query = compiled_query.compile_query(expression)
+            except (InvalidInput, QuitRequest):
+                continue
+
+            escape_sequences = query.get_escape_sequences()
+            for element in query.operands:
+                for word in escape_sequences[element[1:]].split() \
+                        if element.startswith(PostfixParser.KEY_SIGN) else [element]:
+                    self.__search_word(word, {})
+
+        return len(self._term_cache)
+
+    def __get_universe(self):
+        """ Method which returns set of all documents which are in index (removed ones are skipped)
+
+            Set is created when first needed, and kept until index changes.
+
+            Return:
+                BitmapSet of document indexes (indexes from file_list)
+        """
+
+        if self._universe is None:
+            self._universe = BitmapSet(index for index, node in enumerate(self._file_list) if node is not None)
+        return self._universe
 
     def __handle_links(self, file_path, links):
         """ Method which turns given path and links into graph nodes, and binds them into Search graph
@@ -85,72 +662,139 @@ class Search(object):
                 self._graph.create_node(link)
             self._graph.connect_nodes(self._graph.get_node(file_path), self._graph.get_node(link))
 
-    def __handle_words(self, file_path, words):
+    def __handle_words(self, file_path, words_count, terms):
         """ Method which stores all words into trie and sets its origin with some additional data
 
-            First it appends file_path graph node to Search file_list and number of words from that path
-            into Search file_words_list. Then it adds each word into trie and sets last character additional data
-            to dictionary, in which then adds file_path (index from file_list) as a key and list of indexes
-            where word is found as a value (used later in syntax search)
+            First it appends file_path graph node to Search file_list, number of words from that path
+            into Search file_words_list and all (different) words into file_terms. Then it adds each word into
+            trie and sets last character additional data to PostingsList, in which then adds file_path (index
+            from file_list) with list of indexes where word is found (used later in syntax search)
 
             Args:
                 file_path - path to file from which are read words
-                words - list of all words from file (at given file_path)
+                words_count - number of words in file (at given file_path)
+                terms - list of tuples (small_cased word, list of indexes where word is found in file)
         """
 
+        self.__index_changed()
+        self._document_indexes[file_path] = len(self._file_list)
         self._file_list.append(self._graph[file_path])
-        self._file_words_list.append(len(words))
-        for index, word in enumerate(words):
-            # time_h = datetime.datetime.now()
-            # self._trie.has_word(word)                               # 00:12.5
-            # Utils.sum8 += datetime.datetime.now() - time_h
-            # if not self._trie.has_word(word):
-            #     time_hh = datetime.datetime.now()
-            #     self._trie.add_word(word)                           # 00:01.36
-            #     Utils.sum5 += datetime.datetime.now() - time_hh
-            #     time_hh = datetime.datetime.now()
-            #     self._trie.get_node(word).set_data({})              # 00:00.4
-            #     Utils.sum6 += datetime.datetime.now() - time_hh
-            #
-            # if self._trie.get_node(word).get_data().get(file_path) is None:
-            # time_l = datetime.datetime.now()
-            # self._trie.get_node(word).get_data()[len(self._file_list) - 1] = c[word]  # 00:13.3
-            # Utils.sum7 += datetime.datetime.now() - time_l
-
-            node = self._trie.add_word(word)
+        self._file_words_list.append(words_count)
+        self._file_terms.append(tuple(word for word, indexes in terms))
+
+        for word, indexes in terms:
+            node = self._trie.add_word(word, ignore_case=False)
             if node.get_data() is None:
-                node.set_data({})
-            try:
-                node.get_data()[len(self._file_list) - 1].append(index)
-            except KeyError:
-                node.get_data()[len(self._file_list) - 1] = [index]
+                node.set_data(PostingsList())
+            node.get_data().add(len(self._file_list) - 1, indexes)
 
     def __search_word(self, word, words):
         """ Method which finds given word in Search trie
 
+            PostingsList of word is decoded (into set of documents) only once, and result is kept in word cache,
+            which keeps most frequently searched words (bounded by number of words and number of theirs postings).
+            Term frequencies are decoded later, only if they are needed for ranking.
+
             Args:
                 word - (string) which should be looked for
                 words - (dict) dictionary in which will all results be putted
 
             Return:
-                Dictionary set as additional data for given word in trie if such word exists, or
-                empty dictionary if it doesn't
+                Term with PostingsList set as additional data for given word in trie (or empty PostingsList if
+                word doesn't exist) and its set of documents
+        """
+
+        key = word.lower()
+        term = self._term_cache.get(key)
+        if term is None:
+            node = self._trie.get_node(key, ignore_case=False)
+            postings = node.get_data() if node is not None and node.get_data() is not None else PostingsList()
+            term = Term(postings, document_set.create(postings.get_documents(), len(self._file_list)))
+            self._term_cache.put(key, term)
+
+        words[word] = term
+        return term
+
+    def __estimate(self, element, escape_sequences):
+        """ Method which estimates number of documents in which element of postfix list is found, without
+            decoding any PostingsList (used by query_planner for ordering operands)
+
+            Args:
+                element - word or syntagm key
+                escape_sequences - dictionary with syntagms which are hidden by keys
+
+            Return:
+                Number of documents which contain word, or rarest word of syntagm
+        """
+
+        words = escape_sequences[element[1:]].split() if element.startswith(PostfixParser.KEY_SIGN) else [element]
+        frequencies = []
+        for word in words:
+            node = self._trie.get_node(word)
+            frequencies.append(len(node.get_data()) if node is not None and node.get_data() is not None else 0)
+        return min(frequencies) if len(frequencies) > 0 else 0
+
+    def __search_element(self, element, words, escape_sequences):
+        """ Method which finds documents for element of postfix list (calls search_word or search_syntagm,
+            if element is not already in words dictionary)
+
+            Args:
+                element - word or syntagm key
+                words - (dict) dictionary in which will all results be putted
+                escape_sequences - dictionary with syntagms which are hidden by keys
+
+            Return:
+                Set of documents (sorted list or BitmapSet) in which element is found
+        """
+
+        if element.startswith(PostfixParser.KEY_SIGN):
+            if element not in words:
+                self.__search_syntagm(element, words, escape_sequences)
+            return sorted(words[element].keys())
+        if element in words and words[element].documents is not None:
+            return words[element].documents
+        return self.__search_word(element, words).documents
+
+    def __probe_element(self, element, words, candidates):
+        """ Method which finds which of candidate documents contain word, by probing its PostingsList for them
+            (through skip list), without decoding whole list (used by query_planner for operands of AND)
+
+            Word is probed only if it is not decoded yet (in words or word cache) and it is found in many times
+            more documents than there are candidates. Term without set of documents is put in words (so that
+            its frequencies are also probed if ranking needs few of them), nothing is put in word cache.
+
+            Args:
+                element - word or syntagm key
+                words - (dict) dictionary in which will all results be putted
+                candidates - set of documents (sorted list or BitmapSet) to which result is restricted
+
+            Return:
+                Sorted list of candidates which contain word, or None if element should be looked up instead
         """
 
-        res_node = self._trie.get_node(word).get_data() if self._trie.get_node(word) is not None else {}
-        words[word] = res_node if res_node is not None else {}
-        return res_node if res_node is not None else {}
+        if element.startswith(PostfixParser.KEY_SIGN) or element in words or element.lower() in self._term_cache:
+            return None
+        node = self._trie.get_node(element.lower(), ignore_case=False)
+        postings = node.get_data() if node is not None and node.get_data() is not None else PostingsList()
+        if len(candidates) * Search.PROBE_RATIO >= len(postings):
+            return None
+
+        words[element] = Term(postings, None)
+        return [document for document, frequency in postings.probe(document_set.to_list(candidates))]
 
     def __search_syntagm(self, key, words_, escape_sequence):
         """ Method for searching syntagms.
 
-            First it gets syntagm for search from escape_sequence dictionary, then creates list of words files
-            which contains all of those words, and then for each file (which contains all words) it goes through
-            list of word results, and checks if there is any index series, where each next word has index + 1
+            First it gets syntagm for search from escape_sequence dictionary, and PostingsList for each of its
+            words. Files which contain all of words are found by intersecting document lists (rarest word first).
+            Then positions of all words are decoded (in one pass through each PostingsList) and for each file
+            syntagm starts are found by joining sorted position lists: it starts from positions of word which
+            shows up least times in file (shifted by its place in syntagm), and keeps only those starts for which
+            every other word is found at start + its place in syntagm.
 
-            When ever found such series, number of showing up times raises by one, and current file index is
-            added to final_list dictionary (which will be returned). Also words dictionary is with key as key
-            and final_list as value.
+            Number of syntagm starts left is number of showing up times in file, and each file with at least
+            one start is added to final_list dictionary (which will be returned). Also words dictionary is filled
+            with key as key and final_list as value.
 
             Args:
                 key - escape key found (recognizes) for which there is an syntax
@@ -160,56 +804,77 @@ class Search(object):
             Return:
                 final_list (dict) which contains all files where syntagm is found as keys, and
                 how many times it shows up as value
+
+            Raise:
+                InvalidInput - if syntagm is empty
         """
 
         words = escape_sequence[key[1:]].split()
-        res_list = self.find_expression(escape_sequence[key[1:]], True)
+        if len(words) == 0:
+            raise InvalidInput("Empty syntagm")
+
+        word_list = [self.__search_word(word, words_) for word in words]
         final_list = {}
-        word_list = []
-        for word in words:
-            word_list.append(self.__search_word(word, words_))
-
-        for index, element in enumerate(res_list):
-            indexes = {}
-            for index2, word_res_list in enumerate(word_list):
-                try:
-                    indexes[index2] = word_list[index2][element]
-                except KeyError:
-                    indexes[index2] = []
-            add_const, show_up = 1, 0
-            bool_flag = True
-            for index2 in indexes[0]:
-                bool_flag = True
-                while add_const < len(words):
-                    if index2 + add_const in indexes[add_const]:
-                        add_const += 1
-                    else:
-                        bool_flag = False
-                        break
-                if bool_flag:
-                    show_up += 1
-            if bool_flag:
-                final_list[element] = show_up
+
+        files = None
+        for term in sorted(word_list, key=lambda term: len(term.postings)):
+            files = document_set.to_list(term.documents) if files is None \
+                else document_set.intersection(files, term.documents)
+            if len(files) == 0:
+                break
+
+        positions = [term.postings.iter_positions(files) for term in word_list]
+        for file_index in files:
+            word_positions = [next(iterator)[1] for iterator in positions]
+
+            anchor = min(range(len(words)), key=lambda place: len(word_positions[place]))
+            starts = [position - anchor for position in word_positions[anchor]]
+            for place, places in enumerate(word_positions):
+                if place == anchor:
+                    continue
+                starts = [position - place for position in
+                          document_set.intersection([start + place for start in starts], places)]
+                if len(starts) == 0:
+                    break
+
+            if len(starts) > 0:
+                final_list[file_index] = len(starts)
 
         words_[key] = final_list
         return final_list
 
-    def find_expression(self, expression, side=False):
+    def find_expression(self, expression, side=False, limit=None, timings=None, explain=False):
         """ Method which should be used (only) from outside. It finds expression and prints out results
 
-            First it creates all necessary dictionaries (which are used by other methods), and using PostfixParser
-            parses expression into postfix list. Then for each element calls either search_word or search_syntagm
-            depending on element type, and those search results sets into new postfix list, which then passes
-            to PostfixParser calculate_postfix (LIST) to get final results.
+            First it creates all necessary dictionaries (which are used by other methods), and gets compiled
+            query for expression (expression is parsed only first time it is searched). From query tree
+            query_planner creates plan, in which operands are ordered by number of documents they are found in
+            (rarest first), and evaluates it, calling either search_word or search_syntagm for each element
+            (depending on element type) when its documents are needed, to get final results.
+
+            In the end it sends those results to sort method which sorts it by priority, and prints them out.
+            If limit is given, only that many results with highest priority are sorted (and printed).
 
-            In the end it sends those results to sort method which sorts it by priority and calls printing method.
+            Results are kept in LRU cache, with canonical form of expression as key (so same expressions written
+            in different way share results), and cache is cleared whenever index changes.
+
+            If explain is True, expression is always evaluated (results cache is not used) and explanation of
+            evaluation is returned (and printed as tree of operators, if side is False) instead of results.
 
             Args:
                 expression - expression to be found
                 side - (bool) flag which indicates if results should be printed or just returned
+                limit - (int) number of results with highest priority which should be found, default is None
+                        (all results are sorted)
+                timings - (dict) dictionary which will be filled with time (in seconds) spent in each stage of
+                        search ('parse', 'lookup', 'evaluate' and 'rank', 'cached' is True if results were
+                        found in results cache), default is None (time is not measured)
+                explain - (bool) flag which indicates if explanation of evaluation should be returned, default
+                        is False
 
             Return:
-                final result list (passed to sort method if side is False)
+                final result list if side is True and limit is not given, otherwise sorted list of results
+                (or explanation created by explain_query method, if explain is True)
 
             Raise:
                 Nothing by it self, but other methods called from here can raise:
@@ -217,116 +882,569 @@ class Search(object):
                 QuitRequested - if QUIT exception found
         """
 
-        escape_sequences, words = {}, {}
-        postfix_list = PostfixParser.convert_postfix(expression, escape_sequences)
-        side_list = []
+        if timings is None and instrumentation.ENABLED:
+            timings = {}
+        start = time.time()
+        query = compiled_query.compile_query(expression)
+        if timings is not None:
+            timings.clear()
+            timings['parse'] = time.time() - start
+
+        if explain:
+            parse = time.time() - start
+            explanation = self.__explain_query(expression, query, not side or limit is not None, limit)
+            explanation['stages']['parse'] = parse
+            explanation['time'] += parse
+            if not side:
+                self._io.print_explanation(explanation)
+            return explanation
+
+        final_list, priority_list = self.__find_query(query, {}, not side or limit is not None, limit, timings)
+        if instrumentation.ENABLED:
+            Search.__record_timings(timings, 1)
+
+        if not side:
+            self._io.print_results(final_list, priority_list)
+        return list(final_list)
+
+    def find_expressions(self, expressions, limit=None, timings=None):
+        """ Method for searching many expressions at once (batch search), nothing is printed out
+
+            All expressions are compiled first, and distinct operands of expressions which are not in results
+            cache are collected (words and syntagms are compared by theirs small_cased words). Operands which
+            show up in more than one expression are found only once, before any expression is evaluated, and
+            every plan is evaluated against those shared results (they are kept for whole batch, so they are not
+            found again even if they are dropped from word cache). Other operands are looked up lazily by plan,
+            same as in find_expression. Same expressions written in different way are evaluated only once,
+            through results cache.
+
+            Time spent on finding shared operand is added to lookup stage of first expression which contains it.
+
+            Args:
+                expressions - iterable of expressions to be found
+                limit - (int) number of results with highest priority which should be found for each expression,
+                        default is None (all results are sorted)
+                timings - (dict) dictionary which will be filled with time (in seconds) spent in each stage of
+                        search for all expressions together ('parse', 'lookup', 'evaluate' and 'rank', 'cached'
+                        is number of expressions whose results were found in results cache), default is None
+                        (time is not measured)
+
+            Return:
+                List with dictionary for every expression (in same order), with keys 'expression',
+                'results' (list of tuples (file path, priority) sorted by priority), 'error' (None, or
+                message if expression can not be searched) and 'timings' (time spent in each stage of search
+                of that expression, same as timings of find_expression)
+        """
+
+        if timings is None and instrumentation.ENABLED:
+            timings = {}
+        if timings is not None:
+            timings.clear()
+            timings.update({'parse': 0.0, 'lookup': 0.0, 'evaluate': 0.0, 'rank': 0.0, 'cached': 0})
+
+        results, queries = [], []
+        for expression in expressions:
+            result = {'expression': expression, 'results': [], 'error': None,
+                      'timings': {'parse': 0.0, 'lookup': 0.0, 'evaluate': 0.0, 'rank': 0.0, 'cached': False}}
+            try:
+                start = time.time()
+                queries.append((result, compiled_query.compile_query(expression)))
+                result['timings']['parse'] = time.time() - start
+            except (InvalidInput, QuitRequest) as exception:
+                result['error'] = str(exception) or exception.__class__.__name__
+            results.append(result)
+
+        shared = self.__find_shared_operands(queries, limit)
+        for result, query in queries:
+            words = {}
+            for element in query.operands:
+                key = Search.__operand_key(query, element)
+                if key in shared:
+                    words[element] = shared[key]
+            try:
+                final_list, priority_list = self.__find_query(query, words, True, limit, result['timings'])
+                result['results'] = [(self._file_list[index].get_key(), priority_list[index])
+                                     for index in final_list]
+            except (InvalidInput, QuitRequest) as exception:
+                result['error'] = str(exception) or exception.__class__.__name__
+
+        if timings is not None:
+            for result in results:
+                for stage, seconds in result['timings'].items():
+                    timings[stage] += seconds
+
+        if instrumentation.ENABLED:
+            Search.__record_timings(timings, len(results))
+        return results
+
+    def __find_shared_operands(self, queries, limit):
+        """ Method which finds (only once) every operand which shows up in more than one of given queries
+            (queries whose results are in results cache, and repeated queries, are not counted)
+
+            Args:
+                queries - list of tuples (result dictionary created by find_expressions, CompiledQuery), time
+                        spent on finding operand is added to lookup stage in 'timings' of first result which
+                        contains it
+                limit - (int) number of results with highest priority which should be found for each query
+
+            Return:
+                Dictionary operand key (see operand_key) -> search result (Term for word, dictionary file ->
+                number of showing up times for syntagm)
+        """
+
+        counts, searched = {}, set()
+        for result, query in queries:
+            key = (query.canonical_form, True, limit)
+            if key in searched or key in self._result_cache:
+                continue
+            searched.add(key)
+            for operand in set(Search.__operand_key(query, element) for element in query.operands):
+                counts[operand] = counts.get(operand, 0) + 1
+
+        shared = {}
+        for result, query in queries:
+            escape_sequences = query.get_escape_sequences()
+            for element in query.operands:
+                key = Search.__operand_key(query, element)
+                if counts.get(key, 0) > 1 and key not in shared and len(key) > 0:
+                    start, words = time.time(), {}
+                    self.__search_element(element, words, escape_sequences)
+                    shared[key] = words[element]
+                    result['timings']['lookup'] += time.time() - start
+        return shared
+
+    @staticmethod
+    def __operand_key(query, element):
+        """ Static method which returns key by which same operands of different queries are recognized
+
+            Args:
+                query - (CompiledQuery) query which contains element
+                element - word or syntagm key from query operands
+
+            Return:
+                Small cased word, or tuple of small cased words of syntagm
+        """
+
+        if element.startswith(PostfixParser.KEY_SIGN):
+            return tuple(query.get_escape_sequences()[element[1:]].lower().split())
+        return element.lower()
+
+    def __find_query(self, query, words, ranked, limit, timings=None):
+        """ Method which finds (and sorts) documents for compiled query, or takes them from results cache
+
+            Operands are looked up lazily (when plan evaluation or ranking needs them), so time of every lookup
+            is measured by itself, and it is not counted in evaluate or rank stage.
+
+            Args:
+                query - (CompiledQuery) query which should be found
+                words - (dict) dictionary in which will all results be putted (it can already contain some)
+                ranked - (bool) flag which indicates if results should be sorted by priority
+                limit - (int) number of results with highest priority which should be found, None for all
+                timings - (dict) dictionary to which time spent in lookup, evaluate and rank stages is added
+                        ('cached' is set to True if results were found in results cache), default is None
+                        (time is not measured)
+
+            Return:
+                Tuple (list of results, dictionary with priority of each result, empty if results are not ranked)
+        """
+
+        key = (query.canonical_form, ranked, limit)
+        result = self._result_cache.get(key)
+        cached, stages = result is not None, {'lookup': 0.0, 'evaluate': 0.0, 'rank': 0.0}
+
+        if not cached:
+            escape_sequences = query.get_escape_sequences()
+
+            def lookup(element):
+                begin = time.time()
+                documents = self.__search_element(element, words, escape_sequences)
+                stages['lookup'] += time.time() - begin
+                return documents
+
+            def probe(element, candidates):
+                begin = time.time()
+                documents = self.__probe_element(element, words, candidates)
+                stages['lookup'] += time.time() - begin
+                return documents
+
+            start = time.time()
+            plan = query.create_plan(lambda element: self.__estimate(element, escape_sequences), len(self._file_list))
+            final_list = document_set.to_list(query_planner.evaluate_plan(plan, lookup, self.__get_universe(),
+                                                                          probe=probe))
+            stages['evaluate'] = time.time() - start - stages['lookup']
+
+            if not ranked or len(final_list) == 0:
+                result = final_list, {}
+            else:
+                # elements skipped by plan evaluation are still needed for priority
+                for element in query.operands:
+                    if element not in words:
+                        lookup(element)
+                start = time.time()
+                result = self.__sort_result(final_list, query, words, limit)
+                stages['rank'] = time.time() - start
+            self._result_cache.put(key, result)
+
+        if timings is not None:
+            timings['cached'] = cached
+            for stage, seconds in stages.items():
+                timings[stage] = timings.get(stage, 0.0) + seconds
+        return result
+
+    def __explain_query(self, expression, query, ranked, limit):
+        """ Method which evaluates compiled query (without results cache) and explains how it was evaluated
 
-        for el in postfix_list:
-            side_list.append(el)
+            Args:
+                expression - searched expression
+                query - (CompiledQuery) query which should be evaluated
+                ranked - (bool) flag which indicates if results should be sorted by priority
+                limit - (int) number of results with highest priority which should be found, None for all
 
-        for index, element in enumerate(side_list):
-            if element not in PostfixParser.OPERATORS.keys():
-                if element.startswith(PostfixParser.KEY_SIGN):
-                    side_list[index] = self.__search_syntagm(element, words, escape_sequences).keys()
-                else:
-                    side_list[index] = self.__search_word(element, words).keys()
+            Return:
+                Dictionary with 'expression', 'results' (list of results, sorted if ranked), 'plan' (explained
+                tree, created by query_planner explain_plan, where every operand also has 'postings_decoded',
+                number of postings decoded to find it, 0 if it was found in cache or probed, and 'probed', number
+                of candidates for which it was probed, if it was), 'ranking' (number of
+                'candidates', number of ranked files and files which link to them, time spent on theirs word
+                priorities, postings decoded for operands skipped by plan and whole ranking 'time'),
+                'priorities' (priority of each ranked result), 'stages' (time spent in 'lookup', 'evaluate'
+                and 'rank'), 'escape_sequences' (syntagms hidden by keys) and total 'time' (in seconds)
+        """
 
-        final_list = PostfixParser.calculate_postfix_list(side_list, range(len(self._file_list)))
+        start, words, escape_sequences = time.time(), {}, query.get_escape_sequences()
+        decoded, probed = {}, {}
+
+        def lookup(element):
+            terms = escape_sequences[element[1:]].split() if element.startswith(PostfixParser.KEY_SIGN) \
+                else [element]
+            new_terms = dict((term.lower(), term) for term in terms
+                             if term.lower() not in self._term_cache and term not in words)
+            documents = self.__search_element(element, words, escape_sequences)
+            decoded[element] = sum(len(words[term].postings) for term in new_terms.values())
+            return documents
+
+        def probe(element, candidates):
+            documents = self.__probe_element(element, words, candidates)
+            if documents is not None:
+                probed[element] = len(candidates)
+            return documents
+
+        def annotate(element):
+            annotation = {'postings_decoded': decoded.pop(element, 0)}
+            if element in probed:
+                annotation['probed'] = probed.pop(element)
+            return annotation
+
+        plan = query.create_plan(lambda element: self.__estimate(element, escape_sequences), len(self._file_list))
+        documents, explained = query_planner.explain_plan(
+            plan, lookup, self.__get_universe(), lambda element: self.__estimate(element, escape_sequences),
+            annotate, probe)
+        final_list = document_set.to_list(documents)
+
+        lookup_time = 0.0
+        stack = [explained]
+        while stack:
+            node = stack.pop()
+            if node['operator'] == 'TERM':
+                lookup_time += node['time']
+            stack.extend(node.get('children', []))
+
+        middle = time.time()
+        profile = {'candidates': len(final_list), 'documents': 0, 'in_links': 0, 'own_terms': 0.0,
+                   'neighbours': 0.0, 'vectorized': False}
+        priority_list = {}
+        if ranked and len(final_list) > 0:
+            for element in query.operands:
+                if element not in words:
+                    lookup(element)
+            final_list, priority_list = self.__sort_result(final_list, query, words, limit, profile)
+        profile['time'] = time.time() - middle
+        profile['postings_decoded'] = sum(decoded.values())
+
+        return {'expression': expression, 'results': list(final_list), 'priorities': priority_list,
+                'plan': explained, 'ranking': profile, 'escape_sequences': escape_sequences,
+                'stages': {'lookup': lookup_time, 'evaluate': middle - start - lookup_time,
+                           'rank': profile['time']},
+                'time': time.time() - start}
 
-        if side:
-            return final_list
+    @staticmethod
+    def __record_timings(timings, queries):
+        """ Static method which adds time spent in each stage of search to instrumentation timers
+
+            Args:
+                timings - (dict) dictionary with time (in seconds) spent in each stage
+                queries - (int) number of searched expressions
+        """
 
-        return self.__sort_result(final_list, postfix_list, words)
+        instrumentation.count('search.queries', queries)
+        if timings.get('cached'):
+            instrumentation.count('search.cached_results', int(timings['cached']))
+        for stage in ['parse', 'lookup', 'evaluate', 'rank']:
+            if stage in timings:
+                instrumentation.add_time('search.' + stage, timings[stage])
 
-    def __sort_result(self, final_list, postfix_list, words):
-        """ Sorting method, sorts list of results, and sends it to printing method, so it can be printed out.
+    def __sort_result(self, final_list, query, words, limit=None, profile=None):
+        """ Sorting method, sorts list of results, so it can be printed out.
 
             It calls method calculate_page_priority which calculates priority for each one file (path) from
-            given final_list, and postfix_list, and then, sorts final list using those values as comparison
+            given final_list, and query, and then, sorts final list using those values as comparison
             parameters. (It uses built in sort method)
 
-            In the end it calls IOAdapter method for printing out results.
+            If limit is given, only that many files with highest priority are found (by select_top method),
+            instead of sorting all of them.
 
             Args:
                 final_list - list get by find_expression method, which contains list of all files which
                         fit in search request
-                postfix_list - token list in postfix order, used in calculate_page_priority
+                query - (CompiledQuery) searched query, used in calculate_page_priority
                 words -  list of all words and syntagms search results, so that when calculating priorities
                         it doesn't have to search them again
+                limit - (int) number of files with highest priority which should be kept, None for all files
+                profile - (dict) dictionary to which cost of ranking is added (see calculate_priorities), default
+                        is None (cost is not measured)
+
+            Return:
+                Tuple (sorted list of results, dictionary with priority of each result)
         """
 
-        priority_list = self.__calculate_page_priority(final_list, postfix_list, words)
-        final_list.sort(key=lambda item: priority_list[item], reverse=True)
-        self._io.print_results(final_list, priority_list)
+        if limit is None:
+            priority_list = self.__calculate_page_priority(final_list, query, words, profile)
+            final_list = sorted(final_list, key=lambda item: priority_list[item], reverse=True)
+        else:
+            final_list, priority_list = self.__select_top(final_list, query, words, limit, profile)
+
+        return final_list, priority_list
+
+    def __select_top(self, final_list, query, words, limit, profile=None):
+        """ Method which finds limit files with highest priority, without calculating priority of every file
+
+            Upper bound of priority is calculated for every file from static data: upper bound of word priority
+            (highest word priority which any file can have, calculated by query in BOUND mode from highest term
+            frequency of every word, and for query without NOT also number of words in file multiplied by query
+            word_weight) of file and of files which link to it, and file link score. Files are taken in order of
+            decreasing upper bound, in blocks (first block has limit files, and every next one is two times
+            bigger), priorities of whole block are calculated at once (by calculate_priorities, word priorities
+            of files are kept between blocks, as many files link to same files), and limit files with highest
+            priority are kept in heap. When upper bound of next file is lower than lowest priority in
+            full heap, no other file can get into it and search stops.
+
+            Order of files with same priority is same as in full sort (file with lower index first).
+
+            Args:
+                final_list - list of all files which fit search result
+                query - (CompiledQuery) searched query
+                words - dictionary which contains all search results for all words
+                limit - (int) number of files with highest priority which should be found
+                profile - (dict) dictionary to which cost of ranking is added, default is None
 
-    def __calculate_page_priority(self, final_list, postfix_list, words):
+            Return:
+                Tuple (list of files sorted by priority, dictionary with priority of each of those files)
+        """
+
+        if limit <= 0 or len(final_list) == 0:
+            return [], {}
+
+        frequencies = self.__get_term_frequencies(query, words)
+        bounds = [(0, frequency.get_max_frequency() if isinstance(frequency, Term) else
+                   max(frequency.itervalues()) if len(frequency) > 0 else 0) for frequency in frequencies]
+        whole = (0, max(self._file_words_list) if query.has_not else 0)
+        word_bound = max(query.calculate(bounds, whole, PostfixParser.BOUND)[1], 0)
+        if query.has_not:
+            bound_of = lambda index: word_bound
+        else:
+            bound_of = lambda index: min(word_bound, query.word_weight * self._file_words_list[index])
+
+        candidates = [(-(bound_of(index) + 0.4 * sum(bound_of(neighbour) for neighbour in self.__get_in_links(index))
+                         + 0.7 * self._link_scores[index]), index) for index in final_list]
+        heapq.heapify(candidates)
+
+        top, size, scores = [], limit, {}
+        while candidates:
+            if len(top) == limit and -candidates[0][0] < top[0][0]:
+                break
+
+            block = [heapq.heappop(candidates)[1] for _ in xrange(min(size, len(candidates)))]
+            for index, priority in self.__calculate_priorities(block, query, frequencies, profile,
+                                                               scores).iteritems():
+                item = (priority, -index)
+                if len(top) < limit:
+                    heapq.heappush(top, item)
+                elif item > top[0]:
+                    heapq.heapreplace(top, item)
+            size *= 2
+
+        top.sort(reverse=True)
+        return [-index for priority, index in top], dict((-index, priority) for priority, index in top)
+
+    def __calculate_page_priority(self, final_list, query, words, profile=None):
         """ Method which calculates each element from final_list summed priority
 
-            It calculates page priority based on three parameters, word count in given file, number of links
-            which points to given file, and word count in those links. It uses 1 : 0.7 : 0.4 ratio.
+            It calculates page priority based on three parameters, word count in given file, link score of given
+            file (its PageRank, calculated when index is built) and word count in files which link to given file.
+            It uses 1 : 0.7 : 0.4 ratio.
 
-            It uses calculate_word_priority method to get word count (which follows logic in expression)
+            Term frequencies of all words (and syntagms) from expression are read from search results only once,
+            and priorities of all files are calculated at once (by calculate_priorities).
 
             Args:
                 final_list - list of all files which fit search result
-                postfix_list - token list in postfix order (needed for calculate_word_count)
+                query - (CompiledQuery) searched query (needed for calculate_word_count)
                 words - dictionary which contains all search results for all words so that word count
                         doesn't have to be calculated again
+                profile - (dict) dictionary to which cost of ranking is added, default is None
 
             Return:
                 Dictionary whit all files from final_list as keys and theirs priority as values
         """
 
-        priority_list = {}
+        return self.__calculate_priorities(final_list, query, self.__get_term_frequencies(query, words), profile)
 
-        for index in final_list:
-            given_file, number_of_links, other_files = 0, 0, 0
+    def __calculate_priorities(self, documents, query, frequencies, profile=None, scores=None):
+        """ Method which calculates priority of given files (word count, link score and word count in files
+            which link to it, with 1 : 0.7 : 0.4 ratio)
 
-            given_file = self.__calculate_word_priority(postfix_list, self._file_list[index], words)
+            Word priority of given files and files which link to them is calculated at once, for all of them (by
+            calculate_word_priorities), so it costs as much as number of theirs term frequencies, and not number of
+            files multiplied by number of query operands (words which were only probed are probed for those files).
+            Files which link to given file are read from in-links found when index was built (slice of
+            in_link_sources array), graph is not walked while ranking.
 
-            number_of_links = self._file_list[index].get_number_of_edges(where_to=Vertex.INCOMING)
+            If numpy is installed and there are enough files, priorities are calculated by vector_scorer module
+            (if scores are given, only word priorities of files which are not in scores are calculated by it).
 
-            for node in self._file_list[index].get_all_connected_nodes(where_to=Vertex.INCOMING):
-                other_files += self.__calculate_word_priority(postfix_list, node, words)
+            If profile is given, number of ranked files ('documents') and files which link to them
+            ('in_links') is counted in it, with time spent on word priorities ('own_terms') and on summing word
+            priorities of files which link to ranked files ('neighbours').
+
+            Args:
+                documents - list of indexes of files (without duplicates)
+                query - (CompiledQuery) searched query
+                frequencies - list created by get_term_frequencies method
+                profile - (dict) dictionary to which cost of ranking is added, default is None
+                scores - (dict) dictionary with already calculated word priorities (file index -> priority), to
+                        which calculated ones are added, default is None (all are calculated)
+
+            Return:
+                Dictionary with all given files as keys and theirs priority as values
+        """
 
-            priority_list[index] = given_file + 0.7 * number_of_links + 0.4 * other_files
+        if profile is not None:
+            offsets = self._in_link_offsets
+            profile['documents'] = profile.get('documents', 0) + len(documents)
+            profile['in_links'] = profile.get('in_links', 0) + sum(offsets[index + 1] - offsets[index]
+                                                                   for index in documents)
+
+        probed = any(isinstance(frequency, Term) and frequency.probes(len(documents)) for frequency in frequencies)
+        if scores is None and not probed and vector_scorer.AVAILABLE and len(documents) >= vector_scorer.MIN_DOCUMENTS:
+            if profile is not None:
+                profile['vectorized'] = True
+            frequencies = [Search.__frequencies_of(frequency) for frequency in frequencies]
+            return vector_scorer.calculate_priorities(documents, query.postfix_list,
+                                                      dict(zip(query.operands, frequencies)), self._file_words_list,
+                                                      self._link_scores, self._in_link_offsets,
+                                                      self._in_link_sources)
+
+        start = time.time()
+        scores = scores if scores is not None else {}
+        in_links = [self.__get_in_links(index) for index in documents]
+        needed = set(documents)
+        for sources in in_links:
+            needed.update(sources)
+        needed = [index for index in needed if index not in scores]
+        if profile is not None and vector_scorer.AVAILABLE and len(needed) >= vector_scorer.MIN_DOCUMENTS:
+            profile['vectorized'] = True
+        calculated = self.__calculate_word_priorities(query, frequencies, needed)
+        for index in needed:
+            scores[index] = calculated.get(index, 0)
+
+        middle = time.time()
+        priority_list = {}
+        for index, sources in zip(documents, in_links):
+            other_files = sum(scores[neighbour] for neighbour in sources)
+            priority_list[index] = scores[index] + 0.7 * self._link_scores[index] + 0.4 * other_files
 
+        if profile is not None:
+            profile['own_terms'] = profile.get('own_terms', 0) + middle - start
+            profile['neighbours'] = profile.get('neighbours', 0) + time.time() - middle
         return priority_list
 
-    def __calculate_word_priority(self, postfix_list, graph_node, words):
-        """ Method for calculating word count priority part, following expression logic
+    def __get_in_links(self, index):
+        """ Method which returns indexes of all files (which are in index) that link to given file (slice of
+            in-links found by build_in_links)
+
+            Args:
+                index - index of file in file_list
+
+            Return:
+                Array of file indexes
+        """
+
+        return self._in_link_sources[self._in_link_offsets[index]:self._in_link_offsets[index + 1]]
+
+    @staticmethod
+    def __get_term_frequencies(query, words):
+        """ Static method which collects term frequencies of every word (and syntagm) from query (Term of word, whose
+            frequencies are decoded or probed only when they are needed, or dictionary of syntagm)
+
+            Args:
+                query - (CompiledQuery) searched query
+                words - dictionary which contains all word search results (Term for words, and
+                        dictionary file -> number of showing up times for syntagms)
 
-            It goes through postfix_list and creates new one by changing all words with their count
-            (based on words dictionary) which is then passed to PostfixParser calculate_postfix (INT) method,
-            which then returns number (presenting current page word count priority)
+            Return:
+                List with Term or dictionary (file index -> number of word showing up times in file) for every query
+                operand (in order of query operands)
+        """
+
+        return [words[el] for el in query.operands]
+
+    @staticmethod
+    def __frequencies_of(frequency, documents=None):
+        """ Static method which returns term frequency dictionary of one operand (element of list created by
+            get_term_frequencies)
 
             Args:
-                postfix_list - token list in postfix order
-                graph_node - Graph node form Search file_list for which words should be calculated
-                words - dictionary which contains all word search results, so that it doesn't have to be calculated
-                        again
+                frequency - Term or dictionary of term frequencies
+                documents - list of indexes of files whose frequencies are needed, default is None (all)
 
             Return:
-                Number which presents word count part of priority for given node
+                Dictionary file index -> number of word showing up times in file (contains at least given files
+                which contain word)
         """
 
-        side_list = []
-        for el in postfix_list:
-            side_list.append(el)
+        return frequency.get_frequencies(documents) if isinstance(frequency, Term) else frequency
+
+    def __calculate_word_priorities(self, query, frequencies, documents):
+        """ Method for calculating word count priority part of many files at once, following expression logic
 
-        for i, el in enumerate(side_list):
-            if el not in PostfixParser.OPERATORS.keys():
-                try:
-                    if side_list[i].startswith(PostfixParser.KEY_SIGN):
-                        side_list[i] = words[self._file_list.index(graph_node)][side_list[i]]
-                    else:
-                        side_list[i] = len(words[el])
-                # KeyError - if word is in trie but doesn't show in current node (path)
-                # AttributeError - if word is not in trie at all
-                except (KeyError, AttributeError):
-                    side_list[i] = 0
-        return PostfixParser.calculate_postfix_list(side_list, self._file_words_list[self._file_list.index(graph_node)],
-                                                    PostfixParser.INT)
+            Term frequencies of every query operand are reduced to given files (by looking up every file in
+            frequencies, or every frequency in files, whichever is smaller, or by probing word which is found in
+            many times more files and whose frequencies are not decoded yet), and query is calculated for all
+            files at once (sparse INT logic of PostfixParser calculate_postfix_sparse, or vector_scorer module if
+            numpy is installed and there are enough files).
+
+            Args:
+                query - (CompiledQuery) searched query
+                frequencies - list created by get_term_frequencies method
+                documents - list of indexes of files (in Search file_list) for which words should be calculated
+
+            Return:
+                Dictionary file index -> word count part of priority (files with 0 can be missing)
+        """
+
+        frequencies = [Search.__frequencies_of(frequency, documents) for frequency in frequencies]
+        if vector_scorer.AVAILABLE and len(documents) >= vector_scorer.MIN_DOCUMENTS:
+            return vector_scorer.calculate_word_priorities(documents, query.postfix_list,
+                                                           dict(zip(query.operands, frequencies)),
+                                                           self._file_words_list)
+
+        selected = set(documents)
+        values = [dict((index, frequency[index]) for index in documents if index in frequency)
+                  if len(frequency) > len(documents) else
+                  dict((index, count) for index, count in frequency.iteritems() if index in selected)
+                  for frequency in frequencies]
+        whole = dict((index, self._file_words_list[index]) for index in documents) if query.has_not else {}
+        return query.calculate_sparse(values, whole)
 
     @staticmethod
     def print_instruction():
@@ -375,6 +1493,36 @@ class Search(object):
             Search.IOAdapter._print_break()
             print
 
+        def print_explanation(self, explanation):
+            """ Method which prints out explanation of search (tree of operators, ranking cost and results)
+
+                Args:
+                    explanation - dictionary created by Search explain_query method
+            """
+
+            escape_sequences = explanation['escape_sequences']
+            describe = lambda element: '"%s"' % escape_sequences[element[1:]] \
+                if element.startswith(PostfixParser.KEY_SIGN) else element
+
+            print
+            print "Plan izvrsavanja: " + explanation['expression']
+            Search.IOAdapter._print_break()
+            for line in query_planner.format_explain(explanation['plan'], describe):
+                print line
+            Search.IOAdapter._print_break()
+
+            ranking = explanation['ranking']
+            print "Rangiranje: %d kandidata, %d rangirano, %d ulaznih linkova" % (
+                ranking['candidates'], ranking['documents'], ranking['in_links'])
+            print "    sopstvene reci: %.3f ms, susedi: %.3f ms, ukupno: %.3f ms%s" % (
+                ranking['own_terms'] * 1000, ranking['neighbours'] * 1000, ranking['time'] * 1000,
+                ' (vektorski)' if ranking['vectorized'] else '')
+            print "Faze: " + ', '.join('%s %.3f ms' % (stage, explanation['stages'][stage] * 1000)
+                                       for stage in ['parse', 'lookup', 'evaluate', 'rank'])
+            print "Ukupno: %.3f ms" % (explanation['time'] * 1000)
+
+            self.print_results(explanation['results'], explanation['priorities'])
+
         @staticmethod
         def print_instruction():
             """ Static method which prints out instruction (hard coded) """
@@ -0,0 +1,74 @@
+"""
+    Module contains functions for writing Search index into binary snapshot file, and reading it back
+"""
+
+__author__ = 'Acko'
+
+import os
+import struct
+import cPickle
+
+
+# CONSTANTS
+MAGIC = 'SSEIDX'
+VERSION = 5
+
+# header is magic string followed by format version (little endian unsigned int)
+_HEADER = struct.Struct('<6sI')
+
+
+class SnapshotError(Exception):
+    """ Error raised if snapshot file can not be read (not a snapshot, or written with unsupported version) """
+    pass
+
+
+def write_snapshot(path, payload):
+    """ Function which writes payload into snapshot file at given path
+
+        Payload is written into temporary file next to the given path first, which is then renamed into
+        place, so that crash while writing never leaves broken snapshot behind.
+
+        Args:
+            path - path to snapshot file which should be (over)written
+            payload - (dict) with all index data which should be stored
+    """
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as snapshot:
+        snapshot.write(_HEADER.pack(MAGIC, VERSION))
+        cPickle.dump(payload, snapshot, cPickle.HIGHEST_PROTOCOL)
+
+    if os.name == 'nt' and os.path.exists(path):
+        os.remove(path)
+    os.rename(temp_path, path)
+
+
+def read_snapshot(path):
+    """ Function which reads snapshot file and returns payload stored in it
+
+        Args:
+            path - path to snapshot file
+
+        Return:
+            Payload (dict) stored in snapshot
+
+        Raise:
+            SnapshotError - if file is not a snapshot, or its version is not supported
+            IOError - if file can not be opened
+    """
+
+    with open(path, 'rb') as snapshot:
+        header = snapshot.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise SnapshotError("File is not a search index snapshot")
+
+        magic, version = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise SnapshotError("File is not a search index snapshot")
+        if version != VERSION:
+            raise SnapshotError("Unsupported snapshot version %d (expected %d)" % (version, VERSION))
+
+        try:
+            return cPickle.load(snapshot)
+        except (cPickle.UnpicklingError, EOFError, ValueError) as e:
+            raise SnapshotError("Corrupted snapshot: %s" % e)
@@ -0,0 +1,239 @@
+"""
+    Module contains vectorized calculation of page priorities, done with numpy arrays over all ranked
+    documents at once. numpy is optional, if it is not installed AVAILABLE is False and Search calculates
+    priorities in pure Python (one document at a time).
+"""
+
+__author__ = 'Acko'
+
+import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from utils.postfix_parser import PostfixParser
+
+
+# True if numpy is installed and vectorized calculation can be used
+AVAILABLE = numpy is not None
+
+# Smallest number of ranked documents for which vectorized calculation is used (for less documents
+# cost of creating arrays is bigger than cost of Python calculation)
+MIN_DOCUMENTS = 64
+
+# Array versions of PostfixParser INT_METHODS
+VECTOR_METHODS = {'&': lambda x, y: numpy.abs(x - y), '|': lambda x, y: x + y, '!': lambda x, y: y - x}
+
+
+def _term_vector(frequencies, documents):
+    """ Function which finds term frequencies of given documents (sparse vector, only documents which contain term)
+
+        If term is found in more documents than there are given documents, every given document is looked up in
+        term dictionary, otherwise every document of term is looked up in given documents (binary search).
+
+        Args:
+            frequencies - dictionary document index -> term frequency
+            documents - sorted numpy array of document indexes
+
+        Return:
+            Tuple (numpy array with places of documents which contain term in documents array, numpy array with
+            term frequency in each of them)
+    """
+
+    if len(frequencies) > len(documents):
+        counts = numpy.fromiter((frequencies.get(document, 0) for document in documents.tolist()), numpy.int64,
+                                len(documents))
+        places = numpy.flatnonzero(counts)
+        return places, counts[places]
+
+    term_documents = numpy.fromiter(frequencies.iterkeys(), numpy.int64, len(frequencies))
+    counts = numpy.fromiter(frequencies.itervalues(), numpy.int64, len(frequencies))
+    places = numpy.minimum(numpy.searchsorted(documents, term_documents), len(documents) - 1)
+    found = documents[places] == term_documents
+    return places[found], counts[found]
+
+
+def _evaluate(postfix_list, vectors, words_count):
+    """ Function which evaluates postfix list over all documents at once (INT logic of PostfixParser)
+
+        Operands are sparse vectors, result of every operator is dense vector, which next operators change in
+        place (with only places of theirs sparse operand), so query costs as much as number of found documents
+        (and one dense vector per operator whose operands are both results of other operators, or NOT).
+
+        Args:
+            postfix_list - token list in postfix order
+            vectors - dictionary word -> sparse vector (tuple returned by term_vector)
+            words_count - numpy array with number of words of every document (whole side of NOT)
+
+        Return:
+            numpy array with word priority of every document
+    """
+
+    stack = []
+    for el in postfix_list:
+        if el not in PostfixParser.OPERATORS:
+            stack.append(vectors[el])
+        elif el in PostfixParser.UNARY:
+            operand = stack.pop()
+            if isinstance(operand, tuple):
+                result = words_count.copy()
+                result[operand[0]] = VECTOR_METHODS[el](operand[1], words_count[operand[0]])
+            else:
+                result = VECTOR_METHODS[el](operand, words_count)
+            stack.append(result)
+        else:
+            second, first = stack.pop(), stack.pop()
+            # both operators are symmetric, so dense vector (result of other operator) is changed
+            if isinstance(first, tuple):
+                first, second = second, first
+            if isinstance(first, tuple):
+                first = _dense(first, len(words_count))
+            if isinstance(second, tuple):
+                first[second[0]] = VECTOR_METHODS[el](first[second[0]], second[1])
+            else:
+                first = VECTOR_METHODS[el](first, second)
+            stack.append(first)
+    return _dense(stack.pop(), len(words_count))
+
+
+def _dense(vector, size):
+    """ Function which turns sparse vector into dense one (dense vector is returned as it is)
+
+        Args:
+            vector - sparse vector (tuple returned by term_vector) or numpy array
+            size - (int) number of documents
+
+        Return:
+            numpy array
+    """
+
+    if not isinstance(vector, tuple):
+        return vector
+    dense = numpy.zeros(size, dtype=numpy.int64)
+    dense[vector[0]] = vector[1]
+    return dense
+
+
+def _as_array(values, dtype):
+    """ Function which turns sequence into numpy array (array.array is used as buffer, without copying it)
+
+        Args:
+            values - list or array.array
+            dtype - numpy type of elements of list (array.array keeps type of its elements)
+
+        Return:
+            numpy array
+    """
+
+    if isinstance(values, array.array):
+        return numpy.frombuffer(values, dtype=values.typecode) if len(values) > 0 \
+            else numpy.zeros(0, dtype=values.typecode)
+    return numpy.asarray(values, dtype=dtype)
+
+
+def _in_links(ranked, offsets, sources):
+    """ Function which reads in-links of ranked documents from compressed sparse row arrays
+
+        Args:
+            ranked - numpy array with indexes of ranked documents
+            offsets - numpy array, in-links of document i are sources[offsets[i]:offsets[i + 1]]
+            sources - numpy array with indexes of documents which link to documents
+
+        Return:
+            Tuple (numpy array with place of ranked document for every in-link, numpy array with index of
+            document which links to it)
+    """
+
+    starts, counts = offsets[ranked], offsets[ranked + 1] - offsets[ranked]
+    targets = numpy.repeat(numpy.arange(len(ranked)), counts)
+    # position of every in-link in sources: start of its document plus its place among in-links of document
+    places = numpy.arange(len(targets)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    return targets, sources[numpy.repeat(starts, counts) + places]
+
+
+def _word_priorities(documents, postfix_list, frequencies, words_count):
+    """ Function which calculates word priority of given documents
+
+        Args:
+            documents - sorted numpy array of document indexes (without duplicates)
+            postfix_list - token list in postfix order
+            frequencies - dictionary word -> (dictionary document index -> term frequency)
+            words_count - list with number of words of every document in index
+
+        Return:
+            numpy array with word priority of every given document
+    """
+
+    vectors = dict((el, _term_vector(frequencies[el], documents)) for el in set(postfix_list)
+                   if el not in PostfixParser.OPERATORS)
+    words_count = numpy.fromiter((words_count[document] for document in documents.tolist()), numpy.int64,
+                                 len(documents))
+    return _evaluate(postfix_list, vectors, words_count)
+
+
+def calculate_word_priorities(documents, postfix_list, frequencies, words_count):
+    """ Function which calculates word priority (without links) of all given documents at once
+
+        Args:
+            documents - list of document indexes (without duplicates)
+            postfix_list - token list in postfix order
+            frequencies - dictionary word -> (dictionary document index -> term frequency) for every word
+                    (and syntagm key) from postfix_list
+            words_count - list with number of words of every document in index
+
+        Return:
+            Dictionary with all given documents as keys and theirs word priority as values
+    """
+
+    if len(documents) == 0:
+        return {}
+
+    documents = numpy.unique(numpy.array(documents, dtype=numpy.int64))
+    return dict(zip(documents.tolist(), _word_priorities(documents, postfix_list, frequencies,
+                                                         words_count).tolist()))
+
+
+def calculate_priorities(final_list, postfix_list, frequencies, words_count, link_scores, in_link_offsets,
+                         in_link_sources):
+    """ Function which calculates priorities of all given documents at once
+
+        Word priority is calculated for ranked documents and all documents which link to them (term frequencies
+        are sparse vectors over those documents, see evaluate). Word priority of linking documents is summed per
+        ranked document with bincount over in-link pairs, which is product of sparse in-link matrix and word
+        priority vector.
+        Priority is calculated with same 1 : 0.7 : 0.4 ratio as in Search.
+
+        Args:
+            final_list - list of indexes of documents which should be ranked
+            postfix_list - token list in postfix order
+            frequencies - dictionary word -> (dictionary document index -> term frequency) for every word
+                    (and syntagm key) from postfix_list
+            words_count - list with number of words of every document in index
+            link_scores - list (array) with link score of every document in index
+            in_link_offsets - list (array) with offset of in-links of every document in index in in_link_sources,
+                    and number of all in-links at the end
+            in_link_sources - list (array) with indexes of documents which link to documents (compressed sparse
+                    row form of in-links, for every document in index)
+
+        Return:
+            Dictionary with all documents from final_list as keys and theirs priority as values
+    """
+
+    if len(final_list) == 0:
+        return {}
+
+    ranked = numpy.array(final_list, dtype=numpy.int64)
+    targets, sources = _in_links(ranked, _as_array(in_link_offsets, numpy.int64),
+                                 _as_array(in_link_sources, numpy.int64))
+    documents, columns = numpy.unique(numpy.concatenate((ranked, sources)), return_inverse=True)
+
+    word_priority = _word_priorities(documents, postfix_list, frequencies, words_count)
+
+    given_file = word_priority[columns[:len(ranked)]]
+    other_files = numpy.bincount(targets, weights=word_priority[columns[len(ranked):]], minlength=len(ranked)) \
+        if len(targets) > 0 else numpy.zeros(len(ranked))
+    priority = given_file + 0.7 * _as_array(link_scores, numpy.float64)[ranked] + 0.4 * other_files
+
+    return dict(zip(final_list, priority.tolist()))
@@ -0,0 +1,313 @@
+"""
+    Module contains FrozenTrie, read-only array based version of Trie, and FrozenTrieNode which is light
+    reference to one node of FrozenTrie (with same getter methods as TrieNode)
+"""
+
+__author__ = 'Acko'
+
+import array
+import collections
+
+
+class FrozenTrieNode(object):
+    """ Class which represents one node of FrozenTrie
+
+        It doesn't hold any data by itself, only reference to trie and index of node in trie arrays,
+        all getter methods read from those arrays. Instances are created when needed (by FrozenTrie methods).
+    """
+
+    __slots__ = ['_trie', '_index']
+
+    def __init__(self, trie, index):
+        """ Constructor, sets trie and node index
+
+            Args:
+                trie - (FrozenTrie) trie which node belongs to
+                index - (int) index of node inside trie arrays
+        """
+
+        self._trie = trie
+        self._index = index
+
+    def is_end(self):
+        """ Method which tells us if current node is End of sentence (word usually)
+
+            Return:
+                True if it is end, False otherwise
+        """
+
+        return self._trie._end[self._index] == 1
+
+    def get_key(self):
+        """ Getter method for key attribute of current node
+
+            Return:
+                Current node's key (String - char)
+        """
+
+        return self._trie._labels[self._index] if self._index != 0 else FrozenTrie.ROOT_KEY
+
+    def get_data(self):
+        """  Getter method for data attribute of current node
+
+            Return:
+                Current node's data (object)
+        """
+
+        return self._trie._data.get(self._index)
+
+    def has_data(self):
+        """ Method for checking if current node has some additional data stored in its data section
+
+            Return:
+                True if current node has some data stored, False otherwise
+        """
+
+        return self._trie._data.get(self._index) is not None
+
+    def get_parent(self):
+        """ Getter method for current node's parent reference
+
+            Return:
+                Current node's parent (FrozenTrieNode), or None for root node
+        """
+
+        parent = self._trie._parent[self._index]
+        return FrozenTrieNode(self._trie, parent) if parent >= 0 else None
+
+    def get_child(self, key):
+        """ Method which returns child node with given key
+
+            Args:
+                key - (String - char) of a child that should be found
+
+            Return:
+                Child with given key (FrozenTrieNode) if exists, None otherwise
+        """
+
+        child = self._trie._find_child(self._index, key)
+        return FrozenTrieNode(self._trie, child) if child >= 0 else None
+
+    def has_child(self, key):
+        """ Method which is used to check if current node has a child with given key
+
+            Args:
+                key - (String - char) that should be looked for
+
+            Return:
+                True if child with given key exists, False otherwise
+        """
+
+        return self._trie._find_child(self._index, key) >= 0
+
+    def get_child_list(self):
+        """ Method which creates dictionary of all children of current node
+
+            Return:
+                dict: key - child's key, value - child (FrozenTrieNode)
+        """
+
+        first = self._trie._first[self._index]
+        return dict((self._trie._labels[child], FrozenTrieNode(self._trie, child))
+                    for child in xrange(first, first + self._trie._count[self._index]))
+
+    def __eq__(self, other):
+        """ Two nodes are equal if they present same node of same trie """
+
+        return isinstance(other, FrozenTrieNode) and other._trie is self._trie and other._index == self._index
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((id(self._trie), self._index))
+
+    def __str__(self):
+        return self.get_key()
+
+    def __getitem__(self, item):
+        """ Getitem method (built in). Simulates dictionary behave (FrozenTrieNode[item])
+
+            Raise:
+                KeyError if child with given key doesn't exist
+        """
+
+        child = self.get_child(item)
+        if child is None:
+            raise KeyError("No such key")
+        return child
+
+
+class FrozenTrie(object):
+    """ Read-only trie which keeps all nodes in few flat arrays instead of one object per node
+
+        Nodes are stored in breadth first order, so all children of one node are next to each other (sorted
+        by key). For every node there is its key (one character of labels string), index of its first child,
+        number of children, index of parent and end flag. Data is kept only for nodes which have it.
+        Looking for child is done by searching node's part of labels string (done in C by str.find).
+
+        It is created from Trie (or from sorted list of words with their data) and can't be changed later.
+
+        USE:
+            frozen = FrozenTrie.from_trie(trie)
+            frozen.has_word(word), frozen.get_node(word).get_data(), frozen.iter_words(prefix)
+    """
+
+    ROOT_KEY = '__root__'
+
+    def __init__(self, items):
+        """ Constructor, builds arrays from sorted words
+
+            Args:
+                items - list (iterable) of tuples (word, data) sorted by word, without duplicates
+
+            Raise:
+                ValueError - if words are not sorted or there are duplicates
+        """
+
+        items = list(items)
+        for index in xrange(1, len(items)):
+            if items[index - 1][0] >= items[index][0]:
+                raise ValueError("Words must be sorted and unique")
+
+        labels = ['\0']
+        self._first = array.array('i', [0])
+        self._count = array.array('H', [0])
+        self._parent = array.array('i', [-1])
+        self._end = bytearray(1)
+        self._data = {}
+
+        # (node, first word, last word + 1, depth) - words in range all start with node's prefix
+        queue = collections.deque([(0, 0, len(items), 0)])
+        while queue:
+            node, low, high, depth = queue.popleft()
+            if low < high and len(items[low][0]) == depth:
+                self._end[node] = 1
+                if items[low][1] is not None:
+                    self._data[node] = items[low][1]
+                low += 1
+
+            self._first[node] = len(labels)
+            while low < high:
+                key = items[low][0][depth]
+                end = low + 1
+                while end < high and items[end][0][depth] == key:
+                    end += 1
+
+                queue.append((len(labels), low, end, depth + 1))
+                labels.append(key)
+                self._first.append(0)
+                self._count.append(0)
+                self._parent.append(node)
+                self._end.append(0)
+                low = end
+            self._count[node] = len(labels) - self._first[node]
+
+        self._labels = ''.join(labels)
+        self._words = len(items)
+
+    @staticmethod
+    def from_trie(trie):
+        """ Static method which creates FrozenTrie with all words (and their data) from given Trie
+
+            Args:
+                trie - (Trie) which should be frozen
+
+            Return:
+                FrozenTrie instance
+        """
+
+        return FrozenTrie((word, node.get_data()) for word, node in trie.iter_words())
+
+    def _find_child(self, node, key):
+        """ Protected method which finds index of child with given key
+
+            Args:
+                node - (int) index of parent node
+                key - (String - char) key of child
+
+            Return:
+                Index of child, or -1 if it doesn't exist
+        """
+
+        first = self._first[node]
+        return self._labels.find(key, first, first + self._count[node]) if len(key) == 1 else -1
+
+    def _find(self, word):
+        """ Protected method which finds index of node placed at last character of word
+
+            Args:
+                word - (String) which should be looked for
+
+            Return:
+                Index of node, or -1 if word is not in trie
+        """
+
+        labels, first, count = self._labels, self._first, self._count
+        node = 0
+        for letter in word:
+            start = first[node]
+            node = labels.find(letter, start, start + count[node])
+            if node < 0:
+                return -1
+        return node
+
+    def has_word(self, word, ignore_case=True):
+        """ Checks if given word is in trie or not
+
+            Args:
+                word - (String) which should be looked for in trie
+                ignore_case - (bool) flag which indicates if word should be looked for small_cased
+
+            Return:
+                True if word is in trie, False otherwise
+        """
+
+        node = self._find(word.lower() if ignore_case else word)
+        return node >= 0 and self._end[node] == 1
+
+    def get_node(self, word, ignore_case=True):
+        """ Method for getting node which is placed at last character (in word passed)
+
+            Args:
+                word - (String) which end character will be looked for in trie
+                ignore_case - (bool) flag which indicates if word should be looked for small_cased
+
+            Return:
+                FrozenTrieNode placed at last character in word passed, or None if word not found
+        """
+
+        node = self._find(word.lower() if ignore_case else word)
+        return FrozenTrieNode(self, node) if node >= 0 else None
+
+    def iter_words(self, prefix='', ignore_case=True):
+        """ Generator which walks trie and yields all words (with their end nodes) which start with given prefix
+
+            Args:
+                prefix - (String) which all yielded words should start with, default is empty string (whole trie)
+                ignore_case - (bool) flag which indicates if prefix should be looked for small_cased
+
+            Return:
+                Generator of tuples (word, FrozenTrieNode) in lexicographical order
+        """
+
+        if ignore_case:
+            prefix = prefix.lower()
+
+        start = self._find(prefix)
+        if start < 0:
+            return
+
+        stack = [(prefix, start)]
+        while stack:
+            word, node = stack.pop()
+            if self._end[node] == 1:
+                yield word, FrozenTrieNode(self, node)
+            first = self._first[node]
+            for child in xrange(first + self._count[node] - 1, first - 1, -1):
+                stack.append((word + self._labels[child], child))
+
+    def __len__(self):
+        """ Number of words in trie """
+
+        return self._words
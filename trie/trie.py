@@ -1,6 +1,6 @@
 __author__ = 'Acko'
 
-import datetime
+from utils import instrumentation
 
 
 class TrieNode(object):
@@ -197,16 +197,11 @@ class Trie(object):
         mode.
     """
 
-    current_time = datetime.timedelta()
-    is_end = datetime.timedelta()
-    has_child = datetime.timedelta()
-    ignore_case = datetime.timedelta()
-    current_change = datetime.timedelta()
-
     def __init__(self):
         """ Constructor, sets root node of tree """
 
         self._root = TrieNode('__root__')
+        self._nodes_count = 0
 
     def add_word(self, word, ignore_case=True):
         """ Method for adding new word into trie, word must be string type
@@ -226,6 +221,9 @@ class Trie(object):
             if not current.has_child(letter):
                 child = TrieNode(letter, current)
                 current.insert_child(child)
+                self._nodes_count += 1
+                if instrumentation.ENABLED:
+                    instrumentation.count('trie.nodes_created')
             current = current.get_child(letter)
 
         current.set_end()
@@ -244,32 +242,29 @@ class Trie(object):
                 True if word is in tree, False otherwise
         """
 
-        # time = datetime.datetime.now()
         current = self._root
-        # Trie.current_time += datetime.datetime.now() - time
         if ignore_case:
             word = word.lower()
 
         for letter in word:
-            # time = datetime.datetime.now()
-            # current.has_child(letter)
-            # Trie.has_child += datetime.datetime.now() - time
-            # time = datetime.datetime.now()
-            # Trie.ignore_case += datetime.datetime.now() - time
             if not current.has_child(letter):
                 return False
-            # time = datetime.datetime.now()
             current = current.get_child(letter)
-            # Trie.current_change += datetime.datetime.now() - time
 
-        # time = datetime.datetime.now()
-        # current.is_end()
-        # Trie.is_end += datetime.datetime.now() - time
         if not current.is_end():
             return False
 
         return True
 
+    def get_nodes_count(self):
+        """ Getter method for number of nodes in trie (without root node)
+
+            Return:
+                Number of TrieNodes created by add_word
+        """
+
+        return self._nodes_count
+
     def get_node(self, word, ignore_case=True):
         """ Method for getting TrieNode instance which is placed at last character (in word passed)
 
@@ -294,4 +289,34 @@ class Trie(object):
                 return None
             current = current.get_child(letter)
 
-        return current
\ No newline at end of file
+        return current
+
+    def iter_words(self, prefix='', ignore_case=True):
+        """ Generator which walks trie and yields all words (with their end nodes) which start with given prefix
+
+            Walk is done iteratively (with explicit stack) so deep tries can't hit recursion limit. Words are
+            yielded in lexicographical order of theirs keys.
+
+            Args:
+                prefix - (String) which all yielded words should start with, default is empty string (whole trie)
+                ignore_case - (bool) flag which indicates if prefix should be looked for small_cased
+                    or as entered. Default value is True
+
+            Return:
+                Generator of tuples (word, TrieNode) for every word ending node under prefix
+        """
+
+        if ignore_case:
+            prefix = prefix.lower()
+
+        start = self.get_node(prefix, ignore_case=False)
+        if start is None:
+            return
+
+        stack = [(prefix, start)]
+        while stack:
+            word, node = stack.pop()
+            if node.is_end() and node is not self._root:
+                yield word, node
+            for key in sorted(node.get_child_list().keys(), reverse=True):
+                stack.append((word + key, node.get_child(key)))
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""
+    Module contains BitmapSet, set of document indexes kept in chunks, each of them either as bitmap (one bit
+    per document) or as sorted array of documents (if there are only few documents in chunk)
+"""
+
+__author__ = 'Acko'
+
+import array
+import bisect
+
+
+# Number of bits (documents) in one chunk of bitmap
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+
+# Chunk with at most this many documents is kept as sorted array of 16 bit numbers (which then takes at most
+# as much memory as bitmap of chunk), bigger chunks are kept as bitmaps
+ARRAY_LIMIT = 4096
+
+# For every byte value, list of bits which are set in it
+_BYTE_BITS = [[bit for bit in range(8) if value >> bit & 1] for value in range(256)]
+
+
+def _int_to_bytes(number):
+    """ Function which turns non negative integer into little endian bytes
+
+        Args:
+            number - (int) non negative integer
+
+        Return:
+            bytearray with bits of given number, lowest byte first
+    """
+
+    hex_ = '%x' % number
+    if len(hex_) % 2:
+        hex_ = '0' + hex_
+    buffer_ = bytearray(hex_.decode('hex'))
+    buffer_.reverse()
+    return buffer_
+
+
+def _to_bits(lows):
+    """ Function which creates bitmap of chunk from its documents (bits are set in byte buffer, which is
+        turned into integer at once)
+
+        Args:
+            lows - iterable of low bits of document indexes
+
+        Return:
+            Integer with bit set for every given document
+    """
+
+    buffer_ = bytearray(CHUNK_SIZE >> 3)
+    for low in lows:
+        buffer_[low >> 3] |= 1 << (low & 7)
+    buffer_.reverse()
+    return int(str(buffer_).encode('hex'), 16)
+
+
+def _iter_bits(bits):
+    """ Generator which decodes documents of chunk from its bitmap
+
+        Args:
+            bits - (int) bitmap of chunk
+
+        Return:
+            Generator of low bits of document indexes, in growing order
+    """
+
+    for index, byte in enumerate(_int_to_bytes(bits)):
+        if byte:
+            for bit in _BYTE_BITS[byte]:
+                yield (index << 3) + bit
+
+
+def _select(lows, bits, present):
+    """ Function which selects documents from array container by bitmap of other container
+
+        Args:
+            lows - array of low bits of document indexes
+            bits - (int) bitmap of chunk
+            present - (bool) True if documents which are in bitmap are selected, False for those which are not
+
+        Return:
+            Container with selected documents (None if there are none)
+    """
+
+    buffer_ = _int_to_bytes(bits)
+    size = len(buffer_)
+    return _container([low for low in lows
+                       if (low >> 3 < size and buffer_[low >> 3] >> (low & 7) & 1 == 1) == present])
+
+
+def _container(lows):
+    """ Function which creates chunk container for sorted documents of chunk
+
+        Args:
+            lows - sorted list (or array) of low bits of document indexes, without duplicates
+
+        Return:
+            Array of documents if there are at most ARRAY_LIMIT of them, otherwise bitmap (None if there are
+            no documents)
+    """
+
+    if len(lows) == 0:
+        return None
+    return array.array('H', lows) if len(lows) <= ARRAY_LIMIT else _to_bits(lows)
+
+
+def _shrink(bits):
+    """ Function which turns bitmap of chunk (result of bit operation) into array, if it contains only few
+        documents
+
+        Args:
+            bits - (int) bitmap of chunk
+
+        Return:
+            Container for chunk (None if bitmap is empty)
+    """
+
+    if not bits:
+        return None
+    return array.array('H', _iter_bits(bits)) if bin(bits).count('1') <= ARRAY_LIMIT else bits
+
+
+def _and(first, second):
+    """ Function which intersects two chunk containers
+
+        Return:
+            Container with documents which are in both containers (None if there are no such documents)
+    """
+
+    if isinstance(first, array.array):
+        if isinstance(second, array.array):
+            lows = set(second)
+            return _container([low for low in first if low in lows])
+        return _select(first, second, True)
+    if isinstance(second, array.array):
+        return _and(second, first)
+    return _shrink(first & second)
+
+
+def _or(first, second):
+    """ Function which joins two chunk containers
+
+        Return:
+            Container with documents which are in any of containers
+    """
+
+    if isinstance(first, array.array) and isinstance(second, array.array):
+        return _container(sorted(set(first).union(second)))
+    first = _to_bits(first) if isinstance(first, array.array) else first
+    second = _to_bits(second) if isinstance(second, array.array) else second
+    return first | second
+
+
+def _sub(first, second):
+    """ Function which subtracts second chunk container from first one
+
+        Return:
+            Container with documents from first container which are not in second one (None if there are no
+            such documents)
+    """
+
+    if isinstance(first, array.array):
+        if isinstance(second, array.array):
+            lows = set(second)
+            return _container([low for low in first if low not in lows])
+        return _select(first, second, False)
+    if isinstance(second, array.array):
+        second = _to_bits(second)
+    return _shrink(first & ~second)
+
+
+class BitmapSet(object):
+    """ Class which represents set of document indexes split into chunks (Roaring bitmap)
+
+        Documents are grouped into chunks of CHUNK_SIZE documents (by high bits of index), and each chunk
+        which is not empty is kept either as sorted array of low bits of indexes (if it has at most ARRAY_LIMIT
+        documents) or as one Python integer, in which bit is set for every document (low bits of index) from
+        set. Intersection, union and difference of bitmaps are done with integer bit operations over whole
+        chunks at once, so theirs cost depends on number of chunks, not on number of documents in sets, and
+        sparse chunks cost only as much as theirs documents.
+
+        It is meant for big (dense) sets of documents, like results of very frequent words or NOT operator,
+        small sets are better kept as sorted lists (see document_set module).
+    """
+
+    __slots__ = ['_chunks']
+
+    def __init__(self, documents=()):
+        """ Constructor, creates set with all given documents
+
+            Args:
+                documents - iterable of (non negative) document indexes
+        """
+
+        lows = {}
+        for document in documents:
+            try:
+                lows[document >> CHUNK_BITS].append(document & CHUNK_MASK)
+            except KeyError:
+                lows[document >> CHUNK_BITS] = [document & CHUNK_MASK]
+
+        self._chunks = {}
+        for high, chunk_lows in lows.iteritems():
+            self._chunks[high] = _container(sorted(set(chunk_lows))) if len(chunk_lows) <= ARRAY_LIMIT \
+                else _shrink(_to_bits(chunk_lows))
+
+    @staticmethod
+    def _from_chunks(chunks):
+        """ Protected static method which creates bitmap from already created chunks
+
+            Args:
+                chunks - (dict) chunk index -> chunk container (without empty chunks)
+
+            Return:
+                BitmapSet instance
+        """
+
+        bitmap = BitmapSet()
+        bitmap._chunks = chunks
+        return bitmap
+
+    def __and__(self, other):
+        """ Intersection of two sets """
+
+        first, second = (self._chunks, other._chunks) if len(self._chunks) <= len(other._chunks) \
+            else (other._chunks, self._chunks)
+        chunks = {}
+        for high, container in first.iteritems():
+            if high in second:
+                container = _and(container, second[high])
+                if container is not None:
+                    chunks[high] = container
+        return BitmapSet._from_chunks(chunks)
+
+    def __or__(self, other):
+        """ Union of two sets """
+
+        chunks = dict(self._chunks)
+        for high, container in other._chunks.iteritems():
+            chunks[high] = _or(chunks[high], container) if high in chunks else container
+        return BitmapSet._from_chunks(chunks)
+
+    def __sub__(self, other):
+        """ Difference of two sets (documents from first which are not in second one) """
+
+        chunks = {}
+        for high, container in self._chunks.iteritems():
+            if high in other._chunks:
+                container = _sub(container, other._chunks[high])
+            if container is not None:
+                chunks[high] = container
+        return BitmapSet._from_chunks(chunks)
+
+    def __contains__(self, document):
+        container = self._chunks.get(document >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = document & CHUNK_MASK
+        if isinstance(container, array.array):
+            place = bisect.bisect_left(container, low)
+            return place < len(container) and container[place] == low
+        return (container >> low) & 1 == 1
+
+    def __len__(self):
+        return sum(len(container) if isinstance(container, array.array) else bin(container).count('1')
+                   for container in self._chunks.itervalues())
+
+    def __iter__(self):
+        """ Iterator through all documents in set, in growing order """
+
+        for high in sorted(self._chunks.keys()):
+            base = high << CHUNK_BITS
+            container = self._chunks[high]
+            for low in container if isinstance(container, array.array) else _iter_bits(container):
+                yield base + low
+
+    def __eq__(self, other):
+        return isinstance(other, BitmapSet) and self._chunks == other._chunks
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
@@ -0,0 +1,151 @@
+"""
+    Module contains CompiledQuery, expression parsed once into all forms which are needed for searching it,
+    and cache of compiled queries (by expression string), so same expression is never parsed twice
+"""
+
+__author__ = 'Acko'
+
+from postfix_parser import PostfixParser
+from lru_cache import LRUCache
+import query_planner
+
+
+# Maximal number of compiled queries kept in cache
+CACHE_SIZE = 4096
+
+_cache = LRUCache(CACHE_SIZE)
+
+
+def compile_query(expression):
+    """ Function which returns compiled query for given expression (from cache if expression was compiled before)
+
+        Args:
+            expression - expression which should be compiled
+
+        Return:
+            CompiledQuery instance (which should not be changed, it can be shared)
+
+        Raise:
+            InvalidInput - if expression can not be parsed
+            QuitRequest - if 'QUIT' keyword was found inside expression
+    """
+
+    query = _cache.get(expression)
+    if query is None:
+        query = CompiledQuery(expression)
+        _cache.put(expression, query)
+    return query
+
+
+def get_statistics():
+    """ Function which returns statistics of compiled queries cache
+
+        Return:
+            Dictionary with number of cached queries, hits, misses and evictions
+    """
+
+    return _cache.get_statistics()
+
+
+class CompiledQuery(object):
+    """ Class which represents parsed expression, with everything needed for searching it
+
+        It contains postfix list with syntagms (returned by PostfixParser convert_postfix), list of different
+        operands (words and syntagm keys), canonical form (used as key of search results) and tree of operations
+        (which is ordered by query_planner into plan for finding documents).
+
+        For calculating priorities, postfix list is also kept as program, in which every operand is replaced
+        by its place in operands list, so it can be calculated for list of operand values (for example term
+        frequencies in one document) without creating new postfix list.
+
+        Instances are shared by everyone who compiles same expression, so operands are kept as tuple, and
+        get_escape_sequences returns copy of dictionary.
+    """
+
+    def __init__(self, expression):
+        """ Constructor, parses expression and creates all its forms
+
+            Args:
+                expression - expression which should be compiled
+
+            Raise:
+                InvalidInput - if expression can not be parsed
+                QuitRequest - if 'QUIT' keyword was found inside expression
+        """
+
+        self._escape_sequences = {}
+        self.postfix_list = tuple(PostfixParser.convert_postfix(expression, self._escape_sequences))
+
+        places, operands, program, counted = {}, [], [], {}
+        for el in self.postfix_list:
+            if el in PostfixParser.OPERATORS:
+                program.append(el)
+                continue
+            # syntagm is found at most as many times as its first word
+            word = (self._escape_sequences[el[1:]].split() or [el])[0] if el.startswith(PostfixParser.KEY_SIGN) \
+                else el
+            counted[word.lower()] = counted.get(word.lower(), 0) + 1
+            if el not in places:
+                places[el] = len(operands)
+                operands.append(el)
+            program.append(places[el])
+
+        self.operands = tuple(operands)
+        self._program = tuple(program)
+        self.canonical_form = PostfixParser.canonical_form(self.postfix_list, self._escape_sequences)
+        self.tree = query_planner.create_tree(self.postfix_list)
+        self.has_not = PostfixParser.KEY_WORDS['NOT'] in self.postfix_list
+        # Largest number of operands which count same word. Every word of document is counted by only one term,
+        # so without NOT word priority of document is never bigger than its number of words multiplied by this
+        self.word_weight = max(counted.values()) if len(counted) > 0 else 0
+
+    def get_escape_sequences(self):
+        """ Getter for syntagms found in expression
+
+            Return:
+                New dictionary 'key' -> 'syntagm' (copy, so shared query is never changed)
+        """
+
+        return dict(self._escape_sequences)
+
+    def create_plan(self, estimate, documents_count):
+        """ Method which creates plan for finding documents (query_planner order_plan of query tree)
+
+            Args:
+                estimate - function which returns estimated number of documents for operand
+                documents_count - number of documents in whole index
+
+            Return:
+                Plan which can be evaluated by query_planner evaluate_plan
+        """
+
+        return query_planner.order_plan(self.tree, estimate, documents_count)
+
+    def calculate(self, values, whole, type_=PostfixParser.INT):
+        """ Method which calculates query for given values of operands (by PostfixParser calculate_postfix_list)
+
+            Args:
+                values - list with value of every operand (in order of operands list)
+                whole - side effect for logically unary operation (NOT)
+                type_ - (PostfixParser constant) flag which indicates which method-dictionary should be used
+
+            Return:
+                Result of calculation
+        """
+
+        return PostfixParser.calculate_postfix_list(self._program, whole, type_, values)
+
+    def calculate_sparse(self, values, whole):
+        """ Method which calculates query (INT logic) for many documents at once (by PostfixParser
+            calculate_postfix_sparse)
+
+            Args:
+                values - list with dictionary document -> value for every operand (in order of operands list)
+                whole - dictionary document -> number of words, for every document whose result is needed
+
+            Return:
+                Dictionary document -> result (which should not be changed), documents with result 0 can be
+                missing
+        """
+
+        return PostfixParser.calculate_postfix_sparse(self._program, whole, values)
@@ -0,0 +1,211 @@
+"""
+    Module contains functions for set operations (intersection, union and difference) over sets of document
+    indexes. Set can be either sorted list (operations are done in linear time by merging lists) or BitmapSet
+    (operations are done with bit operations), and any two of those can be combined.
+"""
+
+__author__ = 'Acko'
+
+import bisect
+import heapq
+import itertools
+
+from bitmap import BitmapSet
+
+
+# If one list is this many times longer than other, intersection looks up elements of shorter list
+# in longer one with binary search (galloping), instead of going through both lists
+GALLOP_RATIO = 8
+
+# Set is kept as bitmap if at least one of this many documents is in it
+BITMAP_DENSITY = 32
+
+
+def create(documents, documents_count):
+    """ Function which chooses representation for sorted list of documents, based on its density
+
+        Args:
+            documents - sorted list of document indexes
+            documents_count - number of documents in whole index
+
+        Return:
+            BitmapSet with given documents if list is dense enough, or given list otherwise
+    """
+
+    if len(documents) > 0 and len(documents) * BITMAP_DENSITY >= documents_count:
+        return BitmapSet(documents)
+    return documents
+
+
+def to_list(documents):
+    """ Function which turns set of documents (of any representation) into sorted list
+
+        Args:
+            documents - sorted list or BitmapSet of document indexes
+
+        Return:
+            Sorted list of document indexes
+    """
+
+    return documents if isinstance(documents, list) else list(documents)
+
+
+def intersection(first, second):
+    """ Function which returns all elements which are in both sets
+
+        If lists are of similar length they are merged (O(n + m)), otherwise each element of shorter list is
+        looked for in longer one by binary search which starts from last found position (O(n log m)).
+        If bitmap is intersected with list, result is list (it can't be bigger than list), made by looking up
+        each element of list in bitmap (O(n)).
+
+        Args:
+            first - sorted list (or BitmapSet) of document indexes
+            second - sorted list (or BitmapSet) of document indexes
+
+        Return:
+            Sorted list (or BitmapSet if both sets are bitmaps) of document indexes which are in both sets
+    """
+
+    if isinstance(first, BitmapSet) or isinstance(second, BitmapSet):
+        if isinstance(first, BitmapSet) and isinstance(second, BitmapSet):
+            return first & second
+        if isinstance(first, BitmapSet):
+            first, second = second, first
+        return [element for element in first if element in second]
+
+    if len(first) > len(second):
+        first, second = second, first
+
+    result = []
+    if len(first) == 0:
+        return result
+
+    if len(first) * GALLOP_RATIO < len(second):
+        low, high = 0, len(second)
+        for element in first:
+            low = bisect.bisect_left(second, element, low, high)
+            if low == high:
+                break
+            if second[low] == element:
+                result.append(element)
+        return result
+
+    i, j = 0, 0
+    len_first, len_second = len(first), len(second)
+    while i < len_first and j < len_second:
+        a, b = first[i], second[j]
+        if a == b:
+            result.append(a)
+            i += 1
+            j += 1
+        elif a < b:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def union(first, second):
+    """ Function which returns all elements which are in any of two sets (without duplicates)
+
+        Args:
+            first - sorted list (or BitmapSet) of document indexes
+            second - sorted list (or BitmapSet) of document indexes
+
+        Return:
+            Sorted list (or BitmapSet if any of sets is bitmap) of document indexes which are in at least one set
+    """
+
+    if isinstance(first, BitmapSet) or isinstance(second, BitmapSet):
+        return (first if isinstance(first, BitmapSet) else BitmapSet(first)) | \
+            (second if isinstance(second, BitmapSet) else BitmapSet(second))
+
+    result = []
+    i, j = 0, 0
+    len_first, len_second = len(first), len(second)
+    while i < len_first and j < len_second:
+        a, b = first[i], second[j]
+        if a == b:
+            result.append(a)
+            i += 1
+            j += 1
+        elif a < b:
+            result.append(a)
+            i += 1
+        else:
+            result.append(b)
+            j += 1
+
+    result.extend(first[i:])
+    result.extend(second[j:])
+    return result
+
+
+def union_all(sets):
+    """ Function which returns all elements which are in any of given sets (without duplicates)
+
+        Lists are merged all at once (k-way merge with heap, O(n log k) for n elements in k lists), instead of
+        merging two by two, which would go through elements of first lists k times. Bitmaps are joined with bit
+        operations, and if there is any bitmap, all lists are added to it.
+
+        Args:
+            sets - list of sorted lists (or BitmapSets) of document indexes
+
+        Return:
+            Sorted list (or BitmapSet if any of sets is bitmap) of document indexes which are in at least one set
+    """
+
+    bitmaps = [set_ for set_ in sets if isinstance(set_, BitmapSet)]
+    lists = [set_ for set_ in sets if not isinstance(set_, BitmapSet) and len(set_) > 0]
+
+    if len(bitmaps) > 0:
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result | bitmap
+        return result | BitmapSet(itertools.chain(*lists)) if len(lists) > 0 else result
+
+    if len(lists) <= 2:
+        return union(*lists) if len(lists) == 2 else (lists[0] if len(lists) == 1 else [])
+
+    result = []
+    last = None
+    for element in heapq.merge(*lists):
+        if element != last:
+            result.append(element)
+            last = element
+    return result
+
+
+def difference(first, second):
+    """ Function which returns all elements of first set which are not in second one
+
+        Args:
+            first - sorted list (or BitmapSet) of document indexes
+            second - sorted list (or BitmapSet) of document indexes which should be removed from first one
+
+        Return:
+            Sorted list (or BitmapSet if first set is bitmap) of document indexes from first set which are
+            not in second
+    """
+
+    if isinstance(first, BitmapSet):
+        return first - (second if isinstance(second, BitmapSet) else BitmapSet(second))
+    if isinstance(second, BitmapSet):
+        return [element for element in first if element not in second]
+
+    result = []
+    i, j = 0, 0
+    len_first, len_second = len(first), len(second)
+    while i < len_first and j < len_second:
+        a, b = first[i], second[j]
+        if a == b:
+            i += 1
+            j += 1
+        elif a < b:
+            result.append(a)
+            i += 1
+        else:
+            j += 1
+
+    result.extend(first[i:])
+    return result
@@ -0,0 +1,157 @@
+"""
+    Module contains instrumentation of search engine: named counters (files walked, bytes parsed, trie nodes
+    created...) and named timers (time spent in build and query stages), which can be enabled at runtime.
+
+    Instrumentation is disabled by default. Hot code checks ENABLED flag before counting, so while it is
+    disabled only that check is paid, and timer returns shared context manager which does nothing. Counters
+    are kept per process (counts made in worker processes of parallel parsing are not seen in parent).
+
+    USE:
+        instrumentation.enable()
+        if instrumentation.ENABLED:
+            instrumentation.count('trie.nodes_created')
+        with instrumentation.timer('search.build'):
+            ...
+        instrumentation.dump(output_file)
+"""
+
+__author__ = 'Acko'
+
+import json
+import time
+
+
+# True if instrumentation is enabled (it should not be changed directly, but by enable and disable functions)
+ENABLED = False
+
+_counters = {}
+# Timer name -> [number of measurements, total time in seconds, longest time in seconds]
+_timers = {}
+
+
+class _Timer(object):
+    """ Context manager which measures time spent in its block and adds it to timer with given name """
+
+    __slots__ = ['_name', '_start']
+
+    def __init__(self, name):
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        add_time(self._name, time.time() - self._start)
+        return False
+
+
+class _NullTimer(object):
+    """ Context manager which does nothing (returned by timer while instrumentation is disabled) """
+
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def enable():
+    """ Function which enables instrumentation (counters and timers already collected are kept) """
+
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    """ Function which disables instrumentation (counters and timers already collected are kept) """
+
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    """ Function which removes all collected counters and timers """
+
+    _counters.clear()
+    _timers.clear()
+
+
+def count(name, value=1):
+    """ Function which increases counter with given name (nothing is done if instrumentation is disabled)
+
+        Args:
+            name - name of counter
+            value - (int) value which is added to counter, default is 1
+    """
+
+    if ENABLED:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def add_time(name, seconds):
+    """ Function which adds one measurement to timer with given name (nothing is done if instrumentation is
+        disabled)
+
+        Args:
+            name - name of timer
+            seconds - (float) measured time in seconds
+    """
+
+    if ENABLED:
+        timer_ = _timers.get(name)
+        if timer_ is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            timer_[0] += 1
+            timer_[1] += seconds
+            timer_[2] = max(timer_[2], seconds)
+
+
+def timer(name):
+    """ Function which returns context manager that measures time spent in its block
+
+        Args:
+            name - name of timer to which measured time is added
+
+        Return:
+            Context manager (which does nothing if instrumentation is disabled)
+    """
+
+    return _Timer(name) if ENABLED else _NULL_TIMER
+
+
+def get_statistics():
+    """ Function which returns all collected counters and timers
+
+        Return:
+            Dictionary with 'enabled' flag, 'counters' (name -> value) and 'timers' (name -> dictionary with
+            number of measurements, total, mean and longest time in seconds)
+    """
+
+    return {'enabled': ENABLED,
+            'counters': dict(_counters),
+            'timers': dict((name, {'count': number, 'total': total, 'mean': total / number, 'max': longest})
+                           for name, (number, total, longest) in _timers.items())}
+
+
+def dump(output=None):
+    """ Function which returns all collected counters and timers as JSON (and writes it into given file)
+
+        Args:
+            output - file into which JSON is written, default is None (it is only returned)
+
+        Return:
+            JSON string with statistics (same as get_statistics)
+    """
+
+    document = json.dumps(get_statistics(), indent=2, sort_keys=True)
+    if output is not None:
+        output.write(document + '\n')
+    return document
@@ -0,0 +1,236 @@
+"""
+    Module contains LFUCache, bounded dictionary which removes least frequently used entries when it gets full
+"""
+
+__author__ = 'Acko'
+
+import collections
+
+
+# After this many uses per entry (of max_size entries), use counts of all entries are halved
+DECAY_PERIOD = 16
+
+
+class LFUCache(object):
+    """ Class which represents cache with least frequently used eviction
+
+        For every entry it counts how many times it was used, and entries are grouped by that count (each group
+        is kept in order of last use). Groups are linked in order of count (entry which is used moves to group
+        right after its own, and new entry to first group), so group with smallest count is always first one.
+        When cache is full, least recently used entry from first group is removed, so all operations are done
+        in constant time.
+
+        Use counts age: after every decay_period * max_size uses (gets which hit and puts), all of them are
+        halved, so entries which were used often long ago are not kept forever over entries which are used now
+        (halving takes time linear in number of entries, but it is done that rarely, so it costs constant time
+        per use on average).
+
+        Cache is bounded by number of entries, and optionally by summed cost of entries (same as LRUCache, cost
+        of every entry is calculated by given cost function).
+
+        It also counts hits, misses and evictions, which can be read by get_statistics method.
+
+        USE:
+            cache = LFUCache(100)
+            cache.put(key, value), cache.get(key), cache.clear()
+    """
+
+    def __init__(self, max_size, max_cost=None, cost=None, decay_period=DECAY_PERIOD):
+        """ Constructor, creates empty cache
+
+            Args:
+                max_size - (int) maximal number of entries in cache
+                max_cost - (int) maximal summed cost of all entries, default is None (not bounded)
+                cost - function which returns cost of given value, default is None (every entry costs 1)
+                decay_period - (int) number of uses per entry after which use counts are halved, default is
+                        DECAY_PERIOD
+        """
+
+        self._max_size = max_size
+        self._max_cost = max_cost
+        self._cost = cost if cost is not None else lambda value: 1
+        self._decay_uses = max(decay_period * max_size, 1)
+        self._total_cost = 0
+        # key -> (value, use count, cost)
+        self._entries = {}
+        # use count -> keys of entries with that count (in order of last use), and links between groups (use
+        # count -> next bigger and previous smaller count which has group), first group has min_count
+        self._groups = {}
+        self._next, self._previous = {}, {}
+        self._min_count = 0
+        self._uses = 0
+        self._hits, self._misses, self._evictions = 0, 0, 0
+
+    def __add_to_group(self, key, count, previous):
+        """ Private method which adds key at end of group with given count (group is created right after group
+            with previous count, if it does not exist)
+
+            Args:
+                key - key of entry
+                count - (int) use count of entry
+                previous - (int) count of group after which new group is linked, None if it is first group
+        """
+
+        if count not in self._groups:
+            self._groups[count] = collections.OrderedDict()
+            following = self._next[previous] if previous is not None else \
+                (self._min_count if len(self._groups) > 1 else None)
+            self._previous[count], self._next[count] = previous, following
+            if previous is not None:
+                self._next[previous] = count
+            else:
+                self._min_count = count
+            if following is not None:
+                self._previous[following] = count
+        self._groups[count][key] = None
+
+    def __remove_group(self, count):
+        """ Private method which removes empty group with given count (and links its neighbours)
+
+            Args:
+                count - (int) use count of group
+        """
+
+        previous, following = self._previous.pop(count), self._next.pop(count)
+        del self._groups[count]
+        if previous is not None:
+            self._next[previous] = following
+        else:
+            self._min_count = following if following is not None else 0
+        if following is not None:
+            self._previous[following] = previous
+
+    def __use(self, key):
+        """ Private method which increases use count of entry with given key and moves it to next group
+
+            Args:
+                key - key of entry (which must be in cache)
+
+            Return:
+                Value stored with given key
+        """
+
+        value, count, cost = self._entries[key]
+        self._entries[key] = value, count + 1, cost
+        self.__add_to_group(key, count + 1, count)
+        group = self._groups[count]
+        del group[key]
+        if len(group) == 0:
+            self.__remove_group(count)
+
+        self.__count_use()
+        return value
+
+    def __count_use(self):
+        """ Private method which counts use of cache, and halves all use counts after every decay_uses uses
+
+            Entries keep theirs order: groups are joined in order of count, and entries from group with smaller
+            count go first in joined group.
+        """
+
+        self._uses += 1
+        if self._uses < self._decay_uses:
+            return
+
+        self._uses = 0
+        count, groups = self._min_count, []
+        while count is not None and len(self._groups) > 0:
+            groups.append((count, self._groups[count]))
+            count = self._next[count]
+
+        self._groups, self._next, self._previous = {}, {}, {}
+        last = None
+        for count, group in groups:
+            halved = (count + 1) // 2
+            for key in group:
+                value, old_count, cost = self._entries[key]
+                self._entries[key] = value, halved, cost
+                self.__add_to_group(key, halved, last)
+            last = halved
+
+    def __evict(self):
+        """ Private method which removes least recently used entry from group with smallest use count """
+
+        group = self._groups[self._min_count]
+        removed, none = group.popitem(last=False)
+        if len(group) == 0:
+            self.__remove_group(self._min_count)
+        self._total_cost -= self._entries.pop(removed)[2]
+        self._evictions += 1
+
+    def get(self, key, default=None):
+        """ Method for getting value stored with given key (its use count is increased)
+
+            Args:
+                key - key of entry
+                default - value which is returned if there is no entry with given key
+
+            Return:
+                Value stored with given key, or default if there is no such entry
+        """
+
+        if key not in self._entries:
+            self._misses += 1
+            return default
+
+        self._hits += 1
+        return self.__use(key)
+
+    def put(self, key, value):
+        """ Method for storing value with given key
+
+            If there already is entry with given key, its value is changed and its use count is increased,
+            otherwise new entry (used once) is added, and least frequently used entries are removed while cache
+            is over its bounds. Value whose cost alone is over max_cost is not stored at all.
+
+            Args:
+                key - key of entry
+                value - value which should be stored
+        """
+
+        cost = self._cost(value)
+        if self._max_size <= 0 or (self._max_cost is not None and cost > self._max_cost):
+            return
+
+        if key in self._entries:
+            self.__use(key)
+            self._total_cost += cost - self._entries[key][2]
+            self._entries[key] = value, self._entries[key][1], cost
+        else:
+            while len(self._entries) >= self._max_size or \
+                    (self._max_cost is not None and self._total_cost + cost > self._max_cost):
+                self.__evict()
+
+            self._entries[key] = value, 1, cost
+            self.__add_to_group(key, 1, None)
+            self._total_cost += cost
+            self.__count_use()
+
+        while self._max_cost is not None and self._total_cost > self._max_cost:
+            self.__evict()
+
+    def clear(self):
+        """ Method which removes all entries from cache (statistics are kept) """
+
+        self._entries.clear()
+        self._groups.clear()
+        self._next.clear()
+        self._previous.clear()
+        self._min_count = 0
+        self._total_cost = 0
+
+    def get_statistics(self):
+        """ Method which returns cache statistics
+
+            Return:
+                Dictionary with number of entries, summed cost, hits, misses and evictions
+        """
+
+        return {'size': len(self._entries), 'cost': self._total_cost, 'hits': self._hits, 'misses': self._misses,
+                'evictions': self._evictions}
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
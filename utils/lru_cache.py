@@ -0,0 +1,117 @@
+"""
+    Module contains LRUCache, bounded dictionary which removes least recently used entries when it gets full
+"""
+
+__author__ = 'Acko'
+
+import collections
+
+
+class LRUCache(object):
+    """ Class which represents cache with least recently used eviction
+
+        Cache is bounded by number of entries, and optionally by summed cost of entries (cost of every entry
+        is calculated by given cost function, for example number of documents it holds, so that memory used
+        by cache is bounded too). When any bound is exceeded, least recently used entries are removed.
+
+        It also counts hits, misses and evictions, which can be read by get_statistics method.
+
+        USE:
+            cache = LRUCache(100)
+            cache.put(key, value), cache.get(key), cache.clear()
+    """
+
+    def __init__(self, max_size, max_cost=None, cost=None):
+        """ Constructor, creates empty cache
+
+            Args:
+                max_size - (int) maximal number of entries in cache
+                max_cost - (int) maximal summed cost of all entries, default is None (not bounded)
+                cost - function which returns cost of given value, default is None (every entry costs 1)
+        """
+
+        self._entries = collections.OrderedDict()
+        self._max_size = max_size
+        self._max_cost = max_cost
+        self._cost = cost if cost is not None else lambda value: 1
+        self._total_cost = 0
+        self._hits, self._misses, self._evictions = 0, 0, 0
+
+    def get(self, key, default=None):
+        """ Method for getting value stored with given key (entry becomes most recently used)
+
+            Args:
+                key - key of entry
+                default - value which is returned if there is no entry with given key
+
+            Return:
+                Value stored with given key, or default if there is no such entry
+        """
+
+        try:
+            value, cost = self._entries.pop(key)
+        except KeyError:
+            self._misses += 1
+            return default
+
+        self._entries[key] = value, cost
+        self._hits += 1
+        return value
+
+    def put(self, key, value):
+        """ Method for storing value with given key (as most recently used entry)
+
+            Least recently used entries are removed while cache is over its bounds. Value whose cost alone is
+            over max_cost is not stored at all.
+
+            Args:
+                key - key of entry
+                value - value which should be stored
+        """
+
+        self.remove(key)
+
+        cost = self._cost(value)
+        if self._max_size <= 0 or (self._max_cost is not None and cost > self._max_cost):
+            return
+
+        self._entries[key] = value, cost
+        self._total_cost += cost
+        while len(self._entries) > self._max_size or \
+                (self._max_cost is not None and self._total_cost > self._max_cost):
+            key, (value, cost) = self._entries.popitem(last=False)
+            self._total_cost -= cost
+            self._evictions += 1
+
+    def remove(self, key):
+        """ Method for removing entry with given key (nothing is done if there is no such entry)
+
+            Args:
+                key - key of entry
+        """
+
+        if key in self._entries:
+            value, cost = self._entries.pop(key)
+            self._total_cost -= cost
+
+    def clear(self):
+        """ Method which removes all entries from cache (statistics are kept) """
+
+        self._entries.clear()
+        self._total_cost = 0
+
+    def get_statistics(self):
+        """ Method which returns cache statistics
+
+            Return:
+                Dictionary with number of entries, summed cost, hits, misses and evictions
+        """
+
+        return {'size': len(self._entries), 'cost': self._total_cost, 'hits': self._hits, 'misses': self._misses,
+                'evictions': self._evictions}
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
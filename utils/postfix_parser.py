@@ -1,9 +1,10 @@
 __author__ = 'Acko'
 
 import re
-import itertools
 
 from stack import Stack
+from document_set import intersection, union, difference
+import instrumentation
 
 
 class QuitRequest(Exception):
@@ -25,7 +26,8 @@ class PostfixParser(object):
         checks validity, and converts it to postfix.
 
         Calculate postfix need some outside work, postfix list given to it should contain lists which should be
-        operated on, or integers (which should be operated on).
+        operated on (sorted lists or BitmapSets of document indexes), integers (which should be operated on), or
+        tuples (lowest, highest) of integers (whose range should be calculated).
 
         Use:
             postfix_list = PostfixParser.convert_postfix(expression, escape_sequence) and
@@ -33,18 +35,19 @@ class PostfixParser(object):
     """
 
     # CONSTANTS
-    LIST, INT = 1, 2
+    LIST, INT, BOUND = 1, 2, 3
     KEY_SIGN = '$'
 
     # Two dictionaries with some methods (lambda functions) bound to keys of operations
-    LIST_METHODS = {'&': lambda list_a, list_b: [x for x in list_a if x in list_b],
-                    '|': lambda list_a, list_b: [value for row in itertools.izip_longest([x for x in list_a],
-                                                                                         [y for y in list_b
-                                                                                          if y not in list_a])
-                                                 if row is not None
-                                                 for value in row if value is not None],
-                    '!': lambda list_a, list_b: [x for x in list_b if x not in list_a]}
+    # (LIST methods work with sorted lists, and return sorted lists)
+    LIST_METHODS = {'&': intersection,
+                    '|': union,
+                    '!': lambda list_a, list_b: difference(list_b, list_a)}
     INT_METHODS = {'&': lambda x, y: max(x - y, y - x), '|': lambda x, y: x + y, '!': lambda x, y: y - x}
+    # BOUND methods work with tuples (lowest, highest) of possible INT values, and return range of INT result
+    BOUND_METHODS = {'&': lambda x, y: (0, max(x[1] - y[0], y[1] - x[0])),
+                     '|': lambda x, y: (x[0] + y[0], x[1] + y[1]),
+                     '!': lambda x, y: (y[0] - x[1], y[1] - x[0])}
 
     # MORE CONSTANTS (which should be changed if user-interface changes)
     QUIT_ESCAPE = 'QUIT'
@@ -188,7 +191,7 @@ class PostfixParser(object):
                 expression[tuple_[1] + add_constant + 1:] if tuple_[1] + add_constant + 1 < len(expression) \
                 else expression[:tuple_[0] + add_constant] + current_escape
 
-            add_constant = len(current_escape) - len(escape_sequence[current_escape[1:]])
+            add_constant += len(current_escape) - len(escape_sequence[current_escape[1:]])
 
             for key_word in PostfixParser.KEY_WORDS.keys():
                 escape_sequence[current_escape[1:]] = escape_sequence[current_escape[1:]].replace(key_word, '')
@@ -324,57 +327,143 @@ class PostfixParser(object):
                 raise InvalidInput("Unequal number of parenthesis")
             postfix_list.append(s.pop())
 
+        if instrumentation.ENABLED:
+            instrumentation.count('postfix_parser.expressions')
+            instrumentation.count('postfix_parser.tokens', len(postfix_list))
         return postfix_list
 
     @staticmethod
-    def calculate_postfix_list(postfix_list, whole_list, type_=LIST):
-        """ Recursion based method which calculates postfix list by going through postfix list
+    def canonical_form(postfix_list, escape_sequences):
+        """ Method which creates canonical form of postfix list, same for all expressions with same results
 
-            It goes through list and gets operators and operands which then passes to appropriate method
-            and returns result (in base case it returns operand)
+            Words are small_cased, syntagm keys are replaced with syntagms (in quotes, small_cased and with single
+            spaces), and operands of '&' and '|' are sorted, so "a AND b", "b & a" and "a b" have same form.
+            Chains of '|' are also flattened ("(a | b) | c" and "a | (b | c)"), because both results and
+            priorities (sum of word counts) of those are same. Chains of '&' are not flattened, because priority
+            of '&' (difference of word counts) depends on grouping.
 
-            Specification for this method is that it is designed to work with two kind of postfix list,
-            one containing lists (lists of search results), and one containing integers (number of words in file),
-            those two only differs in method-dictionary which is used for calculations.
+            Args:
+                postfix_list - token list in postfix order (returned by convert_postfix)
+                escape_sequences - (dict) syntagms filled by convert_postfix
+
+            Return:
+                Canonical form as nested tuples (operator, operands...), or string for expression with one word
+        """
+
+        stack = []
+        for el in postfix_list:
+            if el not in PostfixParser.OPERATORS:
+                stack.append('"%s"' % ' '.join(escape_sequences[el[1:]].lower().split())
+                             if el.startswith(PostfixParser.KEY_SIGN) else el.lower())
+            elif el in PostfixParser.UNARY:
+                stack.append((el, stack.pop()))
+            else:
+                second, first = stack.pop(), stack.pop()
+                operands = []
+                for operand in (first, second):
+                    if el == PostfixParser.KEY_WORDS['OR'] and isinstance(operand, tuple) and operand[0] == el:
+                        operands.extend(operand[1:])
+                    else:
+                        operands.append(operand)
+                stack.append((el,) + tuple(sorted(operands)))
+        return stack.pop()
+
+    @staticmethod
+    def calculate_postfix_list(postfix_list, whole_list, type_=LIST, values=None):
+        """ Stack based method which calculates postfix list by going through postfix list
+
+            It goes through list, puts operands on stack, and for each operator takes its operands from stack,
+            passes them to appropriate method and puts result back on stack (in the end only result is left).
+            It doesn't use recursion, so postfix list can be as long as needed.
+
+            Specification for this method is that it is designed to work with three kind of postfix list,
+            one containing lists (lists of search results), one containing integers (number of words in file),
+            and one containing ranges of integers (lowest and highest number of words in any file), those only
+            differs in method-dictionary which is used for calculations.
 
             Use of this method needs some pre-work. It needs instead of words in original postfix list,
             list of results where those words occurs, or integers representing quantity of word in one file.
-
-            NOTE: Shouldn't be passed original postfix list, because this method destroys list which gets, instead
-            should be passed some copy of list.
+            If values are given, postfix list contains places of operands in values instead (so same postfix
+            list can be calculated for many values, without creating new one each time).
 
             Args:
-                postfix_list -  token list with postfix order, which should be calculated
+                postfix_list -  token list with postfix order, which should be calculated (it is not changed)
                 whole_list - side effect for logically unary operation (NOT) which essentially need two parameters
                 type_ - (PostfixParser constant) flag which indicates which method-dictionary should be used
+                values - list with value of every operand, default is None (operands are values themselves)
         """
 
-        # base case for recursion
-        if isinstance(postfix_list[-1], list) or isinstance(postfix_list[-1], int):
-            list_ = postfix_list[-1]
-            del postfix_list[-1]
-            return list_
+        methods = PostfixParser.__get_methods(type_)
+        if instrumentation.ENABLED:
+            instrumentation.count('postfix_parser.calculations')
+        stack = []
+        for element in postfix_list:
+            if not isinstance(element, basestring):
+                stack.append(element if values is None else values[element])
+            elif element in PostfixParser.UNARY:
+                stack.append(methods[element](stack.pop(), whole_list))
+            else:
+                second = stack.pop()
+                stack.append(methods[element](stack.pop(), second))
+        return stack.pop()
 
-        # binary operators
-        if postfix_list[-1] in PostfixParser.OPERATORS and postfix_list[-1] not in PostfixParser.UNARY:
-            operator = postfix_list[-1]
-            del postfix_list[-1]
+    @staticmethod
+    def calculate_postfix_sparse(postfix_list, whole, values):
+        """ Stack based method which calculates postfix list with INT logic for many documents at once
+
+            Values are dictionaries document -> integer (document which is not in dictionary has 0), so only
+            documents in which operand is found are gone through. Result of every operator is new dictionary,
+            which is then changed in place by next operators (values themselves are never changed), so operator
+            costs as much as its operand which is not result of other operator, and cost of query grows with
+            number of found documents, not with number of documents multiplied by number of operands.
 
-            second = PostfixParser.calculate_postfix_list(postfix_list, whole_list, type_)
-            first = PostfixParser.calculate_postfix_list(postfix_list, whole_list, type_)
+            Args:
+                postfix_list - token list with postfix order, which contains places of operands in values (as in
+                        calculate_postfix_list)
+                whole - dictionary document -> number of words, for every document whose result is needed (side
+                        effect of NOT)
+                values - list with dictionary document -> integer for every operand
 
-            return PostfixParser.LIST_METHODS[operator](first, second) if type_ == PostfixParser.LIST\
-                else PostfixParser.INT_METHODS[operator](first, second)
+            Return:
+                Dictionary document -> result (it can be one of values, so it should not be changed), documents
+                with result 0 can be missing
+        """
 
-        # logically unary, physically binary..
-        if postfix_list[-1] in PostfixParser.UNARY:
-            operator = postfix_list[-1]
-            del postfix_list[-1]
+        if instrumentation.ENABLED:
+            instrumentation.count('postfix_parser.calculations')
+        stack = []
+        for element in postfix_list:
+            if not isinstance(element, basestring):
+                stack.append((values[element], False))
+            elif element in PostfixParser.UNARY:
+                operand = stack.pop()[0]
+                stack.append((dict((document, PostfixParser.INT_METHODS[element](operand.get(document, 0), count))
+                                   for document, count in whole.iteritems()), True))
+            else:
+                second, first = stack.pop(), stack.pop()
+                # both operators are symmetric, so result of other operator (or bigger operand) is changed
+                if (second[1], len(second[0])) > (first[1], len(first[0])):
+                    first, second = second, first
+                result, method = first[0] if first[1] else dict(first[0]), PostfixParser.INT_METHODS[element]
+                for document, value in second[0].iteritems():
+                    result[document] = method(result.get(document, 0), value)
+                stack.append((result, True))
+        return stack.pop()[0]
 
-            number = PostfixParser.calculate_postfix_list(postfix_list, whole_list, type_)
+    @staticmethod
+    def __get_methods(type_):
+        """ Side method which returns method-dictionary for given type of postfix list
+
+            Args:
+                type_ - (PostfixParser constant) type of postfix list
+
+            Return:
+                Method-dictionary (LIST_METHODS, INT_METHODS or BOUND_METHODS)
+        """
 
-            return PostfixParser.LIST_METHODS[operator](number, whole_list) if type_ == PostfixParser.LIST \
-                else PostfixParser.INT_METHODS[operator](number, whole_list)
+        if type_ == PostfixParser.LIST:
+            return PostfixParser.LIST_METHODS
+        return PostfixParser.INT_METHODS if type_ == PostfixParser.INT else PostfixParser.BOUND_METHODS
 
     @staticmethod
     def __check_right(element):
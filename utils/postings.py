@@ -0,0 +1,426 @@
+"""
+    Module contains PostingsList, compact (delta and variable byte encoded) list of documents in which one word
+    shows up, together with indexes (positions) of word in each document, and functions for variable byte coding
+"""
+
+__author__ = 'Acko'
+
+import array
+import bisect
+
+
+# Every this many documents, place of document in buffers is kept in skip list (used by get_positions and probe)
+SKIP_INTERVAL = 64
+
+
+def encode_number(number, buffer_):
+    """ Function which appends non negative integer to buffer in variable byte encoding
+
+        Number is written 7 bits per byte (lowest bits first), highest bit of each byte is set
+        if there are more bytes of same number.
+
+        Args:
+            number - (int) non negative integer which should be encoded
+            buffer_ - (bytearray) buffer to which bytes are appended
+    """
+
+    while number >= 0x80:
+        buffer_.append((number & 0x7F) | 0x80)
+        number >>= 7
+    buffer_.append(number)
+
+
+def decode_number(buffer_, start):
+    """ Function which decodes one number from buffer (encoded by encode_number)
+
+        Args:
+            buffer_ - (bytearray) buffer with encoded numbers
+            start - (int) index of first byte of number
+
+        Return:
+            Tuple (decoded integer, index of first byte after number)
+    """
+
+    number, shift = 0, 0
+    while True:
+        byte = buffer_[start]
+        start += 1
+        number |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return number, start
+        shift += 7
+
+
+def decode_numbers(buffer_, start=0, end=None):
+    """ Generator which decodes all numbers from given part of buffer (encoded by encode_number)
+
+        Args:
+            buffer_ - (bytearray) buffer with encoded numbers
+            start - (int) index of first byte which should be decoded
+            end - (int) index after last byte which should be decoded, default is end of buffer
+
+        Return:
+            Generator of decoded integers
+    """
+
+    number, shift = 0, 0
+    for index in xrange(start, len(buffer_) if end is None else end):
+        byte = buffer_[index]
+        number |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield number
+            number, shift = 0, 0
+
+
+class PostingsList(object):
+    """ Class which represents list of documents (their indexes) in which one word shows up, with word positions
+
+        Data is kept in two byte buffers instead of lists of integers. Documents buffer contains for each
+        document (sorted by index) difference from previous document index, number of word positions in document
+        (term frequency) and size (in bytes) of its positions block. Positions buffer contains for each document
+        block of differences between neighbour positions. All numbers are variable byte encoded.
+
+        Because documents buffer is separate, list of documents and term frequencies can be decoded without
+        touching positions, which are decoded only for documents which need them (syntagm search).
+
+        Documents must be added in growing order of index (which is natural order of indexing).
+
+        For finding positions of one document (or frequencies of few documents) without decoding whole list, skip
+        list with place in buffers of every SKIP_INTERVAL-th document is kept. It is extended while documents are
+        added, so it never has to be created by decoding whole list.
+    """
+
+    __slots__ = ['_documents', '_positions', '_length', '_last_document', '_max_frequency', '_skips']
+
+    def __init__(self):
+        """ Constructor, creates empty postings list """
+
+        self._documents = bytearray()
+        self._positions = bytearray()
+        self._length = 0
+        self._last_document = -1
+        self._max_frequency = 0
+        # tuple (array of documents, array of (start in documents buffer, previous document, start in positions
+        # buffer) triples) for every SKIP_INTERVAL-th document after first one, None while there are none
+        self._skips = None
+
+    def add(self, document, positions):
+        """ Method for adding document (with positions of word in it) at end of postings list
+
+            Args:
+                document - (int) index of document, must be bigger than index of last added document
+                positions - (list of ints) sorted positions of word inside document
+
+            Raise:
+                ValueError - if document index is not bigger than last added one, or positions list is empty
+        """
+
+        if document <= self._last_document:
+            raise ValueError("Documents must be added in growing order")
+        if len(positions) == 0:
+            raise ValueError("Document must contain at least one position")
+
+        block, previous = bytearray(), 0
+        for position in positions:
+            encode_number(position - previous, block)
+            previous = position
+        self.__append(document, len(positions), block)
+
+    def __append(self, document, frequency, block):
+        """ Private method which appends document with already encoded positions block at end of list
+
+            Args:
+                document - (int) index of document, bigger than index of last added document
+                frequency - (int) number of positions in block
+                block - (bytearray) encoded positions of word in document
+        """
+
+        if self._length > 0 and self._length % SKIP_INTERVAL == 0:
+            if self._skips is None:
+                self._skips = array.array('l'), array.array('l')
+            self._skips[0].append(document)
+            self._skips[1].extend((len(self._documents), self._last_document, len(self._positions)))
+
+        self._positions += block
+        encode_number(document - self._last_document - 1, self._documents)
+        encode_number(frequency, self._documents)
+        encode_number(len(block), self._documents)
+
+        self._last_document = document
+        self._max_frequency = max(self._max_frequency, frequency)
+        self._length += 1
+
+    def _iter_blocks(self, start=0, document=-1, offset=0):
+        """ Protected generator which decodes documents buffer
+
+            Args:
+                start - (int) index of byte in documents buffer from which decoding starts, default is 0
+                document - (int) index of document before first decoded one, default is -1
+                offset - (int) start of positions block of first decoded document, default is 0
+
+            Return:
+                Generator of tuples (document, term frequency, start of positions block, end of positions block)
+        """
+
+        numbers = decode_numbers(self._documents, start)
+        for delta in numbers:
+            document += delta + 1
+            frequency, size = next(numbers), next(numbers)
+            yield document, frequency, offset, offset + size
+            offset += size
+
+    def remove(self, document):
+        """ Method for removing document from postings list (same as remove_documents with one document)
+
+            Args:
+                document - (int) index of document which should be removed
+
+            Raise:
+                KeyError - if document is not in postings list
+        """
+
+        self.remove_documents([document])
+
+    def remove_documents(self, documents):
+        """ Method for removing many documents from postings list at once
+
+            Part of list before skip which precedes first removed document is kept as it is, and only rest of
+            list is decoded and encoded again (once, for all removed documents). Positions blocks of documents
+            which are kept are copied without being decoded.
+
+            Highest term frequency is not lowered by removing (it stays upper bound of frequencies in list).
+
+            Args:
+                documents - iterable of indexes of documents which should be removed
+
+            Raise:
+                KeyError - if any of documents is not in postings list (list is not changed then)
+        """
+
+        documents = set(documents)
+        if len(documents) == 0:
+            return
+
+        place = bisect.bisect_right(self._skips[0], min(documents)) if self._skips is not None else 0
+        start, previous, offset = self.__get_skip(place)
+        blocks = list(self._iter_blocks(start, previous, offset))
+        kept = [block for block in blocks if block[0] not in documents]
+        if len(blocks) - len(kept) != len(documents):
+            raise KeyError("Document not in postings list")
+
+        positions = self._positions[offset:]
+        del self._documents[start:]
+        del self._positions[offset:]
+        if self._skips is not None:
+            del self._skips[0][max(place - 1, 0):]
+            del self._skips[1][3 * max(place - 1, 0):]
+        self._length, self._last_document = place * SKIP_INTERVAL, previous
+        for document, frequency, begin, end in kept:
+            self.__append(document, frequency, positions[begin - offset:end - offset])
+
+    def renumber(self, documents):
+        """ Method which changes indexes of all documents in postings list (positions blocks are copied without
+            being decoded)
+
+            Args:
+                documents - dictionary old index -> new index of every document in list, new indexes must be
+                        in same order as old ones
+        """
+
+        blocks = list(self._iter_blocks())
+        positions = self._positions
+        self.__init__()
+        for document, frequency, start, end in blocks:
+            self.__append(documents[document], frequency, positions[start:end])
+
+    def get_documents(self):
+        """ Method which decodes indexes of all documents in postings list
+
+            Return:
+                Sorted list of document indexes
+        """
+
+        return [document for document, frequency, start, end in self._iter_blocks()]
+
+    def iter_frequencies(self):
+        """ Generator which decodes documents with number of word positions in each of them
+
+            Return:
+                Generator of tuples (document, term frequency) sorted by document
+        """
+
+        for document, frequency, start, end in self._iter_blocks():
+            yield document, frequency
+
+    def probe(self, documents):
+        """ Generator which finds which of given documents are in postings list, without decoding whole list
+
+            Decoding starts from nearest skip before each document (or goes on from previous document, if it is
+            in same part of list), so at most SKIP_INTERVAL documents are decoded per given document.
+
+            Args:
+                documents - sorted iterable of document indexes
+
+            Return:
+                Generator of tuples (document, term frequency) for given documents which are in postings list
+        """
+
+        skips, buffer_ = self._skips[0] if self._skips is not None else (), self._documents
+        segment, start, current, frequency = -1, 0, -1, 0
+        for document in documents:
+            if document > self._last_document:
+                break
+            place = bisect.bisect_right(skips, document)
+            if place != segment:
+                segment = place
+                start, current, offset = self.__get_skip(place)
+
+            # numbers are mostly one byte long, so they are decoded here (last document is not passed over)
+            while current < document:
+                delta = buffer_[start]
+                if delta < 0x80:
+                    start += 1
+                else:
+                    delta, start = decode_number(buffer_, start)
+                current += delta + 1
+                frequency = buffer_[start]
+                if frequency < 0x80:
+                    start += 1
+                else:
+                    frequency, start = decode_number(buffer_, start)
+                while buffer_[start] & 0x80:
+                    start += 1
+                start += 1
+
+            if current == document:
+                yield document, frequency
+
+    def get_max_frequency(self):
+        """ Method which returns biggest term frequency of word in any document of list (without decoding it)
+
+            Return:
+                Biggest number of word positions in one document, 0 if list is empty (after documents are removed,
+                it can be bigger than that, see remove_documents)
+        """
+
+        return self._max_frequency
+
+    def get_positions(self, document):
+        """ Method which decodes positions of word in given document
+
+            Args:
+                document - (int) index of document
+
+            Return:
+                Sorted list of positions of word in document
+
+            Raise:
+                KeyError - if document is not in postings list
+        """
+
+        skips = self._skips[0] if self._skips is not None else ()
+        for current, frequency, start, end in self._iter_blocks(*self.__get_skip(bisect.bisect_right(skips, document))):
+            if current == document:
+                return self.__decode_positions(start, end)
+            if current > document:
+                break
+        raise KeyError("Document not in postings list")
+
+    def __get_skip(self, place):
+        """ Private method which returns place in buffers from which decoding of part of list starts
+
+            Args:
+                place - (int) number of skips before part of list (0 for part before first skip)
+
+            Return:
+                Tuple (start in documents buffer, previous document, start in positions buffer), which can be
+                passed to _iter_blocks
+        """
+
+        if place == 0:
+            return 0, -1, 0
+        return tuple(self._skips[1][3 * place - 3:3 * place])
+
+    def iter_positions(self, documents):
+        """ Generator which decodes positions of word for each of given documents (in one pass through list)
+
+            Args:
+                documents - sorted list of document indexes, all must be in postings list
+
+            Return:
+                Generator of tuples (document, sorted list of positions) in order of given documents
+
+            Raise:
+                KeyError - if any of given documents is not in postings list
+        """
+
+        blocks = self._iter_blocks()
+        for document in documents:
+            for current, frequency, start, end in blocks:
+                if current >= document:
+                    break
+            else:
+                current = None
+
+            if current != document:
+                raise KeyError("Document not in postings list")
+            yield document, self.__decode_positions(start, end)
+
+    def __decode_positions(self, start, end):
+        """ Private method which decodes one positions block into list of positions
+
+            Args:
+                start - index of first byte of block
+                end - index after last byte of block
+
+            Return:
+                List of positions
+        """
+
+        positions, position = [], 0
+        for delta in decode_numbers(self._positions, start, end):
+            position += delta
+            positions.append(position)
+        return positions
+
+    def __iter__(self):
+        """ Iterator through all documents with theirs positions
+
+            Return:
+                Generator of tuples (document, list of positions) sorted by document
+        """
+
+        for document, frequency, start, end in self._iter_blocks():
+            yield document, self.__decode_positions(start, end)
+
+    def __len__(self):
+        """ Number of documents in postings list (document frequency) """
+
+        return self._length
+
+    def __eq__(self, other):
+        return isinstance(other, PostingsList) and self._documents == other._documents \
+            and self._positions == other._positions
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __getstate__(self):
+        """ State used for pickling (buffers and skip list are stored as strings, which pickle compactly) """
+
+        skips = None if self._skips is None else (self._skips[0].tostring(), self._skips[1].tostring())
+        return str(self._documents), str(self._positions), self._length, self._last_document, \
+            self._max_frequency, skips
+
+    def __setstate__(self, state):
+        """ Restoring state written by __getstate__ """
+
+        documents, positions, self._length, self._last_document, self._max_frequency, skips = state
+        self._documents, self._positions = bytearray(documents), bytearray(positions)
+        self._skips = None
+        if skips is not None:
+            self._skips = array.array('l'), array.array('l')
+            self._skips[0].fromstring(skips[0])
+            self._skips[1].fromstring(skips[1])
@@ -0,0 +1,429 @@
+"""
+    Module contains query planner, which turns postfix list (returned by PostfixParser) into plan (tree of
+    operations) in which operands are ordered by theirs estimated number of documents, and function which
+    evaluates plan over sets of documents.
+
+    Plan node is either operand (word or syntagm key from postfix list) or tuple:
+        ('&', positives, negatives) - documents which are in all positives and in none of negatives
+                                      (universe of documents if there are no positives)
+        ('|', children) - documents which are in any of children
+
+    Plan can also be evaluated with explain_plan, which returns tree of evaluated nodes annotated with theirs
+    cardinalities and time (used for EXPLAIN of query), and format_explain turns that tree into text.
+"""
+
+__author__ = 'Acko'
+
+import time
+
+from postfix_parser import PostfixParser
+from document_set import intersection, union_all, difference
+
+
+AND, OR, NOT = PostfixParser.KEY_WORDS['AND'], PostfixParser.KEY_WORDS['OR'], PostfixParser.KEY_WORDS['NOT']
+
+
+def _and_node(first, second):
+    """ Function which creates AND node from given nodes (NOT nodes become negatives, and AND nodes are merged)
+
+        If first node is AND node, other node is added to it (it is not copied), so chain of n AND operators
+        is merged in O(n) time.
+
+        Args:
+            first - plan node
+            second - plan node
+
+        Return:
+            AND plan node (without sorted operands)
+    """
+
+    node = first if isinstance(first, tuple) and first[0] == AND else (AND, [first], [])
+    if isinstance(second, tuple) and second[0] == AND:
+        node[1].extend(second[1])
+        node[2].extend(second[2])
+    else:
+        node[1].append(second)
+    return node
+
+
+def _not_node(child):
+    """ Function which creates node for NOT of given node (NOT of only one negative is that negative itself)
+
+        Args:
+            child - plan node
+
+        Return:
+            Plan node
+    """
+
+    if isinstance(child, tuple) and child[0] == AND and len(child[1]) == 0 and len(child[2]) == 1:
+        return child[2][0]
+    return AND, [], [child]
+
+
+def _or_node(first, second):
+    """ Function which creates OR node from given nodes (OR nodes are merged, same as in and_node)
+
+        Args:
+            first - plan node
+            second - plan node
+
+        Return:
+            OR plan node (without sorted operands)
+    """
+
+    node = first if isinstance(first, tuple) and first[0] == OR else (OR, [first])
+    if isinstance(second, tuple) and second[0] == OR:
+        node[1].extend(second[1])
+    else:
+        node[1].append(second)
+    return node
+
+
+def _children(node):
+    """ Function which returns all children of plan node (for AND node, positives and then negatives)
+
+        Args:
+            node - plan node (tuple)
+
+        Return:
+            List of children
+    """
+
+    return list(node[1]) if node[0] == OR else list(node[1]) + list(node[2])
+
+
+def _order(plan, estimate, documents_count):
+    """ Function which sorts operands of all nodes by estimated number of documents
+
+        Nodes are gone through without recursion: first all nodes are listed (parents before children), and
+        then ordered from last to first, so children are always ordered before theirs parent.
+
+        Args:
+            plan - plan node
+            estimate - function which returns estimated number of documents for operand
+            documents_count - number of documents in whole index
+
+        Return:
+            Tuple (plan node with sorted operands, estimated number of documents in its result)
+    """
+
+    if not isinstance(plan, tuple):
+        return plan, estimate(plan)
+
+    nodes, stack = [], [plan]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(child for child in _children(node) if isinstance(child, tuple))
+
+    ordered = {}
+    for node in reversed(nodes):
+        children = [sorted((ordered[id(child)] if isinstance(child, tuple) else (child, estimate(child))
+                            for child in group), key=lambda item: item[1])
+                    for group in node[1:]]
+
+        if node[0] == OR:
+            ordered[id(node)] = (OR, tuple(child for child, cost in children[0])), \
+                min(sum(cost for child, cost in children[0]), documents_count)
+        else:
+            positives, negatives = children
+            ordered[id(node)] = (AND, tuple(child for child, cost in positives),
+                                 tuple(child for child, cost in negatives)), \
+                positives[0][1] if len(positives) > 0 else documents_count
+
+    return ordered[id(plan)]
+
+
+def create_tree(postfix_list):
+    """ Function which creates tree of operations (plan without ordered operands) from postfix list
+
+        Chains of AND and OR operators are merged into one node with many operands, and NOT operators are
+        pushed into AND nodes as differences. Tree doesn't depend on index, so it can be created once and
+        ordered (by order_plan) each time it is evaluated.
+
+        Args:
+            postfix_list - token list in postfix order (returned by PostfixParser convert_postfix)
+
+        Return:
+            Root node of tree
+    """
+
+    stack = []
+    for el in postfix_list:
+        if el not in PostfixParser.OPERATORS:
+            stack.append(el)
+        elif el == NOT:
+            stack.append(_not_node(stack.pop()))
+        else:
+            second = stack.pop()
+            first = stack.pop()
+            stack.append(_and_node(first, second) if el == AND else _or_node(first, second))
+    return stack.pop()
+
+
+def order_plan(tree, estimate, documents_count):
+    """ Function which creates plan from tree (created by create_tree), tree itself is not changed
+
+        Operands of every node are sorted by estimated number of documents (smallest first), so intersections
+        start from rarest word and can stop as soon as result is empty.
+
+        Args:
+            tree - root node of tree
+            estimate - function which returns estimated number of documents for operand (document frequency)
+            documents_count - number of documents in whole index
+
+        Return:
+            Plan (root plan node)
+    """
+
+    return _order(tree, estimate, documents_count)[0]
+
+
+def create_plan(postfix_list, estimate, documents_count):
+    """ Function which creates plan from postfix list (same as creating tree and ordering it)
+
+        Args:
+            postfix_list - token list in postfix order (returned by PostfixParser convert_postfix)
+            estimate - function which returns estimated number of documents for operand (document frequency)
+            documents_count - number of documents in whole index
+
+        Return:
+            Plan (root plan node)
+    """
+
+    return order_plan(create_tree(postfix_list), estimate, documents_count)
+
+
+def _add_result(frame, documents, universe):
+    """ Function which adds result of one child to evaluation frame of its parent
+
+        Args:
+            frame - list [node, children, index of next child, result]
+            documents - set of documents of last evaluated child
+            universe - set of all documents in index
+    """
+
+    node, children, index, result = frame
+    if node[0] == OR:
+        result.append(documents)
+    elif index <= len(node[1]):
+        frame[3] = documents if result is None else intersection(result, documents)
+    else:
+        frame[3] = difference(universe if result is None else result, documents)
+
+
+def evaluate_plan(plan, lookup, universe, explainer=None, probe=None):
+    """ Function which evaluates plan over sets of documents
+
+        Plan is evaluated without recursion, with stack of frames (one for each node which is being evaluated).
+        Children of OR node are joined all at once (k-way merge), and operands are looked up only when they are
+        needed, so if intersection becomes empty, rest of its operands are not looked up at all.
+
+        Operands of AND node after first one are given to probe together with result of node so far, so
+        operand whose documents are many more than that result can be checked only for those documents.
+
+        Args:
+            plan - plan (created by create_plan)
+            lookup - function which returns set of documents (sorted list or BitmapSet) for operand
+            universe - set of all documents in index (used for AND nodes without positives)
+            explainer - (_Explainer) object which is told when evaluation of every node starts and ends (used
+                    by explain_plan), default is None
+            probe - function which for operand and set of candidate documents returns sorted list of those
+                    candidates which contain operand, or None if operand should be looked up instead, default is
+                    None (operands are always looked up)
+
+        Return:
+            Sorted list (or BitmapSet) of documents
+    """
+
+    if explainer is not None:
+        explainer.enter(plan)
+    if not isinstance(plan, tuple):
+        return _lookup(plan, lookup, explainer)
+
+    stack = [[plan, _children(plan), 0, [] if plan[0] == OR else None]]
+    while True:
+        frame = stack[-1]
+        node, children, index, result = frame
+
+        if index < len(children) and (node[0] == OR or result is None or len(result) > 0):
+            frame[2] += 1
+            child = children[index]
+            if explainer is not None:
+                explainer.enter(child, node[0] == AND and index >= len(node[1]))
+            if isinstance(child, tuple):
+                stack.append([child, _children(child), 0, [] if child[0] == OR else None])
+            else:
+                candidates = result if node[0] == AND else None
+                _add_result(frame, _lookup(child, lookup, explainer, probe, candidates), universe)
+            continue
+
+        stack.pop()
+        documents = union_all(result) if node[0] == OR else (result if len(result) > 0 else [])
+        if explainer is not None:
+            explainer.leave(node, documents, len(children) - index)
+        if len(stack) == 0:
+            return documents
+        _add_result(stack[-1], documents, universe)
+
+
+def _lookup(operand, lookup, explainer, probe=None, candidates=None):
+    """ Function which looks up documents of operand (and tells explainer that its evaluation ended)
+
+        Args:
+            operand - operand of plan
+            lookup - function which returns set of documents for operand
+            explainer - (_Explainer) object which explains evaluation, or None
+            probe - function which returns those of candidates which contain operand (or None), default is None
+            candidates - set of documents to which result of operand is restricted (result of parent AND node so
+                    far), default is None
+
+        Return:
+            Set of documents of operand (if it was probed, only those which are among candidates)
+    """
+
+    documents = None
+    if probe is not None and candidates is not None:
+        documents = probe(operand, candidates)
+    if documents is None:
+        documents = lookup(operand)
+    if explainer is not None:
+        explainer.leave(operand, documents)
+    return documents
+
+
+# Names of plan operators in explained tree
+OPERATOR_NAMES = {AND: 'AND', OR: 'OR'}
+
+
+class _Explainer(object):
+    """ Class which creates explained tree while plan is evaluated by evaluate_plan
+
+        Every node of plan which is evaluated is turned into dictionary with 'operator' ('AND', 'OR' or 'TERM'),
+        number of documents in its result ('output') and time (in seconds) spent in it (with its children).
+        TERM nodes also have 'operand' (and 'estimate', if estimate is given), AND and OR nodes have list of
+        explained 'children' (negatives of AND are marked with 'negated'), list of sizes of theirs results
+        ('inputs', for AND without positives first input is universe) and number of children which were not
+        evaluated at all ('skipped', because intersection was already empty).
+    """
+
+    def __init__(self, universe_size, estimate=None, annotate=None):
+        """ Constructor
+
+            Args:
+                universe_size - number of documents in universe (first input of AND without positives)
+                estimate - function which returns estimated number of documents for operand, default is None
+                annotate - function which returns dictionary of additional data about operand (called right
+                        after operand is looked up, and added to its explained node), default is None
+        """
+
+        self.root = None
+        self._universe_size = universe_size
+        self._estimate = estimate
+        self._annotate = annotate
+        # stack of tuples (explained node, start time) of nodes which are being evaluated
+        self._stack = []
+
+    def enter(self, node, negated=False):
+        """ Method which is called before node is evaluated
+
+            Args:
+                node - plan node
+                negated - (bool) flag which indicates if node is negative of its parent AND node
+        """
+
+        if isinstance(node, tuple):
+            explained = {'operator': OPERATOR_NAMES[node[0]], 'children': [], 'inputs': [], 'skipped': 0}
+        else:
+            explained = {'operator': 'TERM', 'operand': node}
+            if self._estimate is not None:
+                explained['estimate'] = self._estimate(node)
+        if negated:
+            explained['negated'] = True
+            parent = self._stack[-1][0]
+            if len(parent['inputs']) == 0:
+                parent['inputs'].append(self._universe_size)
+        self._stack.append((explained, time.time()))
+
+    def leave(self, node, documents, skipped=0):
+        """ Method which is called after node is evaluated, it adds explained node to its parent
+
+            Args:
+                node - plan node
+                documents - set of documents of node
+                skipped - (int) number of children of node which were not evaluated
+        """
+
+        explained, start = self._stack.pop()
+        explained.update(output=len(documents), time=time.time() - start)
+        if isinstance(node, tuple):
+            explained['skipped'] = skipped
+        elif self._annotate is not None:
+            explained.update(self._annotate(node))
+
+        if len(self._stack) == 0:
+            self.root = explained
+        else:
+            parent = self._stack[-1][0]
+            parent['children'].append(explained)
+            parent['inputs'].append(len(documents))
+
+
+def explain_plan(plan, lookup, universe, estimate=None, annotate=None, probe=None):
+    """ Function which evaluates plan (by evaluate_plan) and explains how it was evaluated
+
+        Args:
+            plan - plan (created by create_plan)
+            lookup - function which returns set of documents (sorted list or BitmapSet) for operand
+            universe - set of all documents in index
+            estimate - function which returns estimated number of documents for operand, default is None
+            annotate - function which returns dictionary of additional data about operand (called right after
+                    operand is looked up, and added to its explained node), default is None
+            probe - function which returns those of candidates which contain operand (see evaluate_plan), default
+                    is None
+
+        Return:
+            Tuple (sorted list (or BitmapSet) of documents, explained root node, see _Explainer)
+    """
+
+    explainer = _Explainer(len(universe), estimate, annotate)
+    documents = evaluate_plan(plan, lookup, universe, explainer, probe)
+    return documents, explainer.root
+
+
+def format_explain(explained, describe=None):
+    """ Function which turns explained tree (returned by explain_plan) into text, one line per node
+
+        Children are indented under theirs parent. Each line contains operator (or operand), estimated number
+        of documents, sizes of inputs, size of output, time in milliseconds, and other data added to node.
+
+        Args:
+            explained - explained root node
+            describe - function which returns text which is shown for operand (for example syntagm instead of
+                    its key), default is None (operand is shown as is)
+
+        Return:
+            List of lines
+    """
+
+    shown = ['operator', 'operand', 'children', 'inputs', 'output', 'time', 'estimate', 'skipped', 'negated']
+    lines, stack = [], [(explained, 0)]
+    while stack:
+        node, depth = stack.pop()
+        name = node['operator'] if node['operator'] != 'TERM' else \
+            (describe(node['operand']) if describe is not None else node['operand'])
+        details = []
+        if 'estimate' in node:
+            details.append('est. %d' % node['estimate'])
+        if 'inputs' in node:
+            details.append('in: %s' % ', '.join(str(size) for size in node['inputs']))
+        details.append('out: %d' % node['output'])
+        details.append('%.3f ms' % (node['time'] * 1000))
+        if node.get('skipped'):
+            details.append('skipped: %d' % node['skipped'])
+        details.extend('%s: %s' % (key, node[key]) for key in sorted(node) if key not in shown)
+
+        lines.append('%s%s%s (%s)' % ('  ' * depth, 'NOT ' if node.get('negated') else '', name, ', '.join(details)))
+        stack.extend((child, depth + 1) for child in reversed(node.get('children', [])))
+    return lines